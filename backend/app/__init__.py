@@ -8,12 +8,13 @@ from .utils.config_loader import load_config
 from .utils.logger import setup_logger
 
 
-def create_app(config_path='config.yml'):
+def create_app(config_path='config.yml', startup_mode=None):
     """
     Flask应用工厂函数
 
     Args:
         config_path: 配置文件路径
+        startup_mode: 启动模式(blocking|background), 覆盖 系统配置.startup.mode, None则使用配置
 
     Returns:
         Flask应用实例
@@ -36,6 +37,10 @@ def create_app(config_path='config.yml'):
     log_config = config.get('日志配置', {})
     setup_logger(app, log_config)
 
+    # 初始化运行指标
+    from .utils.metrics import Metrics
+    Metrics.init_app(app, config.get('系统配置', {}).get('metrics', {}))
+
     # 注册蓝图
     from .routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
@@ -44,15 +49,12 @@ def create_app(config_path='config.yml'):
     from .routes.errors import register_error_handlers
     register_error_handlers(app)
 
-    # 初始化缓存
-    cache_config = config.get('缓存配置', {})
-    if cache_config.get('enabled', True):
-        from .services.cache_service import init_cache
-        init_cache(app, cache_config)
-
-        # 初始化定时任务调度器
-        from .services.scheduler import init_scheduler
-        init_scheduler(app)
+    # 初始化缓存与定时任务调度器(background模式下在后台线程中完成)
+    from .services.startup import StartupManager
+    startup_config = config.get('系统配置', {}).get('startup', {})
+    if startup_mode:
+        startup_config = dict(startup_config, mode=startup_mode)
+    StartupManager.start(app, config.get('缓存配置', {}), startup_config)
 
     app.logger.info("Flask应用初始化完成")
 
@@ -0,0 +1,198 @@
+"""
+知识星球API异步客户端
+基于asyncio对ZSXQClient进行封装,支持限定并发数的批量请求
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from .zsxq_client import ZSXQClient, ZSXQAPIError
+from .retry_policy import RetryPolicy
+
+
+class AsyncZSXQClient:
+    """
+    知识星球API异步客户端
+
+    与ZSXQClient方法一一对应, 错误同样以ZSXQAPIError抛出。
+    底层请求复用ZSXQClient的共享连接池, 在专用线程池中执行,
+    并发数由信号量限制。
+    """
+
+    # 批量请求支持的端点: 端点名 -> ZSXQClient方法名
+    ENDPOINTS = {
+        'detail': 'get_project_detail',
+        'stats': 'get_project_stats',
+        'daily_stats': 'get_daily_stats',
+        'ranking_list': 'get_ranking_list',
+        'topics': 'get_topics'
+    }
+
+    _executor = None
+    _executor_size = 0
+    _executor_lock = threading.Lock()
+
+    def __init__(self, app=None, max_concurrency=None):
+        """
+        初始化客户端
+
+        Args:
+            app: Flask应用实例
+            max_concurrency: 最大并发请求数,None则读取配置
+        """
+        self.app = app
+        # 线程池中没有请求上下文, 调用类别在创建时确定
+        self.client = ZSXQClient(app, call_class=RetryPolicy.current_call_class())
+
+        async_config = {}
+        if app:
+            async_config = app.config.get('ZSXQ_CONFIG', {}).get('知识星球', {}).get('async', {})
+
+        self.max_concurrency = max(int(max_concurrency or async_config.get('max_concurrency', 8)), 1)
+
+    @classmethod
+    def _submit(cls, size, func, *args):
+        """
+        提交到共享线程池(容量不足时扩容)
+
+        扩容时关闭旧线程池, 已提交的任务仍会执行完, 空闲线程随之退出;
+        获取线程池与提交在同一把锁内完成, 不会提交到已关闭的旧线程池。
+
+        Args:
+            size: 所需的最小线程数
+            func: 同步函数
+            *args: 位置参数
+
+        Returns:
+            concurrent.futures.Future: 任务结果
+        """
+        with cls._executor_lock:
+            if cls._executor is None or cls._executor_size < size:
+                if cls._executor is not None:
+                    cls._executor.shutdown(wait=False)
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=size,
+                    thread_name_prefix='zsxq-async'
+                )
+                cls._executor_size = size
+            return cls._executor.submit(func, *args)
+
+    async def _call(self, method_name, *args, **kwargs):
+        """
+        在线程池中执行同步客户端方法
+
+        Args:
+            method_name: ZSXQClient方法名
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            方法返回值
+        """
+        func = functools.partial(getattr(self.client, method_name), *args, **kwargs)
+        return await asyncio.wrap_future(self._submit(self.max_concurrency, func))
+
+    async def get_projects(self, scope='ongoing'):
+        """获取打卡项目列表"""
+        return await self._call('get_projects', scope=scope)
+
+    async def get_project_stats(self, project_id):
+        """获取项目统计数据"""
+        return await self._call('get_project_stats', project_id)
+
+    async def get_daily_stats(self, project_id, date=None):
+        """获取每日统计数据"""
+        return await self._call('get_daily_stats', project_id, date=date)
+
+    async def get_ranking_list(self, project_id, ranking_type='continuous', index=0, count=None):
+        """获取排行榜"""
+        return await self._call('get_ranking_list', project_id, ranking_type=ranking_type, index=index, count=count)
+
+    async def get_topics(self, project_id, count=20, end_time=None):
+        """获取打卡话题列表"""
+        return await self._call('get_topics', project_id, count=count, end_time=end_time)
+
+    async def get_project_detail(self, project_id, fallback=None):
+        """获取项目详情"""
+        return await self._call('get_project_detail', project_id, fallback=fallback)
+
+    async def run_many(self, func, items, max_concurrency=None):
+        """
+        在线程池中并发执行func(item)
+
+        Args:
+            func: 同步函数,接收单个item
+            items: 参数列表
+            max_concurrency: 本次最大并发数,None则使用客户端配置
+
+        Returns:
+            list: 与items顺序一致的结果列表,失败项为ZSXQAPIError实例
+
+        Raises:
+            Exception: func抛出的非上游错误(编程错误等)不作为失败项返回, 直接向上抛出
+        """
+        concurrency = max(int(max_concurrency or self.max_concurrency), 1)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(item):
+            async with semaphore:
+                try:
+                    return await asyncio.wrap_future(self._submit(concurrency, func, item))
+                except ZSXQAPIError as e:
+                    return e
+                except requests.RequestException as e:
+                    error_class = 'timeout' if isinstance(e, requests.Timeout) else 'connection'
+                    return ZSXQAPIError(f"网络请求失败: {str(e)}", retryable=True, error_class=error_class)
+
+        return await asyncio.gather(*(run_one(item) for item in items))
+
+    def run_many_sync(self, func, items, max_concurrency=None):
+        """
+        run_many的同步入口(供定时任务等非异步代码调用)
+
+        Args:
+            func: 同步函数,接收单个item
+            items: 参数列表
+            max_concurrency: 本次最大并发数
+
+        Returns:
+            list: 与items顺序一致的结果列表,失败项为ZSXQAPIError实例
+        """
+        return asyncio.run(self.run_many(func, items, max_concurrency=max_concurrency))
+
+    async def fetch_many(self, calls, max_concurrency=None):
+        """
+        并发获取多个(项目, 端点)的数据
+
+        Args:
+            calls: 请求列表, 每项为 (project_id, endpoint) 或
+                      (project_id, endpoint, kwargs), endpoint取值见ENDPOINTS
+            max_concurrency: 本次最大并发数,None则使用客户端配置
+
+        Returns:
+            list: 与calls顺序一致的结果列表,失败项为ZSXQAPIError实例
+        """
+        def fetch_one(item):
+            project_id, endpoint = item[0], item[1]
+            kwargs = item[2] if len(item) > 2 else {}
+
+            method_name = self.ENDPOINTS.get(endpoint)
+            if method_name is None:
+                raise ZSXQAPIError(f"不支持的端点: {endpoint}")
+            return getattr(self.client, method_name)(project_id, **kwargs)
+
+        return await self.run_many(fetch_one, calls, max_concurrency=max_concurrency)
+
+    def fetch_many_sync(self, calls, max_concurrency=None):
+        """
+        fetch_many的同步入口(供定时任务等非异步代码调用)
+
+        Args:
+            calls: 请求列表,格式同fetch_many
+            max_concurrency: 本次最大并发数
+
+        Returns:
+            list: 与calls顺序一致的结果列表,失败项为ZSXQAPIError实例
+        """
+        return asyncio.run(self.fetch_many(calls, max_concurrency=max_concurrency))
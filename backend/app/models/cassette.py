@@ -0,0 +1,280 @@
+"""
+上游请求录制/回放模块
+将知识星球API的请求与响应录制为磁带文件(gzip压缩的JSON Lines), 之后可脱离网络确定性地回放
+"""
+import base64
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = 'off'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+# 回放时需要保留的响应头
+RECORDED_HEADERS = ('Content-Type', 'Retry-After')
+
+
+class CassetteMiss(Exception):
+    """回放时磁带中没有对应的请求"""
+    def __init__(self, key):
+        super().__init__(f"磁带中没有该请求的录制: {key}")
+        self.key = key
+
+
+class CassetteResponse:
+    """回放的响应(提供客户端用到的requests.Response属性)"""
+
+    def __init__(self, entry):
+        self.status_code = entry['status']
+        self.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        if 'body_b64' in entry:
+            self.content = base64.b64decode(entry['body_b64'])
+        else:
+            self.content = entry.get('body', '').encode('utf-8')
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+class Cassette:
+    """
+    单个磁带文件
+
+    录制: 每次上游请求追加一行记录(请求键、状态码、响应体、耗时、完成时间)。
+    每个进程写入各自的文件(文件名中加入pid, 如 upstream.1234.jsonl.gz), 多worker同时录制不会互相损坏。
+    回放: 加载该路径及所有进程的录制文件, 按完成时间合并到同一时间线; 按请求键分组,
+    同一键的多次请求按录制顺序依次返回, 用完后重复最后一条。
+    time_scale大于0时按录制时间线回放: 响应不早于 回放开始 + 录制完成时间 * time_scale 返回,
+    且至少等待 录制耗时 * time_scale(0表示立即返回)。
+    """
+
+    def __init__(self, path, mode, time_scale=1.0, ignore_params=('date',), on_exhausted='repeat'):
+        self.path = path
+        self.mode = mode
+        self.time_scale = float(time_scale)
+        self.ignore_params = set(ignore_params or ())
+        self.on_exhausted = on_exhausted
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._replay_started = None
+        self._entries = defaultdict(list)
+        self._positions = defaultdict(int)
+        self._stats = {'recorded': 0, 'replayed': 0, 'repeated': 0, 'misses': 0}
+
+        if mode == MODE_REPLAY:
+            self._load()
+        elif mode == MODE_RECORD:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def replaying(self):
+        return self.mode == MODE_REPLAY
+
+    def request_key(self, method, url, params=None):
+        """
+        构建请求键(方法 + 路径 + 排序后的查询参数)
+
+        随时间变化的参数(如每日统计的date)不参与匹配。
+        """
+        path = urlparse(url).path
+        items = sorted(
+            (str(key), str(value)) for key, value in (params or {}).items()
+            if key not in self.ignore_params
+        )
+        query = '&'.join(f"{key}={value}" for key, value in items)
+        return f"{method.upper()} {path}" + (f"?{query}" if query else '')
+
+    def _split_path(self):
+        """拆分磁带路径为(目录/主文件名, 扩展名), 如 cassettes/upstream 与 .jsonl.gz"""
+        directory, filename = os.path.split(self.path)
+        stem, dot, suffix = filename.partition('.')
+        return os.path.join(directory, stem), dot + suffix
+
+    def _record_path(self):
+        """本进程的录制文件"""
+        stem, suffix = self._split_path()
+        return f"{stem}.{os.getpid()}{suffix}"
+
+    def _replay_paths(self):
+        """回放时加载的文件: 磁带路径本身与各进程的录制文件"""
+        stem, suffix = self._split_path()
+        paths = [self.path] if os.path.exists(self.path) else []
+        for path in sorted(glob.glob(f"{glob.escape(stem)}.*{glob.escape(suffix)}")):
+            pid = path[len(stem) + 1:len(path) - len(suffix)]
+            if pid.isdigit():
+                paths.append(path)
+        return paths
+
+    def _load(self):
+        """加载磁带文件, 带完成时间戳的记录按时间戳合并为同一时间线"""
+        paths = self._replay_paths()
+        if not paths:
+            raise FileNotFoundError(f"磁带文件不存在: {self.path}")
+
+        entries = []
+        for path in paths:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entries.append(json.loads(line))
+
+        if entries and all('ts' in entry for entry in entries):
+            first = min(entry['ts'] for entry in entries)
+            for entry in entries:
+                entry['at'] = entry['ts'] - first
+        entries.sort(key=lambda entry: entry.get('at', 0))
+
+        for entry in entries:
+            self._entries[entry['key']].append(entry)
+        logger.info(f"加载磁带 {', '.join(paths)}: {len(entries)} 条记录, {len(self._entries)} 个请求键")
+
+    def record(self, method, url, params, response=None, error=None, elapsed=0.0):
+        """
+        录制一次上游请求
+
+        Args:
+            method: 请求方法
+            url: 完整URL
+            params: 查询参数
+            response: requests.Response, 网络错误时为None
+            error: 网络异常
+            elapsed: 耗时(秒)
+        """
+        entry = {
+            'key': self.request_key(method, url, params),
+            'at': round(time.monotonic() - self._started, 4),
+            'ts': round(time.time(), 4),
+            'elapsed': round(elapsed, 4)
+        }
+        if error is not None:
+            entry['error'] = type(error).__name__
+            entry['message'] = str(error)[:200]
+        else:
+            entry['status'] = response.status_code
+            entry['headers'] = {
+                name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers
+            }
+            try:
+                entry['body'] = response.content.decode('utf-8')
+            except UnicodeDecodeError:
+                entry['body_b64'] = base64.b64encode(response.content).decode('ascii')
+
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            # 每条记录单独追加一个gzip成员, 进程中途退出也不会损坏已录制的内容
+            with gzip.open(self._record_path(), 'at', encoding='utf-8') as f:
+                f.write(line)
+            self._stats['recorded'] += 1
+
+    def replay(self, method, url, params=None):
+        """
+        回放一次上游请求
+
+        Returns:
+            CassetteResponse: 录制的响应
+
+        Raises:
+            CassetteMiss: 磁带中没有该请求
+            requests.RequestException: 录制时发生的网络错误
+        """
+        key = self.request_key(method, url, params)
+
+        with self._lock:
+            if self._replay_started is None:
+                self._replay_started = time.monotonic()
+            entries = self._entries.get(key)
+            if not entries:
+                self._stats['misses'] += 1
+                raise CassetteMiss(key)
+
+            position = self._positions[key]
+            if position >= len(entries):
+                if self.on_exhausted != 'repeat':
+                    self._stats['misses'] += 1
+                    raise CassetteMiss(key)
+                self._stats['repeated'] += 1
+                position = len(entries) - 1
+            else:
+                self._positions[key] = position + 1
+            self._stats['replayed'] += 1
+            entry = entries[position]
+
+        if self.time_scale > 0:
+            # 按录制时间线: 不早于录制时的完成时间, 也不短于录制时的耗时
+            ready_at = self._replay_started + entry.get('at', 0) * self.time_scale
+            wait = max(ready_at - time.monotonic(), entry.get('elapsed', 0) * self.time_scale)
+            if wait > 0:
+                time.sleep(wait)
+
+        if 'error' in entry:
+            raise requests.ConnectionError(f"[回放] {entry['error']}: {entry.get('message', '')}")
+
+        return CassetteResponse(entry)
+
+    def get_stats(self):
+        """获取录制/回放统计"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({'mode': self.mode, 'path': self.path, 'keys': len(self._entries)})
+        return stats
+
+
+class CassetteRegistry:
+    """进程内磁带注册表(同一配置只打开一次)"""
+
+    _cassette = None
+    _config = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, config):
+        """
+        获取当前配置对应的磁带
+
+        Args:
+            config: 录制配置 (知识星球.cassette)
+
+        Returns:
+            Cassette: 磁带, mode为off时返回None
+        """
+        mode = (config or {}).get('mode', MODE_OFF)
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            return None
+
+        if cls._cassette is None or cls._config != config:
+            with cls._lock:
+                if cls._cassette is None or cls._config != config:
+                    cls._cassette = Cassette(
+                        config.get('path', 'cassettes/upstream.jsonl.gz'),
+                        mode,
+                        time_scale=config.get('time_scale', 1.0),
+                        ignore_params=config.get('ignore_params', ['date']),
+                        on_exhausted=config.get('on_exhausted', 'repeat')
+                    )
+                    cls._config = dict(config)
+                    logger.warning(f"上游请求{'录制' if mode == MODE_RECORD else '回放'}模式: {cls._cassette.path}")
+        return cls._cassette
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取录制/回放统计
+
+        Returns:
+            dict: 统计信息, 未启用时返回None
+        """
+        return cls._cassette.get_stats() if cls._cassette else None
@@ -0,0 +1,202 @@
+"""
+上游API熔断器
+按端点族(projects|statistics|ranking_list|topics)熔断, 上游故障时快速失败
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+# 逻辑端点名 -> 端点族
+ENDPOINT_FAMILIES = {
+    'projects': 'projects',
+    'project_detail': 'projects',
+    'statistics': 'statistics',
+    'daily_stats': 'statistics',
+    'ranking_list': 'ranking_list',
+    'topics': 'topics'
+}
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    单个端点族的熔断器
+
+    closed: 正常放行, 连续失败达到阈值后进入open
+    open: 直接拒绝, 冷却时间结束后进入half_open
+    half_open: 放行少量探测请求, 成功则closed, 失败则重新open
+    """
+
+    def __init__(self, family, failure_threshold=5, recovery_timeout=30, half_open_max_calls=1):
+        self.family = family
+        self.failure_threshold = int(failure_threshold)
+        self.recovery_timeout = float(recovery_timeout)
+        self.half_open_max_calls = int(half_open_max_calls)
+
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_calls = 0
+        self.rejected = 0
+        self.transitions = deque(maxlen=20)
+        self._lock = threading.Lock()
+
+    def _transition(self, new_state, reason):
+        """切换状态并记录日志(需持有锁)"""
+        old_state = self.state
+        if old_state == new_state:
+            return
+
+        self.state = new_state
+        if new_state == STATE_OPEN:
+            self.opened_at = time.monotonic()
+        if new_state != STATE_HALF_OPEN:
+            self.half_open_calls = 0
+
+        self.transitions.append({
+            'from': old_state,
+            'to': new_state,
+            'reason': reason,
+            'at': datetime.now().isoformat()
+        })
+
+        log = logger.warning if new_state == STATE_OPEN else logger.info
+        log(f"熔断器 {self.family}: {old_state} -> {new_state} ({reason})")
+
+    def allow_request(self):
+        """
+        判断是否放行本次请求
+
+        Returns:
+            bool: 是否放行
+        """
+        with self._lock:
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    return False
+                self._transition(STATE_HALF_OPEN, "冷却结束, 开始探测")
+
+            if self.state == STATE_HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self.half_open_calls += 1
+
+            return True
+
+    def record_success(self):
+        """记录一次成功调用"""
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == STATE_HALF_OPEN:
+                self._transition(STATE_CLOSED, "探测请求成功")
+
+    def release(self):
+        """请求未真正发出(如被本地限流拒绝)时归还探测名额"""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def record_failure(self, reason=''):
+        """记录一次失败调用"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == STATE_HALF_OPEN:
+                self._transition(STATE_OPEN, f"探测请求失败: {reason}")
+            elif self.state == STATE_CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._transition(STATE_OPEN, f"连续失败 {self.consecutive_failures} 次: {reason}")
+
+    def retry_in(self):
+        """
+        距离下次探测的剩余秒数
+
+        Returns:
+            float: 剩余秒数, 非open状态返回0
+        """
+        if self.state != STATE_OPEN or self.opened_at is None:
+            return 0.0
+        return max(self.recovery_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def to_dict(self):
+        """导出熔断器状态"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'recovery_timeout': self.recovery_timeout,
+                'retry_in': round(self.retry_in(), 2),
+                'rejected': self.rejected,
+                'transitions': list(self.transitions)
+            }
+
+
+class CircuitBreakerRegistry:
+    """进程内熔断器注册表"""
+
+    _breakers = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_family(endpoint_name):
+        """
+        获取逻辑端点所属的端点族
+
+        Args:
+            endpoint_name: 逻辑端点名
+
+        Returns:
+            str: 端点族
+        """
+        return ENDPOINT_FAMILIES.get(endpoint_name, 'other')
+
+    @classmethod
+    def get(cls, endpoint_name, config):
+        """
+        获取端点所属族的熔断器, 不存在时按配置创建
+
+        Args:
+            endpoint_name: 逻辑端点名
+            config: 熔断配置 (知识星球.circuit_breaker)
+
+        Returns:
+            CircuitBreaker: 熔断器, 未启用时返回None
+        """
+        if not config.get('enabled', True):
+            return None
+
+        family = cls.get_family(endpoint_name)
+        breaker = cls._breakers.get(family)
+        if breaker is None:
+            with cls._lock:
+                breaker = cls._breakers.get(family)
+                if breaker is None:
+                    family_config = dict(config)
+                    family_config.update(config.get('families', {}).get(family, {}))
+                    breaker = CircuitBreaker(
+                        family,
+                        failure_threshold=family_config.get('failure_threshold', 5),
+                        recovery_timeout=family_config.get('recovery_timeout', 30),
+                        half_open_max_calls=family_config.get('half_open_max_calls', 1)
+                    )
+                    cls._breakers[family] = breaker
+        return breaker
+
+    @classmethod
+    def get_states(cls):
+        """
+        获取所有熔断器状态
+
+        Returns:
+            dict: 端点族 -> 状态信息
+        """
+        return {family: breaker.to_dict() for family, breaker in list(cls._breakers.items())}
@@ -0,0 +1,201 @@
+"""
+HTTP连接池模块
+为知识星球API客户端提供进程内共享的keep-alive连接池
+"""
+import os
+import socket
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """支持自定义socket选项(TCP keep-alive)的HTTP适配器"""
+
+    def __init__(self, socket_options=None, **kwargs):
+        # HTTPAdapter.__init__ 会调用 init_poolmanager, 需先保存socket选项
+        self._socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._socket_options is not None:
+            kwargs['socket_options'] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class HTTPSessionPool:
+    """
+    进程内共享的HTTP会话池
+
+    Flask请求线程与APScheduler任务共用同一个requests.Session,
+    连接由urllib3连接池管理并在调用之间复用, 避免每次请求重新握手。
+    """
+
+    _session = None
+    _config = {}
+    _pid = None
+    _lock = threading.Lock()
+    _in_flight = 0
+
+    @classmethod
+    def _build_socket_options(cls, pool_config):
+        """
+        构建TCP keep-alive的socket选项
+
+        Args:
+            pool_config: 连接池配置
+
+        Returns:
+            list: socket选项列表
+        """
+        options = list(HTTPConnection.default_socket_options)
+        if not pool_config.get('keep_alive', True):
+            return options
+
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+
+        # 以下选项并非所有平台都支持
+        tcp_options = [
+            ('TCP_KEEPIDLE', pool_config.get('keep_alive_idle', 60)),
+            ('TCP_KEEPINTVL', pool_config.get('keep_alive_interval', 15)),
+            ('TCP_KEEPCNT', pool_config.get('keep_alive_count', 4)),
+        ]
+        for name, value in tcp_options:
+            if hasattr(socket, name) and value:
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), int(value)))
+
+        return options
+
+    @classmethod
+    def _create_session(cls, pool_config):
+        """
+        创建带连接池的会话
+
+        Args:
+            pool_config: 连接池配置
+
+        Returns:
+            requests.Session: 会话实例
+        """
+        adapter = KeepAliveAdapter(
+            socket_options=cls._build_socket_options(pool_config),
+            pool_connections=pool_config.get('pool_connections', 4),
+            pool_maxsize=pool_config.get('pool_maxsize', 20),
+            pool_block=pool_config.get('pool_block', False),
+            max_retries=0
+        )
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @classmethod
+    def get_session(cls, pool_config=None):
+        """
+        获取共享会话(首次调用时创建)
+
+        Args:
+            pool_config: 连接池配置, 仅在首次创建时生效
+
+        Returns:
+            requests.Session: 会话实例
+        """
+        pid = os.getpid()
+        if cls._session is not None and cls._pid == pid:
+            return cls._session
+
+        with cls._lock:
+            # gunicorn fork出的worker不能复用父进程的连接
+            if cls._session is None or cls._pid != pid:
+                cls._config = dict(pool_config or {})
+                cls._session = cls._create_session(cls._config)
+                cls._pid = pid
+                cls._in_flight = 0
+
+        return cls._session
+
+    @classmethod
+    def request(cls, method, url, pool_config=None, **kwargs):
+        """
+        通过共享会话发起请求
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            pool_config: 连接池配置
+            **kwargs: 透传给requests的参数
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        session = cls.get_session(pool_config)
+
+        with cls._lock:
+            cls._in_flight += 1
+        try:
+            return session.request(method=method, url=url, **kwargs)
+        finally:
+            with cls._lock:
+                cls._in_flight -= 1
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取连接池统计信息
+
+        Returns:
+            dict: 包含请求数、新建连接数、连接复用率、当前打开连接数等
+        """
+        stats = {
+            'initialized': cls._session is not None,
+            'pool_maxsize': cls._config.get('pool_maxsize', 20),
+            'keep_alive': cls._config.get('keep_alive', True),
+            'requests': 0,
+            'connections_created': 0,
+            'reuse_ratio': 0.0,
+            'idle_connections': 0,
+            'in_flight': cls._in_flight,
+            'open_connections': cls._in_flight,
+            'hosts': {}
+        }
+
+        if cls._session is None:
+            return stats
+
+        adapter = cls._session.get_adapter('https://')
+        pools = adapter.poolmanager.pools
+        for pool_key in list(pools.keys()):
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+
+            # 队列中为None的槽位表示尚未建立的连接
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+            requests_count = pool.num_requests
+            created = pool.num_connections
+
+            stats['requests'] += requests_count
+            stats['connections_created'] += created
+            stats['idle_connections'] += idle
+            stats['hosts'][f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                'requests': requests_count,
+                'connections_created': created,
+                'idle_connections': idle
+            }
+
+        if stats['requests'] > 0:
+            reused = max(stats['requests'] - stats['connections_created'], 0)
+            stats['reuse_ratio'] = round(reused / stats['requests'], 4)
+        stats['open_connections'] = stats['idle_connections'] + cls._in_flight
+
+        return stats
+
+    @classmethod
+    def close(cls):
+        """关闭会话并释放所有连接"""
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
@@ -0,0 +1,264 @@
+"""
+上游请求重试策略
+指数退避 + 完全抖动, 按调用类别区分上限, 并以全局重试预算防止重试放大故障
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from flask import has_request_context
+
+
+# 调用类别默认参数
+DEFAULT_CLASS_POLICIES = {
+    # 用户请求: 少量快速重试, 不让用户等太久
+    'interactive': {
+        'max_attempts': 2,
+        'base_delay': 0.2,
+        'max_delay': 1.0,
+        'max_retry_after': 2
+    },
+    # 后台刷新(定时任务等): 可以耐心等待
+    'background': {
+        'max_attempts': 4,
+        'base_delay': 1.0,
+        'max_delay': 30.0,
+        'max_retry_after': 60
+    }
+}
+
+
+def parse_retry_after(value):
+    """
+    解析Retry-After响应头
+
+    Args:
+        value: 头部值(秒数或HTTP日期)
+
+    Returns:
+        float: 需要等待的秒数, 无法解析时返回None
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(retry_at.timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    进程级重试预算
+
+    每次首发请求存入ratio个额度, 每次重试消耗1个额度;
+    另按min_per_second持续补充, 保证低流量时也能少量重试。
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=1.0, max_tokens=20.0):
+        self.ratio = float(ratio)
+        self.min_per_second = float(min_per_second)
+        self.max_tokens = float(max_tokens)
+        self._tokens = self.max_tokens
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._ts) * self.min_per_second)
+        self._ts = now
+
+    def deposit(self):
+        """记录一次首发请求"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self):
+        """
+        尝试为一次重试扣减额度
+
+        Returns:
+            bool: 是否允许重试
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def tokens(self):
+        with self._lock:
+            self._refill()
+            return round(self._tokens, 3)
+
+
+class RetryPolicy:
+    """上游请求重试策略(进程内共享)"""
+
+    _budget = None
+    _budget_config = None
+    _lock = threading.Lock()
+    _stats = {}
+
+    @staticmethod
+    def current_call_class():
+        """
+        判断当前调用类别
+
+        Returns:
+            str: 处于Flask请求中为interactive, 否则(定时任务、后台线程)为background
+        """
+        return 'interactive' if has_request_context() else 'background'
+
+    @classmethod
+    def get_class_policy(cls, call_class, config):
+        """
+        获取调用类别的重试参数
+
+        Args:
+            call_class: 调用类别
+            config: 重试配置 (知识星球.retry)
+
+        Returns:
+            dict: 重试参数
+        """
+        policy = dict(DEFAULT_CLASS_POLICIES.get(call_class, DEFAULT_CLASS_POLICIES['interactive']))
+        policy.update(config.get(call_class, {}))
+        return policy
+
+    @classmethod
+    def get_budget(cls, config):
+        """获取全局重试预算(配置变化时重建)"""
+        budget_config = config.get('budget', {})
+        if cls._budget is None or cls._budget_config != budget_config:
+            with cls._lock:
+                if cls._budget is None or cls._budget_config != budget_config:
+                    cls._budget = RetryBudget(
+                        ratio=budget_config.get('ratio', 0.2),
+                        min_per_second=budget_config.get('min_per_second', 1.0),
+                        max_tokens=budget_config.get('max_tokens', 20)
+                    )
+                    cls._budget_config = budget_config
+        return cls._budget
+
+    @classmethod
+    def _get_stats_entry(cls, endpoint_name):
+        """获取端点的统计条目"""
+        entry = cls._stats.get(endpoint_name)
+        if entry is None:
+            with cls._lock:
+                entry = cls._stats.setdefault(endpoint_name, {
+                    'retries': 0,
+                    'recovered': 0,
+                    'exhausted': 0,
+                    'budget_denied': 0,
+                    'retry_delay_seconds_total': 0.0,
+                    'extra_latency_seconds_total': 0.0,
+                    'by_class': {}
+                })
+        return entry
+
+    @classmethod
+    def backoff_delay(cls, attempt, policy):
+        """
+        计算指数退避+完全抖动的等待时间
+
+        Args:
+            attempt: 已失败的次数(从1开始)
+            policy: 重试参数
+
+        Returns:
+            float: 等待秒数
+        """
+        cap = min(float(policy['max_delay']), float(policy['base_delay']) * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+    @classmethod
+    def next_delay(cls, error, attempt, call_class, endpoint_name, config):
+        """
+        判断失败后是否重试, 并给出等待时间
+
+        Args:
+            error: ZSXQAPIError
+            attempt: 已失败的次数(从1开始)
+            call_class: 调用类别
+            endpoint_name: 逻辑端点名
+            config: 重试配置
+
+        Returns:
+            float: 需等待的秒数, 不重试时返回None
+        """
+        if not config.get('enabled', True) or not getattr(error, 'retryable', False):
+            return None
+
+        policy = cls.get_class_policy(call_class, config)
+        entry = cls._get_stats_entry(endpoint_name)
+
+        if attempt >= int(policy['max_attempts']):
+            entry['exhausted'] += 1
+            return None
+
+        delay = cls.backoff_delay(attempt, policy)
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            # 服务端要求的等待时间超出本类别可接受范围时直接放弃
+            if retry_after > float(policy['max_retry_after']):
+                entry['exhausted'] += 1
+                return None
+            delay = max(delay, retry_after)
+
+        if not cls.get_budget(config).try_spend():
+            entry['budget_denied'] += 1
+            return None
+
+        entry['retries'] += 1
+        entry['retry_delay_seconds_total'] += delay
+        entry['by_class'][call_class] = entry['by_class'].get(call_class, 0) + 1
+        return delay
+
+    @classmethod
+    def record_request(cls, config):
+        """记录一次首发请求(为重试预算存入额度)"""
+        if config.get('enabled', True):
+            cls.get_budget(config).deposit()
+
+    @classmethod
+    def record_retried_call(cls, endpoint_name, succeeded, extra_latency):
+        """
+        记录一次发生过重试的调用
+
+        Args:
+            endpoint_name: 逻辑端点名
+            succeeded: 最终是否成功
+            extra_latency: 重试带来的额外耗时(失败尝试+退避等待, 秒)
+        """
+        entry = cls._get_stats_entry(endpoint_name)
+        if succeeded:
+            entry['recovered'] += 1
+        entry['extra_latency_seconds_total'] += extra_latency
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取重试统计
+
+        Returns:
+            dict: 重试预算余量及各端点的重试次数、额外等待时间
+        """
+        endpoints = {}
+        for name, entry in cls._stats.items():
+            endpoints[name] = dict(entry, by_class=dict(entry['by_class']))
+
+        return {
+            'budget_tokens': cls._budget.tokens if cls._budget else None,
+            'endpoints': endpoints
+        }
@@ -2,29 +2,52 @@
 知识星球API客户端
 封装所有知识星球API调用
 """
+import time
 import requests
 from flask import current_app
+from .http_pool import HTTPSessionPool
+from .retry_policy import RetryPolicy, parse_retry_after
+from .circuit_breaker import CircuitBreakerRegistry
+from .cassette import CassetteRegistry, CassetteMiss
+from ..utils.codec import get_codec
+from ..utils.metrics import Metrics
+from ..services.rate_limiter import UpstreamRateLimiter, RateLimitExceeded
 
 
 class ZSXQAPIError(Exception):
     """知识星球API错误"""
-    def __init__(self, message, status_code=None, response_data=None):
+    def __init__(self, message, status_code=None, response_data=None, retryable=False, retry_after=None,
+                 error_class='other'):
         super().__init__(message)
         self.status_code = status_code
         self.response_data = response_data
+        self.retryable = retryable
+        self.retry_after = retry_after
+        # 错误类别, 用于指标统计
+        self.error_class = error_class
+
+
+class CircuitOpenError(ZSXQAPIError):
+    """端点族熔断中, 请求未发出"""
+    def __init__(self, family, retry_in=None):
+        super().__init__(f"知识星球接口暂不可用({family}), 已熔断", status_code=503, error_class='circuit_open')
+        self.family = family
+        self.retry_in = retry_in
 
 
 class ZSXQClient:
     """知识星球API客户端"""
 
-    def __init__(self, app=None):
+    def __init__(self, app=None, call_class=None):
         """
         初始化客户端
 
         Args:
             app: Flask应用实例
+            call_class: 调用类别 (interactive|background), None则按是否处于Flask请求中判断
         """
         self.app = app
+        self.call_class = call_class
         self._init_from_app(app)
 
     def _init_from_app(self, app):
@@ -36,6 +59,13 @@ class ZSXQClient:
             self.token = zsxq_config.get('token')
             self.group_id = zsxq_config.get('group_id')
             self.api_base = zsxq_config.get('api_base', 'https://api.zsxq.com')
+            self.pool_config = zsxq_config.get('http_pool', {})
+            self.rate_limit_config = zsxq_config.get('rate_limit', {})
+            self.retry_config = zsxq_config.get('retry', {})
+            self.breaker_config = zsxq_config.get('circuit_breaker', {})
+            self.cassette_config = zsxq_config.get('cassette', {})
+            # 解析上游响应的JSON编解码器
+            self.codec = get_codec(zsxq_config.get('json_codec', 'auto'), json_only=True)
 
             # 验证必需配置
             if not self.token or not self.group_id:
@@ -66,15 +96,16 @@ class ZSXQClient:
         import uuid
         return str(uuid.uuid4())
 
-    def _make_request(self, method, endpoint, params=None, data=None):
+    def _make_request(self, method, endpoint, params=None, data=None, endpoint_name='other'):
         """
-        发起HTTP请求
+        发起HTTP请求(失败时按重试策略重试)
 
         Args:
             method: 请求方法 (GET, POST等)
             endpoint: API端点路径
             params: URL查询参数
             data: 请求体数据
+            endpoint_name: 逻辑端点名(用于限流、重试等按端点统计的策略)
 
         Returns:
             dict: 响应数据
@@ -83,18 +114,152 @@ class ZSXQClient:
             ZSXQAPIError: API调用失败
         """
         url = f"{self.api_base}{endpoint}"
-        headers = self._get_headers()
+        call_class = self.call_class or RetryPolicy.current_call_class()
+        breaker = CircuitBreakerRegistry.get(endpoint_name, self.breaker_config)
+        RetryPolicy.record_request(self.retry_config)
+
+        started = time.monotonic()
+        attempt_started = started
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = self._send_with_breaker(breaker, method, url, params, data, endpoint_name)
+            except ZSXQAPIError as e:
+                Metrics.inc('zsxq_upstream_errors_total', endpoint=endpoint_name, error=e.error_class)
+                delay = RetryPolicy.next_delay(e, attempt, call_class, endpoint_name, self.retry_config)
+                if delay is None:
+                    if attempt > 1:
+                        RetryPolicy.record_retried_call(endpoint_name, False, time.monotonic() - started)
+                    raise
+
+                if self.app:
+                    self.app.logger.warning(
+                        f"ZSXQ API请求失败, {delay:.2f}秒后第{attempt}次重试: "
+                        f"{method} {url} ({str(e)})"
+                    )
+                time.sleep(delay)
+                attempt_started = time.monotonic()
+                continue
+
+            if attempt > 1:
+                RetryPolicy.record_retried_call(endpoint_name, True, attempt_started - started)
+            return result
+
+    def _send_with_breaker(self, breaker, method, url, params, data, endpoint_name):
+        """
+        经熔断器发起单次请求
+
+        Args:
+            breaker: 端点族熔断器, 未启用时为None
+            其余参数同_send_request
+
+        Returns:
+            dict: 响应数据
+
+        Raises:
+            CircuitOpenError: 熔断中, 请求未发出
+            ZSXQAPIError: API调用失败
+        """
+        if breaker is None:
+            return self._send_request(method, url, params, data, endpoint_name)
+
+        if not breaker.allow_request():
+            raise CircuitOpenError(breaker.family, retry_in=breaker.retry_in())
 
         try:
-            response = requests.request(
+            result = self._send_request(method, url, params, data, endpoint_name)
+        except ZSXQAPIError as e:
+            if e.status_code == 429:
+                # 被本地限流拒绝(请求未发出)或上游返回429: 上游在主动限流, 既不关闭也不触发熔断
+                breaker.release()
+            elif e.retryable:
+                # 网络错误、超时与5xx视为上游故障
+                breaker.record_failure(str(e))
+            else:
+                breaker.record_success()
+            raise
+        except Exception:
+            # 非API错误(如Redis异常、响应解析异常)无法判断上游是否健康, 只归还探测名额,
+            # 否则半开状态的名额被占用后熔断器无法再放行探测请求
+            breaker.release()
+            raise
+
+        breaker.record_success()
+        return result
+
+    def _send_http(self, method, url, headers, params, data):
+        """
+        发出HTTP请求, 启用录制/回放时经过磁带
+
+        Returns:
+            requests.Response 或回放的 CassetteResponse
+
+        Raises:
+            requests.RequestException: 网络错误
+            ZSXQAPIError: 回放时磁带中没有该请求
+        """
+        cassette = CassetteRegistry.get(self.cassette_config)
+        if cassette is not None and cassette.replaying:
+            try:
+                return cassette.replay(method, url, params)
+            except CassetteMiss as e:
+                raise ZSXQAPIError(str(e), status_code=404, error_class='cassette_miss')
+
+        started = time.monotonic()
+        try:
+            response = HTTPSessionPool.request(
                 method=method,
                 url=url,
+                pool_config=self.pool_config,
                 headers=headers,
                 params=params,
                 json=data,
                 timeout=10,
                 verify=False  # 禁用SSL证书验证
             )
+        except requests.RequestException as e:
+            if cassette is not None:
+                cassette.record(method, url, params, error=e, elapsed=time.monotonic() - started)
+            raise
+
+        if cassette is not None:
+            cassette.record(method, url, params, response=response, elapsed=time.monotonic() - started)
+        return response
+
+    def _send_request(self, method, url, params, data, endpoint_name):
+        """
+        发起单次HTTP请求
+
+        Args:
+            method: 请求方法
+            url: 完整URL
+            params: URL查询参数
+            data: 请求体数据
+            endpoint_name: 逻辑端点名
+
+        Returns:
+            dict: 响应数据
+
+        Raises:
+            ZSXQAPIError: API调用失败, retryable标记是否值得重试
+        """
+        headers = self._get_headers()
+
+        # 申请上游调用令牌(所有worker共享预算; 用户请求只短暂等待, 超时后由调用方返回兜底数据或429)
+        try:
+            UpstreamRateLimiter.acquire(endpoint_name, self.rate_limit_config,
+                                        call_class=self.call_class or RetryPolicy.current_call_class())
+        except RateLimitExceeded as e:
+            raise ZSXQAPIError(f"请求过于频繁: {str(e)}", status_code=429, error_class='rate_limited')
+
+        http_started = time.perf_counter()
+        try:
+            response = self._send_http(method, url, headers, params, data)
+            Metrics.observe('zsxq_upstream_request_duration_seconds',
+                            time.perf_counter() - http_started, endpoint=endpoint_name)
+            Metrics.inc('zsxq_upstream_responses_total', endpoint=endpoint_name, status=response.status_code)
+            Metrics.inc('zsxq_upstream_response_bytes_total', len(response.content), endpoint=endpoint_name)
 
             # 记录日志
             if self.app:
@@ -105,18 +270,33 @@ class ZSXQClient:
 
             # 检查HTTP状态码
             if response.status_code == 401:
-                raise ZSXQAPIError("Token已失效", status_code=401)
+                raise ZSXQAPIError("Token已失效", status_code=401, error_class='auth')
+            elif response.status_code == 404:
+                raise ZSXQAPIError("请求的资源不存在", status_code=404, error_class='not_found')
             elif response.status_code == 429:
-                raise ZSXQAPIError("请求过于频繁", status_code=429)
+                UpstreamRateLimiter.record_throttled(endpoint_name, self.rate_limit_config)
+                raise ZSXQAPIError(
+                    "请求过于频繁",
+                    status_code=429,
+                    retryable=True,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                    error_class='throttled'
+                )
             elif response.status_code >= 500:
-                raise ZSXQAPIError("知识星球服务器错误", status_code=response.status_code)
+                raise ZSXQAPIError(
+                    "知识星球服务器错误",
+                    status_code=response.status_code,
+                    retryable=True,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                    error_class='server_error'
+                )
 
             # 解析响应
             try:
-                response_data = response.json()
+                response_data = self.codec.loads(response.content)
             except ValueError:
                 # 如果响应不是JSON格式，直接抛出错误
-                raise ZSXQAPIError(f"API响应格式错误: {response.text[:200]}")
+                raise ZSXQAPIError(f"API响应格式错误: {response.text[:200]}", error_class='malformed')
 
             # 检查业务状态码
             if not response_data.get('succeeded', False):
@@ -125,14 +305,68 @@ class ZSXQClient:
                     error_msg = error_info.get('message', '未知错误')
                 else:
                     error_msg = str(error_info)
-                raise ZSXQAPIError(f"API调用失败: {error_msg}", response_data=response_data)
+                raise ZSXQAPIError(f"API调用失败: {error_msg}", response_data=response_data, error_class='business')
 
             return response_data.get('resp_data', {})
 
         except requests.RequestException as e:
+            Metrics.observe('zsxq_upstream_request_duration_seconds',
+                            time.perf_counter() - http_started, endpoint=endpoint_name)
             if self.app:
                 self.app.logger.error(f"ZSXQ API请求异常: {str(e)}", exc_info=True)
-            raise ZSXQAPIError(f"网络请求失败: {str(e)}")
+            # 超时与连接错误可以重试
+            error_class = 'timeout' if isinstance(e, requests.Timeout) else 'connection'
+            raise ZSXQAPIError(f"网络请求失败: {str(e)}", retryable=True, error_class=error_class)
+
+    @staticmethod
+    def get_pool_stats():
+        """
+        获取HTTP连接池统计
+
+        Returns:
+            dict: 连接池统计信息
+        """
+        return HTTPSessionPool.get_stats()
+
+    @staticmethod
+    def get_rate_limit_stats():
+        """
+        获取上游限流统计
+
+        Returns:
+            dict: 各端点的令牌余量、速率系数与等待时间
+        """
+        return UpstreamRateLimiter.get_stats()
+
+    @staticmethod
+    def get_retry_stats():
+        """
+        获取重试统计
+
+        Returns:
+            dict: 重试预算余量及各端点的重试次数与额外耗时
+        """
+        return RetryPolicy.get_stats()
+
+    @staticmethod
+    def get_cassette_stats():
+        """
+        获取上游请求录制/回放统计
+
+        Returns:
+            dict: 模式、磁带路径及录制/回放次数, 未启用时返回None
+        """
+        return CassetteRegistry.get_stats()
+
+    @staticmethod
+    def get_circuit_breaker_states():
+        """
+        获取熔断器状态
+
+        Returns:
+            dict: 端点族 -> 熔断器状态与最近的状态切换记录
+        """
+        return CircuitBreakerRegistry.get_states()
 
     def get_projects(self, scope='ongoing'):
         """
@@ -150,7 +384,7 @@ class ZSXQClient:
             'count': 100  # 添加count参数，最大100
         }
 
-        data = self._make_request('GET', endpoint, params=params)
+        data = self._make_request('GET', endpoint, params=params, endpoint_name='projects')
         return data.get('checkins', [])
 
     def get_project_stats(self, project_id):
@@ -165,7 +399,7 @@ class ZSXQClient:
         """
         endpoint = f"/v2/groups/{self.group_id}/checkins/{project_id}/statistics"
 
-        return self._make_request('GET', endpoint)
+        return self._make_request('GET', endpoint, endpoint_name='statistics')
 
     def get_daily_stats(self, project_id, date=None):
         """
@@ -188,16 +422,17 @@ class ZSXQClient:
         endpoint = f"/v2/groups/{self.group_id}/checkins/{project_id}/statistics/daily"
         params = {'date': encoded_date}
 
-        return self._make_request('GET', endpoint, params=params)
+        return self._make_request('GET', endpoint, params=params, endpoint_name='daily_stats')
 
-    def get_ranking_list(self, project_id, ranking_type='continuous', index=0):
+    def get_ranking_list(self, project_id, ranking_type='continuous', index=0, count=None):
         """
         获取排行榜
 
         Args:
             project_id: 项目ID
             ranking_type: 排行榜类型 (continuous|accumulated)
-            index: 分页索引
+            index: 分页索引,从0开始
+            count: 每页条数(上限200),None则使用接口默认值
 
         Returns:
             dict: 排行榜数据,包含ranking_list和user_specific
@@ -207,31 +442,53 @@ class ZSXQClient:
             'type': ranking_type,
             'index': index
         }
+        if count is not None:
+            params['count'] = count
+
+        return self._make_request('GET', endpoint, params=params, endpoint_name='ranking_list')
+
+    def iter_ranking_list(self, project_id, ranking_type='continuous', page_size=200, max_pages=None):
+        """
+        逐页遍历完整排行榜
 
-        return self._make_request('GET', endpoint, params=params)
+        Args:
+            project_id: 项目ID
+            ranking_type: 排行榜类型 (continuous|accumulated)
+            page_size: 每页条数(上限200)
+            max_pages: 最多获取的页数,None表示不限制
+
+        Returns:
+            RankingListIterator: 逐条产出排行条目的可迭代对象
+        """
+        return RankingListIterator(self, project_id, ranking_type, page_size, max_pages)
 
-    def get_topics(self, project_id, count=20):
+    def get_topics(self, project_id, count=20, end_time=None):
         """
         获取打卡话题列表
 
         Args:
             project_id: 项目ID
             count: 返回数量
+            end_time: 时间游标,只返回创建时间不晚于该时间的话题(用于向前翻页)
 
         Returns:
             dict: 话题数据
         """
         endpoint = f"/v2/groups/{self.group_id}/checkins/{project_id}/topics"
         params = {'count': count}
+        if end_time:
+            params['end_time'] = end_time
 
-        return self._make_request('GET', endpoint, params=params)
+        return self._make_request('GET', endpoint, params=params, endpoint_name='topics')
 
-    def get_project_detail(self, project_id):
+    def get_project_detail(self, project_id, fallback=None):
         """
         获取项目详情
 
         Args:
             project_id: 项目ID
+            fallback: 单独接口失败时的查找函数 fallback(project_id) -> dict|None,
+                      为None时依次请求三个范围的项目列表查找
 
         Returns:
             dict: 项目详情,如果不存在则返回None
@@ -239,8 +496,11 @@ class ZSXQClient:
         endpoint = f"/v2/groups/{self.group_id}/checkins/{project_id}"
         
         try:
-            return self._make_request('GET', endpoint)
+            return self._make_request('GET', endpoint, endpoint_name='project_detail')
         except ZSXQAPIError:
+            if fallback is not None:
+                return fallback(project_id)
+
             # 如果单独接口失败，尝试从项目列表中查找
             for scope in ['ongoing', 'closed', 'over']:
                 projects = self.get_projects(scope=scope)
@@ -248,3 +508,67 @@ class ZSXQClient:
                     if str(project.get('checkin_id')) == str(project_id):
                         return project
             return None
+
+
+class RankingListIterator:
+    """
+    排行榜分页遍历器
+
+    按index逐页请求ranking_list并逐条产出, 同一时刻只持有一页原始数据。
+    遍历过程中记录首页的user_specific与已获取的页数。
+    上游可能把count限制在page_size以下, 因此以首个非空页的条数作为实际页大小,
+    遇到空页、重复页、不足实际页大小的页或达到max_pages时结束。
+    """
+
+    def __init__(self, client, project_id, ranking_type='continuous', page_size=200, max_pages=None):
+        self.client = client
+        self.project_id = project_id
+        self.ranking_type = ranking_type
+        self.page_size = min(max(int(page_size), 1), 200)
+        self.max_pages = max_pages
+        self.user_specific = None
+        self.pages_fetched = 0
+        self.truncated = False
+
+    def __iter__(self):
+        index = 0
+        first_user_ids = set()
+        effective_page_size = None
+
+        while True:
+            if self.max_pages is not None and index >= self.max_pages:
+                self.truncated = True
+                return
+
+            data = self.client.get_ranking_list(
+                self.project_id,
+                ranking_type=self.ranking_type,
+                index=index,
+                count=self.page_size
+            )
+            self.pages_fetched += 1
+
+            if index == 0:
+                self.user_specific = data.get('user_specific') or None
+
+            items = data.get('ranking_list', [])
+            if not items:
+                return
+
+            # 接口忽略index时会重复返回同一页, 以首条用户判断
+            first_user_id = items[0].get('user', {}).get('user_id')
+            if first_user_id is not None:
+                if first_user_id in first_user_ids:
+                    return
+                first_user_ids.add(first_user_id)
+
+            for item in items:
+                yield item
+
+            if effective_page_size is None:
+                # 首页不足page_size时无法区分"上游限制了count"与"只有一页", 继续请求下一页确认
+                effective_page_size = len(items)
+            elif len(items) < effective_page_size:
+                return
+
+            index += 1
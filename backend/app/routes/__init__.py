@@ -7,4 +7,4 @@ from flask import Blueprint
 api_bp = Blueprint('api', __name__)
 
 # 导入所有路由
-from . import projects, health
+from . import projects, health, admin
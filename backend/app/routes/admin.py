@@ -0,0 +1,91 @@
+"""
+管理接口路由
+需要在请求头 X-Admin-Token 中提供 系统配置.admin.token, 未配置令牌时管理接口不可用
+"""
+import hmac
+from flask import request, current_app
+from . import api_bp
+from ..utils.response import success_response, error_response
+from ..utils.config_loader import get_system_config, get_cache_config
+from ..utils.validators import validate_count
+
+
+def _check_admin_token():
+    """
+    校验管理令牌
+
+    Returns:
+        错误响应, 校验通过时返回None
+    """
+    token = get_system_config(current_app).get('admin', {}).get('token') or ''
+    if not token:
+        return error_response(message="未配置管理令牌(系统配置.admin.token), 管理接口不可用", code=403)
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), str(token)):
+        return error_response(message="管理令牌无效", code=403)
+    return None
+
+
+@api_bp.route('/admin/cache/keyspace', methods=['GET'])
+def cache_keyspace():
+    """
+    缓存键空间统计
+
+    使用SCAN遍历缓存键, 按键族统计键数、占用字节数(Redis为MEMORY USAGE)与剩余过期时间分布,
+    用于评估各类数据的缓存时长(缓存配置.ttl)是否合适。
+
+    Headers:
+        X-Admin-Token: 管理令牌
+
+    Query Parameters:
+        pattern: 键模式(不含键前缀) 默认:*
+        max_keys: 最多统计的键数 默认与上限: 缓存配置.observability.keyspace_max_keys
+
+    Returns:
+        {
+            "code": 0,
+            "message": "success",
+            "data": {
+                "backend": "redis",
+                "pattern": "*",
+                "keys": 152,
+                "bytes": 1849213,
+                "truncated": false,
+                "duration": 0.041,
+                "families": {
+                    "stats": {
+                        "keys": 12,
+                        "bytes": 9120,
+                        "avg_bytes": 760,
+                        "ttl": {
+                            "min": 120.5,
+                            "avg": 2710.3,
+                            "max": 7190.0,
+                            "no_expiry": 0,
+                            "distribution": {"<1m": 0, "<10m": 1, "<30m": 2, "<1h": 4, "<2h": 5, "<1d": 0, ">=1d": 0}
+                        }
+                    }
+                }
+            }
+        }
+    """
+    denied = _check_admin_token()
+    if denied is not None:
+        return denied
+
+    try:
+        limit = int(get_cache_config(current_app).get('observability', {}).get('keyspace_max_keys', 100000))
+        max_keys = request.args.get('max_keys', limit, type=int)
+        is_valid, message = validate_count(max_keys, max_count=limit)
+        if not is_valid:
+            return error_response(message=message, code=400)
+
+        from ..services.cache_service import CacheService
+
+        report = CacheService.inspect_keyspace(request.args.get('pattern', '*'), max_keys=max_keys)
+        if report is None:
+            return error_response(message="缓存不可用", code=503)
+        return success_response(data=report)
+
+    except Exception as e:
+        current_app.logger.error(f"统计缓存键空间失败: {str(e)}", exc_info=True)
+        return error_response(message=str(e))
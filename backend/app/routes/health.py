@@ -1,8 +1,11 @@
 """
 健康检查路由
+客户端与缓存等模块在各接口内按需导入, 注册蓝图时不加载
 """
-from flask import jsonify, current_app
+from flask import jsonify, current_app, Response
 from . import api_bp
+from ..services.startup import StartupManager
+from ..utils.response import success_response, error_response
 
 
 @api_bp.route('/health', methods=['GET'])
@@ -25,6 +28,37 @@ def health_check():
     })
 
 
+@api_bp.route('/health/ready', methods=['GET'])
+def readiness():
+    """
+    就绪检查接口
+
+    后台启动模式下, Redis连接、定时任务与缓存预热完成前返回503;
+    组件启动失败(如Redis不可用)时应用以降级模式运行, 仍视为就绪。
+
+    Returns:
+        JSON响应:
+        {
+            "code": 0,
+            "message": "success",
+            "data": {
+                "mode": "background",
+                "ready": true,
+                "uptime": 3.52,
+                "components": {
+                    "redis": {"state": "ready", "duration": 0.004},
+                    "scheduler": {"state": "ready", "duration": 0.021},
+                    "warmup": {"state": "ready", "duration": 1.37}
+                }
+            }
+        }
+    """
+    status = StartupManager.get_status()
+    if not status['ready']:
+        return error_response(message="starting", code=503, data=status)
+    return success_response(data=status)
+
+
 @api_bp.route('/ping', methods=['GET'])
 def ping():
     """
@@ -34,3 +68,144 @@ def ping():
         JSON响应: {"message": "pong"}
     """
     return jsonify({"message": "pong"})
+
+
+@api_bp.route('/health/upstream', methods=['GET'])
+def upstream_health():
+    """
+    上游API客户端运行状态
+
+    Returns:
+        JSON响应:
+        {
+            "code": 0,
+            "message": "success",
+            "data": {
+                "http_pool": {
+                    "requests": 120,
+                    "connections_created": 3,
+                    "reuse_ratio": 0.975,
+                    "idle_connections": 2,
+                    "open_connections": 3
+                },
+                "rate_limit": {
+                    "ranking_list": {
+                        "tokens": 3.5,
+                        "rate_factor": 0.5,
+                        "throttled": 4,
+                        "wait_seconds_total": 1.2
+                    }
+                },
+                "retry": {
+                    "budget_tokens": 18.4,
+                    "endpoints": {
+                        "statistics": {
+                            "retries": 3,
+                            "recovered": 2,
+                            "extra_latency_seconds_total": 2.7
+                        }
+                    }
+                },
+                "single_flight": {
+                    "executed": 40,
+                    "coalesced": 19,
+                    "distributed_coalesced": 6
+                },
+                "cassette": {
+                    "mode": "replay",
+                    "replayed": 210,
+                    "misses": 0
+                }
+            }
+        }
+    """
+    from ..models.zsxq_client import ZSXQClient
+    from ..services.single_flight import SingleFlight
+
+    return success_response(data={
+        "http_pool": ZSXQClient.get_pool_stats(),
+        "rate_limit": ZSXQClient.get_rate_limit_stats(),
+        "retry": ZSXQClient.get_retry_stats(),
+        "single_flight": SingleFlight.get_stats(),
+        "cassette": ZSXQClient.get_cassette_stats()
+    })
+
+
+@api_bp.route('/health/circuit-breakers', methods=['GET'])
+def circuit_breakers():
+    """
+    上游熔断器状态
+
+    Returns:
+        JSON响应:
+        {
+            "code": 0,
+            "message": "success",
+            "data": {
+                "ranking_list": {
+                    "state": "open",
+                    "consecutive_failures": 5,
+                    "retry_in": 12.5,
+                    "rejected": 37,
+                    "transitions": [
+                        {"from": "closed", "to": "open", "reason": "连续失败 5 次: ...", "at": "2025-01-15T10:30:00"}
+                    ]
+                }
+            }
+        }
+    """
+    from ..models.zsxq_client import ZSXQClient
+
+    return success_response(data=ZSXQClient.get_circuit_breaker_states())
+
+
+@api_bp.route('/health/cache', methods=['GET'])
+def cache_health():
+    """
+    缓存命中统计
+
+    Returns:
+        JSON响应:
+        {
+            "code": 0,
+            "message": "success",
+            "data": {
+                "backend": {"name": "redis", "mode": "standalone", "replica_reads": false},
+                "l1": {"hits": 950, "misses": 50, "hit_rate": 0.95, "entries": 12, "bytes": 48210},
+                "l2": {"l2_hits": 45, "l2_misses": 5, "hit_rate": 0.9, "errors": 0},
+                "invalidation": {"connected": true, "published": 30, "received": 12},
+                "health": {"state": "connected", "outages": 1, "recoveries": 1, "degraded_seconds": 42.5, "uncached_seconds": 0.0},
+                "revalidation": {"triggered": 8, "skipped": 3, "succeeded": 8, "failed": 0, "in_flight": 0},
+                "early_refresh": {"checks": 120, "early_refreshes": 2, "fetch_seconds": {"leaderboard": 1.52}},
+                "families": {
+                    "stats": {"hits": 420, "misses": 12, "hit_rate": 0.9722, "sets": 12, "errors": 0,
+                              "avg_ms": 0.41, "avg_bytes": 150, "max_bytes": 162}
+                }
+            }
+        }
+    """
+    from ..services.cache_service import CacheService
+    from ..services.revalidator import Revalidator
+    from ..services.early_refresh import EarlyRefresh
+
+    stats = CacheService.get_stats()
+    stats['revalidation'] = Revalidator.get_stats()
+    stats['early_refresh'] = EarlyRefresh.get_stats()
+    return success_response(data=stats)
+
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    运行指标(Prometheus文本格式)
+
+    包含上游各端点的耗时直方图、状态码、响应字节数与错误类别,
+    缓存命中/未命中与耗时, 以及各路由的请求耗时。
+    多worker部署时汇总所有worker的指标(需配置 系统配置.metrics.multiprocess_dir)。
+
+    Returns:
+        text/plain响应
+    """
+    from ..utils.metrics import Metrics
+
+    return Response(Metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
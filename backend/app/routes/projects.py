@@ -3,12 +3,21 @@
 """
 from flask import jsonify, request, current_app
 from . import api_bp
-from ..services.zsxq_service import ZSXQService
-from ..services.cache_service import CacheService
 from ..utils.response import success_response, error_response
 from ..utils.validators import validate_project_id, validate_leaderboard_type
 
 
+def _error_code(error):
+    """异常对应的响应码: 用户请求等待上游令牌超时(且无兜底数据)时返回429, 其余为500"""
+    return 429 if getattr(error, 'error_class', None) == 'rate_limited' else 500
+
+
+def _get_service():
+    """创建业务服务(在请求中导入, 注册蓝图时不加载上游客户端与缓存模块)"""
+    from ..services.zsxq_service import ZSXQService
+    return ZSXQService(current_app)
+
+
 @api_bp.route('/projects', methods=['GET'])
 def get_projects():
     """
@@ -42,7 +51,7 @@ def get_projects():
         scope = request.args.get('scope', 'ongoing')
 
         # 从服务层获取数据
-        zsxq_service = ZSXQService(current_app)
+        zsxq_service = _get_service()
         projects = zsxq_service.get_projects(scope=scope)
 
         return success_response(data={
@@ -52,7 +61,7 @@ def get_projects():
 
     except Exception as e:
         current_app.logger.error(f"获取项目列表失败: {str(e)}", exc_info=True)
-        return error_response(message=str(e))
+        return error_response(message=str(e), code=_error_code(e))
 
 
 @api_bp.route('/projects/<project_id>', methods=['GET'])
@@ -85,7 +94,7 @@ def get_project_detail(project_id):
         if not validate_project_id(project_id):
             return error_response(message="无效的项目ID", code=400)
 
-        zsxq_service = ZSXQService(current_app)
+        zsxq_service = _get_service()
         project = zsxq_service.get_project_detail(project_id)
 
         if not project:
@@ -95,7 +104,7 @@ def get_project_detail(project_id):
 
     except Exception as e:
         current_app.logger.error(f"获取项目详情失败: {str(e)}", exc_info=True)
-        return error_response(message=str(e))
+        return error_response(message=str(e), code=_error_code(e))
 
 
 @api_bp.route('/projects/<project_id>/stats', methods=['GET'])
@@ -123,14 +132,14 @@ def get_project_stats(project_id):
         if not validate_project_id(project_id):
             return error_response(message="无效的项目ID", code=400)
 
-        zsxq_service = ZSXQService(current_app)
+        zsxq_service = _get_service()
         stats = zsxq_service.get_project_stats(project_id)
 
         return success_response(data=stats)
 
     except Exception as e:
         current_app.logger.error(f"获取项目统计失败: {str(e)}", exc_info=True)
-        return error_response(message=str(e))
+        return error_response(message=str(e), code=_error_code(e))
 
 
 @api_bp.route('/projects/<project_id>/daily-stats', methods=['GET'])
@@ -157,14 +166,50 @@ def get_daily_stats(project_id):
         if not validate_project_id(project_id):
             return error_response(message="无效的项目ID", code=400)
 
-        zsxq_service = ZSXQService(current_app)
+        zsxq_service = _get_service()
         daily_stats = zsxq_service.get_daily_stats(project_id)
 
         return success_response(data=daily_stats)
 
     except Exception as e:
         current_app.logger.error(f"获取每日统计失败: {str(e)}", exc_info=True)
-        return error_response(message=str(e))
+        return error_response(message=str(e), code=_error_code(e))
+
+
+@api_bp.route('/projects/<project_id>/overview', methods=['GET'])
+def get_project_overview(project_id):
+    """
+    获取项目概览(详情、统计与每日统计)
+
+    Path Parameters:
+        project_id: 项目ID
+
+    Returns:
+        {
+            "code": 0,
+            "message": "success",
+            "data": {
+                "project": {...},
+                "stats": {...},
+                "daily_stats": {...}
+            }
+        }
+    """
+    try:
+        if not validate_project_id(project_id):
+            return error_response(message="无效的项目ID", code=400)
+
+        zsxq_service = _get_service()
+        overview = zsxq_service.get_project_overview(project_id)
+
+        if not overview:
+            return error_response(message="项目不存在", code=404)
+
+        return success_response(data=overview)
+
+    except Exception as e:
+        current_app.logger.error(f"获取项目概览失败: {str(e)}", exc_info=True)
+        return error_response(message=str(e), code=_error_code(e))
 
 
 @api_bp.route('/projects/<project_id>/leaderboard', methods=['GET'])
@@ -178,6 +223,9 @@ def get_leaderboard(project_id):
     Query Parameters:
         type: 排行榜类型 (continuous|accumulated) 默认:continuous
         limit: 返回数量 (1-100) 默认:10
+        offset: 起始位置 默认:0
+
+    complete为false时只返回了前几页(缓存未命中, 完整排行榜正在后台获取), total只是已获取部分的人数。
 
     Returns:
         {
@@ -197,7 +245,9 @@ def get_leaderboard(project_id):
                         "latest_checkin": "2025-01-15 08:30:00"
                     }
                 ],
-                "total": 100,
+                "total": 1250,
+                "offset": 0,
+                "complete": true,
                 "user_rank": {
                     "rank": 15,
                     "days": 8
@@ -212,6 +262,7 @@ def get_leaderboard(project_id):
         # 获取参数
         leaderboard_type = request.args.get('type', 'continuous')
         limit = request.args.get('limit', 10, type=int)
+        offset = request.args.get('offset', 0, type=int)
 
         # 验证参数
         if not validate_leaderboard_type(leaderboard_type):
@@ -220,18 +271,22 @@ def get_leaderboard(project_id):
         if limit < 1 or limit > 100:
             return error_response(message="limit参数范围: 1-100", code=400)
 
-        zsxq_service = ZSXQService(current_app)
+        if offset < 0:
+            return error_response(message="offset参数不能小于0", code=400)
+
+        zsxq_service = _get_service()
         leaderboard = zsxq_service.get_leaderboard(
             project_id,
             leaderboard_type=leaderboard_type,
-            limit=limit
+            limit=limit,
+            offset=offset
         )
 
         return success_response(data=leaderboard)
 
     except Exception as e:
         current_app.logger.error(f"获取排行榜失败: {str(e)}", exc_info=True)
-        return error_response(message=str(e))
+        return error_response(message=str(e), code=_error_code(e))
 
 
 @api_bp.route('/projects/<project_id>/topics', methods=['GET'])
@@ -276,7 +331,7 @@ def get_topics(project_id):
         if count < 1 or count > 100:
             return error_response(message="count参数范围: 1-100", code=400)
 
-        zsxq_service = ZSXQService(current_app)
+        zsxq_service = _get_service()
         topics = zsxq_service.get_topics(project_id, count=count)
 
         return success_response(data={
@@ -286,4 +341,4 @@ def get_topics(project_id):
 
     except Exception as e:
         current_app.logger.error(f"获取话题列表失败: {str(e)}", exc_info=True)
-        return error_response(message=str(e))
+        return error_response(message=str(e), code=_error_code(e))
@@ -0,0 +1,492 @@
+"""
+缓存存储后端模块
+CacheService按配置的顺序选择第一个可用的后端: Redis(多进程/多节点共享)、
+SQLite(本机磁盘, 同一主机的worker共享)或进程内LRU(每个worker独立)
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from .local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+BACKEND_REDIS = 'redis'
+BACKEND_SQLITE = 'sqlite'
+BACKEND_MEMORY = 'memory'
+
+
+class CacheBackend:
+    """
+    缓存存储后端接口
+
+    后端只读写序列化后的缓存值(bytes), 编解码、一级缓存与统计由CacheService负责。
+    过期时间语义与Redis一致: 剩余时间-1表示永不过期, -2表示不存在。
+    """
+
+    name = None
+    # Redis客户端(只有Redis后端提供, 锁、限流与项目索引等依赖Redis的功能据此判断是否可用)
+    redis_client = None
+    is_cluster = False
+
+    def ping(self):
+        """检查后端是否可用, 不可用时抛出异常"""
+        raise NotImplementedError
+
+    def read_many(self, keys, with_ttl=False):
+        """
+        批量读取
+
+        Args:
+            keys: 键列表
+            with_ttl: 是否同时返回剩余过期时间
+
+        Returns:
+            list: 与keys对应的值(不存在为None); with_ttl时为 (值, 剩余毫秒数) 列表
+        """
+        raise NotImplementedError
+
+    def write_many(self, values, ttls, key_tags=None):
+        """
+        批量写入
+
+        Args:
+            values: 键 -> 值(bytes)
+            ttls: 键 -> 过期时间(秒)
+            key_tags: 键 -> 标签集合键列表, 键会登记到这些集合中
+        """
+        raise NotImplementedError
+
+    def delete_many(self, keys):
+        """
+        批量删除
+
+        Returns:
+            int: 删除的键数量
+        """
+        raise NotImplementedError
+
+    def delete_tag(self, tag):
+        """
+        删除标签集合中登记的所有键
+
+        Returns:
+            tuple: (登记的键列表, 删除的键数量)
+        """
+        raise NotImplementedError
+
+    def delete_pattern(self, pattern):
+        """
+        删除匹配通配符模式的键
+
+        Returns:
+            int: 删除的键数量
+        """
+        raise NotImplementedError
+
+    def ttl(self, key):
+        """
+        获取剩余过期时间
+
+        Returns:
+            int: 剩余秒数, -1表示永不过期, -2表示不存在
+        """
+        raise NotImplementedError
+
+    def scan(self, pattern):
+        """
+        遍历匹配通配符模式的键(用于键空间统计)
+
+        Yields:
+            list: 一批 (键, 占用字节数, 剩余秒数); 占用字节数无法获取时为None, 剩余秒数-1表示永不过期
+        """
+        raise NotImplementedError
+
+    def get_stats(self):
+        """获取后端统计"""
+        return {'name': self.name}
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis后端
+
+    写入、标签登记与一级缓存失效通知通过一个pipeline发送; 读取使用读客户端(可指向副本)。
+    """
+
+    name = BACKEND_REDIS
+    # SCAN每批返回的键数与每次DEL的键数
+    SCAN_BATCH = 500
+
+    def __init__(self, clients, tag_ttl=30 * 86400):
+        """
+        初始化
+
+        Args:
+            clients: RedisClients (见redis_connection.create_redis_clients)
+            tag_ttl: 标签集合的最短保留时间(秒)
+        """
+        self.redis_client = clients.primary
+        self.value_client = clients.value
+        self.read_client = clients.read
+        self.mode = clients.mode
+        self.is_cluster = clients.mode == 'cluster'
+        self.tag_ttl = int(tag_ttl)
+        # 一级缓存失效通知(启用一级缓存时由CacheService设置)
+        self.invalidation = None
+
+    @property
+    def replica_reads(self):
+        return self.read_client is not self.value_client
+
+    def ping(self):
+        self.redis_client.ping()
+
+    def _execute(self, pipe, invalidate=None):
+        """
+        执行pipeline, 启用一级缓存时同时广播这些键的失效消息
+
+        失效消息追加在pipeline末尾(不影响前面命令的结果下标);
+        集群模式的pipeline不支持PUBLISH, 在执行完成后单独发送。
+        """
+        if self.invalidation is None or not invalidate:
+            return pipe.execute()
+        if self.is_cluster:
+            results = pipe.execute()
+            self.invalidation.publish(keys=invalidate)
+            return results
+        self.invalidation.publish(pipe, keys=invalidate)
+        return pipe.execute()
+
+    def read_many(self, keys, with_ttl=False):
+        if not with_ttl:
+            if len(keys) == 1:
+                return [self.read_client.get(keys[0])]
+            # 集群模式按槽位拆分为多次MGET
+            return self.read_client.mget_nonatomic(keys) if self.is_cluster else self.read_client.mget(keys)
+
+        pipe = self.read_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.pttl(key)
+        replies = pipe.execute()
+        return [(replies[2 * index], replies[2 * index + 1]) for index in range(len(keys))]
+
+    def write_many(self, values, ttls, key_tags=None):
+        if len(values) == 1 and not key_tags and self.invalidation is None:
+            key, value = next(iter(values.items()))
+            self.value_client.setex(key, ttls[key], value)
+            return
+
+        # 写入、标签登记与失效通知一起发送
+        pipe = self.value_client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.setex(key, ttls[key], value)
+        if key_tags:
+            self._add_tags(pipe, key_tags, ttls)
+        self._execute(pipe, invalidate=list(values))
+
+    def _add_tags(self, pipe, key_tags, ttls):
+        """
+        在pipeline中把键登记到标签集合
+
+        标签集合的过期时间不短于其中任一键, 集合中残留的已过期键名在删除时会被忽略。
+        """
+        members = {}
+        for key, tags in key_tags.items():
+            for tag in tags or ():
+                members.setdefault(tag, []).append(key)
+
+        for tag, keys in members.items():
+            pipe.sadd(tag, *keys)
+            pipe.expire(tag, max([self.tag_ttl] + [int(ttls[key]) for key in keys]))
+
+    def delete_many(self, keys):
+        if self.invalidation is None and not self.is_cluster:
+            return self.redis_client.delete(*keys)
+
+        # 集群模式的pipeline不支持多键DEL, 逐个删除
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.delete(key)
+        return sum(self._execute(pipe, invalidate=keys)[:len(keys)])
+
+    def delete_tag(self, tag):
+        # 读取成员与删除集合在同一事务中完成, 之后写入的键会登记到新的集合
+        # (集群模式的pipeline不支持事务, 两条命令按顺序发送)
+        pipe = self.redis_client.pipeline(transaction=not self.is_cluster)
+        pipe.smembers(tag)
+        pipe.delete(tag)
+        keys = list(pipe.execute()[0])
+        if not keys:
+            return keys, 0
+        return keys, self.delete_many(keys)
+
+    def delete_pattern(self, pattern):
+        # 使用SCAN增量遍历, 不会像KEYS那样长时间阻塞Redis
+        deleted = 0
+        batch = []
+        for key in self.redis_client.scan_iter(match=pattern, count=self.SCAN_BATCH):
+            batch.append(key)
+            if len(batch) >= self.SCAN_BATCH:
+                deleted += self.redis_client.delete(*batch)
+                batch = []
+        if batch:
+            deleted += self.redis_client.delete(*batch)
+
+        # 删除后再通知, 避免其他进程在删除前重新读到旧值
+        if self.invalidation is not None:
+            self.invalidation.publish(pattern=pattern)
+        return deleted
+
+    def ttl(self, key):
+        return self.redis_client.ttl(key)
+
+    def scan(self, pattern):
+        # 遍历与统计使用读客户端, 启用副本读取时不占用主节点
+        batch = []
+        for key in self.read_client.scan_iter(match=pattern, count=self.SCAN_BATCH):
+            batch.append(key)
+            if len(batch) >= self.SCAN_BATCH:
+                yield self._inspect(batch)
+                batch = []
+        if batch:
+            yield self._inspect(batch)
+
+    def _inspect(self, keys):
+        """通过一个pipeline获取一批键的内存占用与剩余过期时间"""
+        pipe = self.read_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key)
+            pipe.pttl(key)
+        replies = pipe.execute(raise_on_error=False)
+
+        results = []
+        for index, key in enumerate(keys):
+            size, pttl = replies[2 * index], replies[2 * index + 1]
+            if isinstance(pttl, Exception) or pttl == -2:
+                # 遍历期间已过期或被删除
+                continue
+            results.append((
+                key.decode('utf-8', 'replace') if isinstance(key, bytes) else key,
+                None if isinstance(size, Exception) else size,
+                pttl if pttl < 0 else pttl / 1000.0
+            ))
+        return results
+
+    def get_stats(self):
+        return {'name': self.name, 'mode': self.mode, 'replica_reads': self.replica_reads}
+
+
+class MemoryBackend(CacheBackend):
+    """
+    进程内LRU后端(按字节数限制容量)
+
+    每个worker各自一份, 重启后丢失; 用于Redis不可用时仍能减少上游请求。
+    """
+
+    name = BACKEND_MEMORY
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        # 条目值为 (bytes, 过期时刻), LocalCache按各条目自身的过期时间淘汰
+        self.store = LocalCache(max_bytes=max_bytes, ttl=float('inf'), max_item_bytes=max_bytes)
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def ping(self):
+        return True
+
+    def read_many(self, keys, with_ttl=False):
+        results = []
+        now = time.monotonic()
+        for key in keys:
+            found, entry = self.store.get(key)
+            if not with_ttl:
+                results.append(entry[0] if found else None)
+            elif found:
+                results.append((entry[0], max(int((entry[1] - now) * 1000), 0)))
+            else:
+                results.append((None, -2))
+        return results
+
+    def write_many(self, values, ttls, key_tags=None):
+        expires_base = time.monotonic()
+        for key, value in values.items():
+            self.store.set(key, (value, expires_base + ttls[key]), len(value), ttls[key])
+        if key_tags:
+            with self._lock:
+                for key, tags in key_tags.items():
+                    for tag in tags or ():
+                        self._tags.setdefault(tag, set()).add(key)
+
+    def delete_many(self, keys):
+        return self.store.delete(keys)
+
+    def delete_tag(self, tag):
+        with self._lock:
+            keys = list(self._tags.pop(tag, ()))
+        return keys, self.store.delete(keys) if keys else 0
+
+    def delete_pattern(self, pattern):
+        return self.store.delete_pattern(pattern)
+
+    def ttl(self, key):
+        found, entry = self.store.get(key)
+        if not found:
+            return -2
+        return max(int(entry[1] - time.monotonic()), 0)
+
+    def scan(self, pattern):
+        now = time.monotonic()
+        yield [(key, size, expires_at - now) for key, size, expires_at in self.store.scan(pattern) if expires_at > now]
+
+    def get_stats(self):
+        return dict(self.store.get_stats(), name=self.name)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    SQLite后端(本机磁盘)
+
+    同一主机上的worker共享同一个数据库文件(WAL模式), 重启后仍保留;
+    过期条目在读取时忽略, 并在写入时定期批量清理。
+    """
+
+    name = BACKEND_SQLITE
+    # 每写入多少次清理一次过期条目
+    PURGE_EVERY = 1000
+    # 单条SQL中IN参数的最大个数
+    BATCH = 500
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cache_entries ("
+        "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires_at)",
+        "CREATE TABLE IF NOT EXISTS cache_tags ("
+        "tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))"
+    )
+
+    def __init__(self, path='cache/cache.sqlite3', busy_timeout=5):
+        """
+        初始化
+
+        Args:
+            path: 数据库文件路径(目录不存在时自动创建)
+            busy_timeout: 其他worker写入时的最长等待时间(秒)
+        """
+        self.path = path
+        self.busy_timeout = float(busy_timeout)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._writes = 0
+
+    def _connect(self):
+        """获取本进程的连接(fork后重新打开; 需持有锁)"""
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            connection.commit()
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def ping(self):
+        with self._lock:
+            self._connect().execute("SELECT 1").fetchone()
+
+    def read_many(self, keys, with_ttl=False):
+        now = time.time()
+        rows = {}
+        with self._lock:
+            connection = self._connect()
+            for start in range(0, len(keys), self.BATCH):
+                chunk = keys[start:start + self.BATCH]
+                rows.update(
+                    (key, (value, expires_at)) for key, value, expires_at in connection.execute(
+                        f"SELECT key, value, expires_at FROM cache_entries "
+                        f"WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at > ?",
+                        (*chunk, now)
+                    )
+                )
+
+        if not with_ttl:
+            return [rows[key][0] if key in rows else None for key in keys]
+        return [
+            (rows[key][0], max(int((rows[key][1] - now) * 1000), 0)) if key in rows else (None, -2)
+            for key in keys
+        ]
+
+    def write_many(self, values, ttls, key_tags=None):
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                    [(key, value, now + ttls[key]) for key, value in values.items()]
+                )
+                if key_tags:
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                        [(tag, key) for key, tags in key_tags.items() for tag in tags or ()]
+                    )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+                    # 过期或已删除的键的标签登记一并清理, 否则从未整体清除的标签会无限增长
+                    connection.execute("DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)")
+
+    def delete_many(self, keys):
+        deleted = 0
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                for start in range(0, len(keys), self.BATCH):
+                    chunk = keys[start:start + self.BATCH]
+                    deleted += connection.execute(
+                        f"DELETE FROM cache_entries WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).rowcount
+        return deleted
+
+    def delete_tag(self, tag):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                keys = [row[0] for row in connection.execute("SELECT key FROM cache_tags WHERE tag = ?", (tag,))]
+                connection.execute("DELETE FROM cache_tags WHERE tag = ?", (tag,))
+        return keys, self.delete_many(keys) if keys else 0
+
+    def delete_pattern(self, pattern):
+        # SQLite的GLOB与Redis键模式的通配符语法相同(*, ?, [...])
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                return connection.execute("DELETE FROM cache_entries WHERE key GLOB ?", (pattern,)).rowcount
+
+    def ttl(self, key):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT expires_at FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return -2 if row is None else int(row[0] - time.time())
+
+    def scan(self, pattern):
+        now = time.time()
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, length(key) + length(value), expires_at FROM cache_entries "
+                "WHERE key GLOB ? AND expires_at > ?", (pattern, now)
+            ).fetchall()
+        for start in range(0, len(rows), self.BATCH):
+            yield [(key, size, expires_at - now) for key, size, expires_at in rows[start:start + self.BATCH]]
+
+    def get_stats(self):
+        return {'name': self.name, 'path': self.path}
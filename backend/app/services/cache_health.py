@@ -0,0 +1,332 @@
+"""
+缓存健康探测模块
+后台线程定期探测Redis: 故障时切换到备用后端(或无缓存), 按指数退避重连, 恢复后自动切回Redis
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from ..utils.metrics import Metrics
+from .redis_connection import CONNECTION_ERRORS
+from .cache_backends import BACKEND_REDIS
+
+logger = logging.getLogger(__name__)
+
+STATE_CONNECTED = 'connected'
+STATE_DEGRADED = 'degraded'
+STATE_RECONNECTING = 'reconnecting'
+
+
+class CacheHealth:
+    """
+    Redis健康探测(每个进程一个探测线程)
+
+    connected: 使用Redis, 每interval秒探测一次, 连续failure_threshold次失败后进入degraded
+    degraded: 使用 缓存配置.backends 中Redis之后第一个可用的后端(均不可用时不使用缓存),
+              退避时间结束后进入reconnecting
+    reconnecting: 尝试重连, 成功后切回Redis(connected), 失败则加倍退避时间并回到degraded
+
+    缓存操作出错时唤醒探测线程立即探测, 不必等到下一个探测周期。
+    降级期间写入或失效的键只作用于备用后端, 切回Redis前先在Redis中删除这些键,
+    避免读到故障前的旧值。
+    """
+
+    # 降级期间最多记录的键数, 超过后切回时删除整个键前缀下的缓存
+    MAX_PENDING_KEYS = 10000
+
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _app = None
+    _config = {}
+    _thread = None
+    _pid = None
+
+    _interval = 5.0
+    _failure_threshold = 2
+    _backoff_initial = 1.0
+    _backoff_max = 60.0
+
+    _state = None
+    _state_since = None
+    _state_since_monotonic = None
+    _last_tick = None
+    _consecutive_failures = 0
+    _delay = 0
+    _next_attempt = 0
+    _last_error = None
+    _transitions = deque(maxlen=20)
+
+    # Redis后端(创建成功后保留, 客户端断线后自动重连)与备用后端
+    _redis = None
+    _fallback = None
+    # 降级期间需要在Redis中删除的键、标签与模式
+    _pending = {'keys': set(), 'tags': set(), 'patterns': set()}
+
+    _stats = {'probes': 0, 'probe_failures': 0, 'outages': 0, 'recoveries': 0,
+              'degraded_seconds': 0.0, 'uncached_seconds': 0.0}
+
+    @classmethod
+    def start(cls, app, cache_config, backend):
+        """
+        启动健康探测
+
+        Args:
+            app: Flask应用实例
+            cache_config: 缓存配置字典
+            backend: 初始化时选中的后端(None表示均不可用)
+        """
+        health_config = cache_config.get('health_check', {})
+        if not health_config.get('enabled', True) or BACKEND_REDIS not in cache_config.get('backends', [BACKEND_REDIS]):
+            return
+
+        cls._app = app
+        cls._config = cache_config
+        cls._interval = float(health_config.get('interval', 5))
+        cls._failure_threshold = max(int(health_config.get('failure_threshold', 2)), 1)
+        cls._backoff_initial = float(health_config.get('backoff_initial', 1))
+        cls._backoff_max = float(health_config.get('backoff_max', 60))
+
+        now = time.monotonic()
+        cls._last_tick = now
+        if backend is not None and backend.name == BACKEND_REDIS:
+            cls._redis = backend
+            cls._set_state(STATE_CONNECTED, "初始化时连接成功")
+        else:
+            cls._fallback = backend
+            cls._stats['outages'] += 1
+            cls._delay = cls._backoff_initial
+            cls._next_attempt = now + cls._delay
+            cls._set_state(STATE_DEGRADED, "初始化时Redis不可用")
+        cls.ensure_running()
+
+    @classmethod
+    def ensure_running(cls):
+        """确保本进程的探测线程在运行(fork后需要重新启动)"""
+        if cls._state is None or (cls._pid == os.getpid() and cls._thread is not None):
+            return
+        with cls._lock:
+            if cls._pid == os.getpid() and cls._thread is not None:
+                return
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._probe_loop, name='cache-health', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def report_error(cls, error):
+        """
+        报告一次Redis操作失败, 唤醒探测线程立即探测
+
+        Args:
+            error: 异常
+        """
+        if cls._state == STATE_CONNECTED:
+            cls._last_error = str(error)
+            cls._wake.set()
+
+    @classmethod
+    def record_pending(cls, keys=None, tag=None, pattern=None):
+        """
+        记录降级期间写入或失效的键, 切回Redis前在Redis中删除
+
+        Args:
+            keys: 键列表
+            tag: 标签集合键
+            pattern: 键模式
+        """
+        if cls._state in (None, STATE_CONNECTED):
+            return
+        with cls._lock:
+            if keys:
+                cls._pending['keys'].update(keys)
+            if tag:
+                cls._pending['tags'].add(tag)
+            if pattern:
+                cls._pending['patterns'].add(pattern)
+            if len(cls._pending['keys']) > cls.MAX_PENDING_KEYS:
+                cls._pending['keys'].clear()
+                cls._pending['patterns'].add(cls._get_key_prefix() + '*')
+
+    @classmethod
+    def _probe_loop(cls):
+        pid = os.getpid()
+        while cls._pid == pid:
+            if cls._state == STATE_CONNECTED:
+                # 探测失败后1秒内复查, 不等完整的探测周期
+                timeout = min(cls._interval, 1.0) if cls._consecutive_failures else cls._interval
+            else:
+                timeout = max(cls._next_attempt - time.monotonic(), 0)
+            cls._wake.wait(timeout)
+            cls._wake.clear()
+            try:
+                cls._tick()
+            except Exception as e:
+                logger.error(f"缓存健康探测异常: {str(e)}", exc_info=True)
+
+    @classmethod
+    def _tick(cls):
+        """累计降级时间并按当前状态探测或重连"""
+        from .cache_service import CacheService
+
+        now = time.monotonic()
+        elapsed, cls._last_tick = now - cls._last_tick, now
+        if cls._state != STATE_CONNECTED:
+            backend_name = CacheService.get_backend_name()
+            cls._stats['degraded_seconds'] += elapsed
+            if backend_name is None:
+                cls._stats['uncached_seconds'] += elapsed
+            Metrics.inc('zsxq_cache_degraded_seconds_total', elapsed, backend=backend_name or 'none')
+
+        if cls._state == STATE_CONNECTED:
+            cls._probe(CacheService)
+        elif now >= cls._next_attempt:
+            cls._reconnect(CacheService)
+
+    @classmethod
+    def _probe(cls, cache_service):
+        """探测Redis, 连续失败达到阈值时切换到备用后端"""
+        cls._stats['probes'] += 1
+        try:
+            cls._redis.ping()
+            cls._consecutive_failures = 0
+            return
+        except (OSError, *CONNECTION_ERRORS) as e:
+            cls._stats['probe_failures'] += 1
+            cls._consecutive_failures += 1
+            cls._last_error = str(e)
+
+        if cls._consecutive_failures < cls._failure_threshold:
+            return
+
+        if cls._fallback is None:
+            for name in cls._config.get('backends', [BACKEND_REDIS]):
+                if name != BACKEND_REDIS:
+                    cls._fallback = cache_service._create_backend(cls._app, name, cls._config)
+                    if cls._fallback is not None:
+                        break
+
+        cls._stats['outages'] += 1
+        cls._delay = cls._backoff_initial
+        cls._next_attempt = time.monotonic() + cls._delay
+        cls._set_state(STATE_DEGRADED, f"连续探测失败 {cls._consecutive_failures} 次: {cls._last_error}")
+        cache_service.use_backend(cls._app, cls._fallback)
+        Metrics.inc('zsxq_cache_backend_switches_total', backend=cls._fallback.name if cls._fallback else 'none')
+
+    @classmethod
+    def _reconnect(cls, cache_service):
+        """尝试重连Redis, 成功后清理降级期间的键并切回Redis"""
+        cls._set_state(STATE_RECONNECTING, f"第 {cls._stats['outages']} 次故障后重连")
+        with cls._lock:
+            pending, cls._pending = cls._pending, {'keys': set(), 'tags': set(), 'patterns': set()}
+
+        try:
+            if cls._redis is None:
+                cls._redis = cache_service._create_backend(cls._app, BACKEND_REDIS, cls._config)
+                if cls._redis is None:
+                    raise ConnectionError("无法创建Redis连接")
+            else:
+                cls._redis.ping()
+            cls._apply_pending(pending)
+        except (OSError, *CONNECTION_ERRORS) as e:
+            with cls._lock:
+                for kind, values in pending.items():
+                    cls._pending[kind].update(values)
+            cls._last_error = str(e)
+            cls._delay = min(cls._delay * 2, cls._backoff_max)
+            # 随机抖动, 避免所有worker同时重连
+            cls._next_attempt = time.monotonic() + cls._delay * random.uniform(0.8, 1.2)
+            cls._set_state(STATE_DEGRADED, f"重连失败, {cls._delay:.0f}秒后重试: {cls._last_error}")
+            return
+
+        degraded_for = time.monotonic() - cls._state_since_monotonic
+        cache_service.use_backend(cls._app, cls._redis)
+        cls._consecutive_failures = 0
+        cls._stats['recoveries'] += 1
+        cls._set_state(STATE_CONNECTED, f"重连成功, 降级 {degraded_for:.1f} 秒")
+        Metrics.inc('zsxq_cache_backend_switches_total', backend=BACKEND_REDIS)
+
+        # 切换期间仍写入备用后端的键(尽力清理), 并清空备用后端, 下次故障时不会读到本次故障期间的旧值
+        with cls._lock:
+            pending, cls._pending = cls._pending, {'keys': set(), 'tags': set(), 'patterns': set()}
+        try:
+            cls._apply_pending(pending)
+        except (OSError, *CONNECTION_ERRORS) as e:
+            logger.warning(f"清理降级期间的缓存键失败: {str(e)}")
+        if cls._fallback is not None:
+            try:
+                cls._fallback.delete_pattern(cls._get_key_prefix() + '*')
+            except Exception as e:
+                logger.warning(f"清空备用缓存后端失败: {str(e)}")
+
+    @classmethod
+    def _apply_pending(cls, pending):
+        """在Redis中删除降级期间写入或失效的键"""
+        if pending['keys']:
+            cls._redis.delete_many(list(pending['keys']))
+        for tag in pending['tags']:
+            cls._redis.delete_tag(tag)
+        for pattern in pending['patterns']:
+            cls._redis.delete_pattern(pattern)
+
+    @classmethod
+    def _get_key_prefix(cls):
+        return cls._config.get('redis', {}).get('key_prefix', 'zsxq:')
+
+    @classmethod
+    def _set_state(cls, new_state, reason):
+        """切换状态并记录日志"""
+        old_state = cls._state
+        if old_state == new_state:
+            return
+
+        cls._state = new_state
+        log = logger.warning if new_state == STATE_DEGRADED else logger.info
+        # degraded与reconnecting之间的切换(每次重连)只记日志, 不重新计时也不计入切换记录
+        if new_state != STATE_CONNECTED and old_state not in (None, STATE_CONNECTED):
+            log(f"缓存健康状态: {old_state} -> {new_state} ({reason})")
+            return
+
+        cls._state_since = datetime.now().isoformat()
+        cls._state_since_monotonic = time.monotonic()
+        cls._transitions.append({
+            'from': old_state,
+            'to': new_state,
+            'reason': reason,
+            'at': cls._state_since
+        })
+        log(f"缓存健康状态: {old_state} -> {new_state} ({reason})")
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取健康探测状态
+
+        Returns:
+            dict: 当前状态、降级累计时间、故障与恢复次数及最近的状态切换; 未启用时返回None
+        """
+        if cls._state is None:
+            return None
+
+        degraded_seconds = cls._stats['degraded_seconds']
+        uncached_seconds = cls._stats['uncached_seconds']
+        if cls._state != STATE_CONNECTED and cls._last_tick is not None:
+            # 加上自上次探测以来尚未累计的时间
+            ongoing = time.monotonic() - cls._last_tick
+            degraded_seconds += ongoing
+            if cls._fallback is None:
+                uncached_seconds += ongoing
+
+        return dict(
+            cls._stats,
+            state=cls._state,
+            since=cls._state_since,
+            degraded_seconds=round(degraded_seconds, 3),
+            uncached_seconds=round(uncached_seconds, 3),
+            consecutive_failures=cls._consecutive_failures,
+            retry_in=round(max(cls._next_attempt - time.monotonic(), 0), 2) if cls._state != STATE_CONNECTED else 0,
+            last_error=cls._last_error,
+            pending_keys=len(cls._pending['keys']),
+            transitions=list(cls._transitions)
+        )
@@ -1,51 +1,252 @@
 """
-Redis缓存服务模块
+缓存服务模块
 """
-import redis
-import json
+import random
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
 from functools import wraps
 from flask import current_app
+from ..utils.codec import get_codec
+from ..utils.value_format import ValueFormat
+from ..utils.metrics import Metrics
+from .local_cache import LocalCache, InvalidationBus
+from .cache_health import CacheHealth
+from .redis_connection import create_redis_clients, CONNECTION_ERRORS
+from .cache_backends import (
+    RedisBackend, MemoryBackend, SQLiteBackend, BACKEND_REDIS, BACKEND_SQLITE, BACKEND_MEMORY
+)
+
+
+# 带元信息的缓存读取结果: 数据、剩余新鲜时间(见get_many_with_ttl)、缓存时间、否定缓存原因
+CacheEntry = namedtuple('CacheEntry', ['data', 'fresh_ttl', 'cached_at', 'negative'], defaults=(None,))
+
+
+def hit_kind(data, negative=None):
+    """
+    命中类型: negative(否定缓存, 如项目不存在)、empty(空列表/空字典等)、hit(普通数据)
+
+    Args:
+        data: 缓存数据
+        negative: 否定缓存原因
+
+    Returns:
+        str: 命中类型, 用作统计与指标的result标签
+    """
+    if negative is not None:
+        return 'negative'
+    if data is None or (isinstance(data, (list, dict, str)) and not data):
+        return 'empty'
+    return 'hit'
+
+
+def key_family(key, prefix=''):
+    """
+    缓存键所属的键族(用于分族统计)
+
+    项目数据按数据类型归类(projects|info|stats|daily_stats|leaderboard|topics, 与ZSXQService.CACHE_TTL一致),
+    兜底副本为 <键族>:last_known, 其余为 topics_checkpoint|projects_index|tags|lock|ratelimit|other;
+    哈希标签中的项目ID不参与归类。
+
+    Args:
+        key: 缓存键
+        prefix: 键前缀
+
+    Returns:
+        str: 键族
+    """
+    if prefix and key.startswith(prefix):
+        key = key[len(prefix):]
+    if key.endswith((':flight', ':revalidating')):
+        return 'lock'
+    if key.endswith(':last_known'):
+        return key_family(key[:-len(':last_known')]) + ':last_known'
+    if key.startswith('project:'):
+        # project:{<project_id>}:<数据类型>[:...]
+        parts = key.split(':')
+        if len(parts) < 3:
+            return 'other'
+        return 'topics_checkpoint' if parts[2] == 'topics' and parts[-1] == 'checkpoint' else parts[2]
+    if key.startswith('{projects}:'):
+        return 'projects' if key.startswith('{projects}:list') else 'projects_index'
+    if key.startswith('tags:'):
+        return 'tags'
+    if key.startswith('{ratelimit:'):
+        return 'ratelimit'
+    return 'other'
 
 
 class CacheService:
-    """Redis缓存服务类"""
+    """
+    缓存服务类
 
-    _redis_client = None
+    按 缓存配置.backends 的顺序选择第一个可用的存储后端(见cache_backends),
+    Redis不可用时退到本机磁盘或进程内缓存, 仍然减少上游请求。
+    """
+
+    # 当前使用的存储后端(均不可用时为None)
+    _backend = None
+    _codec = get_codec('json')
+    # 缓存值格式(格式头 + 可选压缩 + 信封)
+    _format = ValueFormat(_codec, compression='none')
+    _config = {}
+    # 进程内一级缓存及其失效通知(未启用时为None)
+    _local_cache = None
+    _invalidation = None
+    # l2_hits包括空值与否定缓存命中, l2_empty/l2_negative为其中的细分
+    _stats = {'l2_hits': 0, 'l2_misses': 0, 'l2_empty': 0, 'l2_negative': 0, 'errors': 0}
+    # 键族 -> 命中(一级与二级缓存)、未命中、写入、错误、耗时与抽样值大小统计
+    _family_stats = {}
+    # 请求线程、后台刷新线程与异步客户端线程池都会更新上述统计
+    _stats_lock = threading.Lock()
+    # 写入时记录值大小的抽样比例
+    _size_sample_rate = 0.1
+    # 键空间统计的剩余过期时间分布: (上限秒数, 标签), 超过最后一档为 >=1d
+    TTL_BUCKETS = ((60, '<1m'), (600, '<10m'), (1800, '<30m'), (3600, '<1h'), (7200, '<2h'), (86400, '<1d'))
 
     @classmethod
     def init_cache(cls, app, cache_config):
         """
-        初始化Redis连接
+        初始化缓存后端
+
+        按 缓存配置.backends 的顺序依次尝试, 使用第一个可用的后端
 
         Args:
             app: Flask应用实例
             cache_config: 缓存配置字典
+
+        Returns:
+            bool: 首选后端是否可用(使用备用后端或全部不可用时返回False)
+        """
+        cls._config = cache_config
+
+        cls._size_sample_rate = float(cache_config.get('observability', {}).get('size_sample_rate', 0.1))
+        cls._codec = get_codec(cache_config.get('codec', 'auto'))
+        compression_config = cache_config.get('compression', {})
+        cls._format = ValueFormat(
+            cls._codec,
+            compression=compression_config.get('algorithm', 'zlib'),
+            threshold=compression_config.get('threshold', 1024),
+            level=compression_config.get('level')
+        )
+
+        # 存储配置到app.config
+        app.config['CACHE_CONFIG'] = cache_config
+
+        order = cache_config.get('backends', [BACKEND_REDIS, BACKEND_MEMORY])
+        for name in order:
+            backend = cls._create_backend(app, name, cache_config)
+            if backend is None:
+                continue
+
+            # 后端可用后才对外可见, 后台启动时请求不会拿到未连通的后端
+            cls.use_backend(app, backend)
+            if name != order[0]:
+                app.logger.warning(f"首选缓存后端 {order[0]} 不可用, 使用 {name}")
+            CacheHealth.start(app, cache_config, backend)
+            return name == order[0]
+
+        app.logger.warning("缓存后端均不可用, 将使用降级模式(无缓存)")
+        cls.use_backend(app, None)
+        CacheHealth.start(app, cache_config, None)
+        return False
+
+    @classmethod
+    def use_backend(cls, app, backend):
+        """
+        切换当前使用的存储后端(初始化时及健康探测在Redis故障与恢复时调用)
+
+        Args:
+            app: Flask应用实例
+            backend: 存储后端, None表示以无缓存模式运行
+        """
+        cls._backend = backend
+        app.config['REDIS_CLIENT'] = backend.redis_client if backend is not None else None
+        if backend is None or backend.name != BACKEND_REDIS:
+            return
+
+        if cls._local_cache is None:
+            cls._init_local_cache(app, cls._config.get('local_cache', {}))
+        else:
+            # 降级期间的写入与失效没有经过一级缓存, 丢弃本地副本
+            cls._local_cache.clear()
+            backend.invalidation = cls._invalidation
+
+    @classmethod
+    def _create_backend(cls, app, name, cache_config):
         """
-        redis_config = cache_config.get('redis', {})
+        创建并检查一个存储后端
+
+        Args:
+            app: Flask应用实例
+            name: 后端名称 redis|sqlite|memory
+            cache_config: 缓存配置字典
 
+        Returns:
+            CacheBackend: 可用的后端, 不可用时返回None
+        """
         try:
-            cls._redis_client = redis.Redis(
-                host=redis_config.get('host', 'localhost'),
-                port=redis_config.get('port', 6379),
-                db=redis_config.get('db', 0),
-                password=redis_config.get('password', None),
-                decode_responses=True,  # 自动解码为字符串
-                socket_timeout=5,
-                socket_connect_timeout=5
+            if name == BACKEND_REDIS:
+                clients = create_redis_clients(cache_config.get('redis', {}))
+                backend = RedisBackend(clients, tag_ttl=cache_config.get('tag_ttl', 30 * 86400))
+            elif name == BACKEND_SQLITE:
+                sqlite_config = cache_config.get('sqlite', {})
+                backend = SQLiteBackend(
+                    path=sqlite_config.get('path', 'cache/cache.sqlite3'),
+                    busy_timeout=sqlite_config.get('busy_timeout', 5)
+                )
+            elif name == BACKEND_MEMORY:
+                backend = MemoryBackend(max_bytes=cache_config.get('memory', {}).get('max_bytes', 64 * 1024 * 1024))
+            else:
+                app.logger.warning(f"未知的缓存后端: {name}")
+                return None
+            backend.ping()
+        except (ValueError, OSError, *CONNECTION_ERRORS) as e:
+            app.logger.warning(f"缓存后端 {name} 不可用: {str(e)}")
+            return None
+
+        details = backend.get_stats()
+        if name == BACKEND_REDIS:
+            app.logger.info(
+                f"Redis缓存连接成功 (模式: {details['mode']}, "
+                f"副本读取: {'是' if details['replica_reads'] else '否'}, 缓存值格式: {cls._format.name})"
             )
+        else:
+            app.logger.info(f"缓存后端: {name} (缓存值格式: {cls._format.name})")
+        return backend
 
-            # 测试连接
-            cls._redis_client.ping()
-            app.logger.info("Redis缓存连接成功")
+    @classmethod
+    def _init_local_cache(cls, app, local_config):
+        """
+        初始化进程内一级缓存
 
-            # 存储配置到app.config
-            app.config['CACHE_CONFIG'] = cache_config
-            app.config['REDIS_CLIENT'] = cls._redis_client
+        Args:
+            app: Flask应用实例
+            local_config: 一级缓存配置 (缓存配置.local_cache)
+        """
+        if not local_config.get('enabled', False):
+            return
+
+        cls._local_cache = LocalCache(
+            max_bytes=local_config.get('max_bytes', 32 * 1024 * 1024),
+            ttl=local_config.get('ttl', 30),
+            max_item_bytes=local_config.get('max_item_bytes', 4 * 1024 * 1024),
+            exclude=local_config.get('exclude', ['*:checkpoint', '*:last_known'])
+        )
+        channel = cls._get_key_prefix() + local_config.get('channel', 'cache:invalidate')
+        cls._invalidation = InvalidationBus(cls._backend.redis_client, channel, cls._local_cache)
+        cls._backend.invalidation = cls._invalidation
+        cls._invalidation.ensure_running()
+        app.logger.info(f"一级缓存已启用 (上限 {cls._local_cache.max_bytes} 字节, TTL {cls._local_cache.ttl} 秒)")
 
-        except redis.RedisError as e:
-            app.logger.warning(f"Redis连接失败: {str(e)}, 将使用降级模式(无缓存)")
-            cls._redis_client = None
-            app.config['CACHE_CONFIG'] = {'enabled': False}
+    @classmethod
+    def _local_cache_active(cls):
+        """一级缓存是否可用(使用Redis且失效订阅正常时才使用)"""
+        if cls._local_cache is None or cls._backend is None or cls._backend.name != BACKEND_REDIS:
+            return False
+        cls._invalidation.ensure_running()
+        return cls._invalidation.connected
 
     @classmethod
     def get_client(cls):
@@ -53,9 +254,24 @@ class CacheService:
         获取Redis客户端
 
         Returns:
-            redis.Redis: Redis客户端实例,如果未初始化则返回None
+            redis.Redis: Redis客户端实例, 未初始化或当前后端不是Redis时返回None
+        """
+        return cls._backend.redis_client if cls._backend is not None else None
+
+    @classmethod
+    def get_backend_name(cls):
+        """
+        获取当前使用的存储后端名称
+
+        Returns:
+            str: redis|sqlite|memory, 缓存不可用时为None
         """
-        return cls._redis_client
+        return cls._backend.name if cls._backend is not None else None
+
+    @classmethod
+    def is_cluster(cls):
+        """是否为Redis Cluster模式(不支持MULTI事务与跨槽位的多键命令)"""
+        return cls._backend is not None and cls._backend.is_cluster
 
     @classmethod
     def is_enabled(cls):
@@ -63,9 +279,10 @@ class CacheService:
         检查缓存是否启用
 
         Returns:
-            bool: 缓存是否可用
+            bool: 缓存是否可用(任一存储后端)
         """
-        return cls._redis_client is not None
+        CacheHealth.ensure_running()
+        return cls._backend is not None
 
     @classmethod
     def _get_key_prefix(cls):
@@ -74,7 +291,8 @@ class CacheService:
             config = current_app.config.get('CACHE_CONFIG', {})
             return config.get('redis', {}).get('key_prefix', 'zsxq:')
         except:
-            return 'zsxq:'
+            # 无应用上下文(如后台线程)时使用初始化时的配置
+            return cls._config.get('redis', {}).get('key_prefix', 'zsxq:')
 
     @classmethod
     def _get_default_ttl(cls):
@@ -112,33 +330,53 @@ class CacheService:
             key: 缓存键
 
         Returns:
-            解析后的数据,如果不存在或出错则返回None
+            解析后的数据,如果不存在、为否定缓存或出错则返回None
         """
         if not cls.is_enabled():
             return None
 
+        started = time.perf_counter()
+        local_active = cls._local_cache_active()
+        if local_active and cls._local_cache.accepts(key):
+            found, value = cls._local_cache.get(key)
+            if found:
+                cls._observe('get', cls._family(key), started, tier='l1')
+                cls._count_hits([(key, hit_kind(value[0], value[2]))], 'get', 'l1')
+                return value[0]
+
         try:
-            value = cls._redis_client.get(key)
+            value = cls._backend.read_many([key])[0]
+            cls._observe('get', cls._family(key), started, tier='l2')
             if value:
-                return json.loads(value)
+                data, cached_at, negative = cls._format.decode(value)
+                cls._count_hits([(key, hit_kind(data, negative))], 'get', 'l2')
+                if local_active:
+                    cls._local_cache.set(key, (data, cached_at, negative), len(value))
+                return data
+            cls._count_hits([(key, 'miss')], 'get', 'l2')
             return None
         except Exception as e:
+            CacheHealth.report_error(e)
+            cls._count_error('get', [key], tier='l2')
             current_app.logger.error(f"获取缓存失败 {key}: {str(e)}")
             return None
 
     @classmethod
-    def set(cls, key, value, ttl=None):
+    def set(cls, key, value, ttl=None, tags=None, negative=None):
         """
         设置缓存
 
         Args:
             key: 缓存键
-            value: 要缓存的数据(会被JSON序列化)
+            value: 要缓存的数据(按配置的编解码器序列化)
             ttl: 过期时间(秒),None则使用默认值
+            tags: 标签集合键列表, 键会登记到这些集合中, 可通过delete_tag一次删除
+            negative: 否定缓存原因(字典), 给定时写入否定缓存(value通常为None), 见set_negative
 
         Returns:
             bool: 是否成功
         """
+        CacheHealth.record_pending(keys=[key])
         if not cls.is_enabled():
             return False
 
@@ -146,10 +384,18 @@ class CacheService:
             if ttl is None:
                 ttl = cls._get_default_ttl()
 
-            serialized = json.dumps(value, ensure_ascii=False)
-            cls._redis_client.setex(key, ttl, serialized)
+            started = time.perf_counter()
+            cached_at = datetime.now().isoformat()
+            serialized = cls._format.encode(value, cached_at=cached_at, negative=negative)
+            cls._backend.write_many({key: serialized}, {key: ttl}, key_tags={key: tags} if tags else None)
+            if cls._local_cache_active():
+                cls._local_cache.set(key, (value, cached_at, negative), len(serialized), ttl)
+            cls._observe('set', cls._family(key), started)
+            cls._count_sets('set', {key: len(serialized)})
             return True
         except Exception as e:
+            CacheHealth.report_error(e)
+            cls._count_error('set', [key])
             current_app.logger.error(f"设置缓存失败 {key}: {str(e)}")
             return False
 
@@ -164,39 +410,548 @@ class CacheService:
         Returns:
             bool: 是否成功
         """
+        CacheHealth.record_pending(keys=[key])
         if not cls.is_enabled():
             return False
 
         try:
-            cls._redis_client.delete(key)
+            cls._backend.delete_many([key])
+            if cls._local_cache is not None:
+                cls._local_cache.delete([key])
             return True
         except Exception as e:
+            CacheHealth.report_error(e)
             current_app.logger.error(f"删除缓存失败 {key}: {str(e)}")
             return False
 
+    @classmethod
+    def get_many(cls, keys):
+        """
+        批量获取缓存(一级缓存未命中的键通过一次MGET读取)
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            dict: 键 -> 数据, 只包含命中的键(否定缓存按未命中处理)
+        """
+        if not cls.is_enabled() or not keys:
+            return {}
+
+        started = time.perf_counter()
+        results = {}
+        remaining = list(dict.fromkeys(keys))
+
+        local_active = cls._local_cache_active()
+        if local_active:
+            pending, kinds = [], []
+            for key in remaining:
+                found, value = cls._local_cache.get(key) if cls._local_cache.accepts(key) else (False, None)
+                if not found:
+                    pending.append(key)
+                    continue
+                kinds.append((key, hit_kind(value[0], value[2])))
+                if value[2] is None:
+                    results[key] = value[0]
+            cls._count_hits(kinds, 'get_many', 'l1')
+            remaining = pending
+
+        if not remaining:
+            cls._observe('get_many', cls._batch_family(keys), started, tier='l1')
+            return results
+
+        try:
+            values = cls._backend.read_many(remaining)
+        except Exception as e:
+            CacheHealth.report_error(e)
+            cls._count_error('get_many', remaining, tier='l2')
+            current_app.logger.error(f"批量获取缓存失败 ({len(remaining)} 个键): {str(e)}")
+            return results
+
+        cls._observe('get_many', cls._batch_family(remaining), started, tier='l2')
+        kinds = []
+        for key, value in zip(remaining, values):
+            if not value:
+                kinds.append((key, 'miss'))
+                continue
+            try:
+                data, cached_at, negative = cls._format.decode(value)
+            except Exception as e:
+                with cls._stats_lock:
+                    cls._stats['errors'] += 1
+                current_app.logger.error(f"解析缓存失败 {key}: {str(e)}")
+                kinds.append((key, 'miss'))
+                continue
+            kinds.append((key, hit_kind(data, negative)))
+            if negative is None:
+                results[key] = data
+            if local_active:
+                cls._local_cache.set(key, (data, cached_at, negative), len(value))
+
+        cls._count_hits(kinds, 'get_many', 'l2')
+        return results
+
+    @classmethod
+    def get_many_with_ttl(cls, keys, grace=0):
+        """
+        批量获取缓存及其剩余新鲜时间(一个pipeline完成GET与PTTL)
+
+        Args:
+            keys: 缓存键列表
+            grace: 过期宽限(秒), 剩余过期时间中最后grace秒视为已过软过期
+
+        Returns:
+            dict: 键 -> CacheEntry(数据, 剩余新鲜时间, 缓存时间, 否定缓存原因), 只包含命中的键(含否定缓存);
+                  剩余新鲜时间<=0表示数据已过软过期, 一级缓存命中时为None(一级缓存只保存新鲜数据)
+        """
+        if not cls.is_enabled() or not keys:
+            return {}
+
+        started = time.perf_counter()
+        results = {}
+        remaining = list(dict.fromkeys(keys))
+
+        local_active = cls._local_cache_active()
+        if local_active:
+            pending = []
+            for key in remaining:
+                found, value = cls._local_cache.get(key) if cls._local_cache.accepts(key) else (False, None)
+                if found:
+                    results[key] = CacheEntry(value[0], None, value[1], value[2])
+                else:
+                    pending.append(key)
+            cls._count_hits([(key, hit_kind(entry.data, entry.negative)) for key, entry in results.items()], 'get', 'l1')
+            remaining = pending
+
+        if not remaining:
+            return results
+
+        try:
+            replies = cls._backend.read_many(remaining, with_ttl=True)
+        except Exception as e:
+            CacheHealth.report_error(e)
+            cls._count_error('get', remaining, tier='l2')
+            current_app.logger.error(f"获取缓存失败 ({len(remaining)} 个键): {str(e)}")
+            return results
+
+        cls._observe('get', cls._batch_family(remaining), started, tier='l2')
+        kinds = []
+        for key, (value, pttl) in zip(remaining, replies):
+            if not value:
+                kinds.append((key, 'miss'))
+                continue
+            try:
+                data, cached_at, negative = cls._format.decode(value)
+            except Exception as e:
+                with cls._stats_lock:
+                    cls._stats['errors'] += 1
+                current_app.logger.error(f"解析缓存失败 {key}: {str(e)}")
+                kinds.append((key, 'miss'))
+                continue
+            kinds.append((key, hit_kind(data, negative)))
+            # 未设置过期时间(-1)的键视为永远新鲜
+            fresh_ttl = float('inf') if pttl is None or pttl < 0 else pttl / 1000.0 - grace
+            results[key] = CacheEntry(data, fresh_ttl, cached_at, negative)
+            if local_active and fresh_ttl > 0:
+                cls._local_cache.set(key, (data, cached_at, negative), len(value), fresh_ttl)
+
+        cls._count_hits(kinds, 'get', 'l2')
+        return results
+
+    @classmethod
+    def _family(cls, key):
+        """缓存键所属的键族(见key_family)"""
+        return key_family(key, cls._config.get('redis', {}).get('key_prefix', 'zsxq:'))
+
+    @classmethod
+    def _batch_family(cls, keys):
+        """一批键的键族, 跨多个键族时为mixed"""
+        families = {cls._family(key) for key in keys}
+        return families.pop() if len(families) == 1 else 'mixed'
+
+    @classmethod
+    def _family_entry(cls, family):
+        """获取键族的统计字典(不存在时创建; 调用方需持有_stats_lock)"""
+        entry = cls._family_stats.get(family)
+        if entry is None:
+            entry = cls._family_stats[family] = {
+                'hits': 0, 'misses': 0, 'sets': 0, 'errors': 0, 'ops': 0, 'seconds': 0.0,
+                'size_samples': 0, 'size_bytes': 0, 'size_max': 0
+            }
+        return entry
+
+    @classmethod
+    def _observe(cls, op, family, started, tier='none'):
+        """
+        记录一次缓存操作的耗时
+
+        Args:
+            op: 操作名(指标标签)
+            family: 键族, 批量操作跨多个键族时为mixed
+            started: 开始时刻(time.perf_counter)
+            tier: l1|l2, 写入操作为none(所有序列的标签集合保持一致)
+        """
+        elapsed = time.perf_counter() - started
+        Metrics.observe('zsxq_cache_operation_duration_seconds', elapsed, op=op, tier=tier, family=family)
+        with cls._stats_lock:
+            entry = cls._family_entry(family)
+            entry['ops'] += 1
+            entry['seconds'] += elapsed
+
+    @classmethod
+    def _count_hits(cls, key_kinds, op, tier):
+        """
+        记录命中统计与指标
+
+        Args:
+            key_kinds: (缓存键, 命中类型) 列表, 命中类型见hit_kind, 未命中为miss
+            op: 操作名(指标标签)
+            tier: l1|l2
+        """
+        counts = {}
+        for key, kind in key_kinds:
+            group = (cls._family(key), kind)
+            counts[group] = counts.get(group, 0) + 1
+
+        kinds = {}
+        for (family, kind), count in counts.items():
+            Metrics.inc('zsxq_cache_requests_total', count, op=op, result=kind, tier=tier, family=family)
+            kinds[kind] = kinds.get(kind, 0) + count
+
+        with cls._stats_lock:
+            for (family, kind), count in counts.items():
+                cls._family_entry(family)['misses' if kind == 'miss' else 'hits'] += count
+            if tier == 'l2':
+                misses = kinds.pop('miss', 0)
+                cls._stats['l2_hits'] += sum(kinds.values())
+                cls._stats['l2_empty'] += kinds.get('empty', 0)
+                cls._stats['l2_negative'] += kinds.get('negative', 0)
+                cls._stats['l2_misses'] += misses
+
+    @classmethod
+    def _count_sets(cls, op, sizes):
+        """
+        记录写入统计, 并按抽样比例记录值大小
+
+        Args:
+            op: 操作名(指标标签)
+            sizes: 缓存键 -> 序列化后的字节数
+        """
+        counts = {}
+        samples = []
+        for key, size in sizes.items():
+            family = cls._family(key)
+            counts[family] = counts.get(family, 0) + 1
+            if cls._size_sample_rate and random.random() < cls._size_sample_rate:
+                Metrics.observe('zsxq_cache_value_bytes', size, family=family)
+                samples.append((family, size))
+
+        for family, count in counts.items():
+            Metrics.inc('zsxq_cache_requests_total', count, op=op, result='ok', tier='none', family=family)
+
+        with cls._stats_lock:
+            for family, size in samples:
+                entry = cls._family_entry(family)
+                entry['size_samples'] += 1
+                entry['size_bytes'] += size
+                entry['size_max'] = max(entry['size_max'], size)
+            for family, count in counts.items():
+                cls._family_entry(family)['sets'] += count
+
+    @classmethod
+    def _count_error(cls, op, keys, tier='none'):
+        """
+        记录一次失败的缓存操作
+
+        Args:
+            op: 操作名(指标标签)
+            keys: 操作涉及的缓存键
+            tier: l2(读取) | none(写入)
+        """
+        family = cls._batch_family(keys)
+        is_write = tier == 'none'
+        Metrics.inc('zsxq_cache_requests_total', len(keys) if is_write else 1,
+                    op=op, result='error', tier=tier, family=family)
+        with cls._stats_lock:
+            if not is_write:
+                cls._stats['errors'] += 1
+            cls._family_entry(family)['errors'] += 1
+
+    @classmethod
+    def get_with_ttl(cls, key, grace=0):
+        """
+        获取缓存及其剩余新鲜时间
+
+        Args:
+            key: 缓存键
+            grace: 过期宽限(秒), 见get_many_with_ttl
+
+        Returns:
+            CacheEntry: (数据, 剩余新鲜时间, 缓存时间, 否定缓存原因), 未命中时返回None
+                        (缓存的None/空列表等仍返回CacheEntry, 可与未命中区分)
+        """
+        return cls.get_many_with_ttl([key], grace=grace).get(key)
+
+    @classmethod
+    def set_negative(cls, key, ttl, reason=None, tags=None):
+        """
+        写入否定缓存(如项目不存在), 在ttl内读取者无需再请求上游
+
+        否定缓存是带标记的信封而不是空值, 与缓存的空列表/空字典可以区分。
+
+        Args:
+            key: 缓存键
+            ttl: 过期时间(秒), 通常远短于正常数据
+            reason: 原因(字典), 如 {'message': ..., 'status_code': ..., 'error_class': ...}
+            tags: 标签集合键列表
+
+        Returns:
+            bool: 是否成功
+        """
+        return cls.set(key, None, ttl=ttl, tags=tags, negative=reason or {})
+
+    @classmethod
+    def set_many(cls, items, ttl=None, tags=None, cached_at=None):
+        """
+        批量设置缓存(一个pipeline完成全部写入、标签登记和失效通知)
+
+        Args:
+            items: 键 -> 数据
+            ttl: 过期时间(秒); 可以是统一的数值, 也可以是 键 -> 过期时间 的字典,
+                 None或字典中缺失的键使用默认值
+            tags: 标签集合键列表(所有键共用), 或 键 -> 标签列表 的字典
+            cached_at: 写入信封的缓存时间(ISO格式字符串), None则取当前时间
+
+        Returns:
+            bool: 是否成功
+        """
+        CacheHealth.record_pending(keys=items)
+        if not cls.is_enabled() or not items:
+            return False
+
+        default_ttl = cls._get_default_ttl()
+        if isinstance(ttl, dict):
+            ttls = {key: ttl.get(key) or default_ttl for key in items}
+        else:
+            ttls = dict.fromkeys(items, ttl or default_ttl)
+
+        try:
+            started = time.perf_counter()
+            cached_at = cached_at or datetime.now().isoformat()
+            serialized = {key: cls._format.encode(value, cached_at=cached_at) for key, value in items.items()}
+
+            cls._backend.write_many(
+                serialized, ttls,
+                key_tags=(tags if isinstance(tags, dict) else dict.fromkeys(items, tags)) if tags else None
+            )
+
+            if cls._local_cache_active():
+                for key, value in items.items():
+                    cls._local_cache.set(key, (value, cached_at, None), len(serialized[key]), ttls[key])
+            cls._observe('set_many', cls._batch_family(items), started)
+            cls._count_sets('set_many', {key: len(value) for key, value in serialized.items()})
+            return True
+        except Exception as e:
+            CacheHealth.report_error(e)
+            cls._count_error('set_many', list(items))
+            current_app.logger.error(f"批量设置缓存失败 ({len(items)} 个键): {str(e)}")
+            return False
+
+    @classmethod
+    def delete_tag(cls, tag):
+        """
+        删除标签集合中登记的所有键
+
+        Args:
+            tag: 标签集合键
+
+        Returns:
+            int: 删除的键数量
+        """
+        CacheHealth.record_pending(tag=tag)
+        if not cls.is_enabled():
+            return 0
+
+        try:
+            keys, deleted = cls._backend.delete_tag(tag)
+            if keys and cls._local_cache is not None:
+                cls._local_cache.delete(keys)
+            return deleted
+        except Exception as e:
+            CacheHealth.report_error(e)
+            current_app.logger.error(f"按标签删除缓存失败 {tag}: {str(e)}")
+            return 0
+
+    @classmethod
+    def delete_many(cls, keys):
+        """
+        批量删除缓存
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            int: 删除的键数量
+        """
+        keys = list(keys)
+        CacheHealth.record_pending(keys=keys)
+        if not cls.is_enabled() or not keys:
+            return 0
+
+        try:
+            deleted = cls._backend.delete_many(keys)
+            if cls._local_cache is not None:
+                cls._local_cache.delete(keys)
+            return deleted
+        except Exception as e:
+            CacheHealth.report_error(e)
+            current_app.logger.error(f"批量删除缓存失败 ({len(keys)} 个键): {str(e)}")
+            return 0
+
     @classmethod
     def delete_pattern(cls, pattern):
         """
         批量删除匹配模式的缓存键
 
+        Redis后端使用SCAN增量遍历, 不会像KEYS那样长时间阻塞Redis; 已知键集合的场景应优先使用delete_tag。
+
         Args:
             pattern: 键模式(支持通配符*)
 
         Returns:
             int: 删除的键数量
         """
+        CacheHealth.record_pending(pattern=pattern)
         if not cls.is_enabled():
             return 0
 
         try:
-            keys = cls._redis_client.keys(pattern)
-            if keys:
-                return cls._redis_client.delete(*keys)
-            return 0
+            deleted = cls._backend.delete_pattern(pattern)
+            if cls._local_cache is not None:
+                cls._local_cache.delete_pattern(pattern)
+            return deleted
         except Exception as e:
+            CacheHealth.report_error(e)
             current_app.logger.error(f"批量删除缓存失败 {pattern}: {str(e)}")
             return 0
 
+    @classmethod
+    def get_stats(cls):
+        """
+        获取缓存命中统计
+
+        Returns:
+            dict: backend为当前存储后端, l1为进程内一级缓存统计(未启用时为None),
+                  l2为存储后端的命中统计(l2_hits包括空值与否定缓存命中, hit_rate按其计算),
+                  health为Redis健康探测状态(未启用时为None),
+                  families为各键族的命中率(含一级缓存命中)、写入与错误次数、平均耗时及抽样的值大小
+        """
+        with cls._stats_lock:
+            stats = dict(cls._stats)
+            family_stats = {family: dict(entry) for family, entry in cls._family_stats.items()}
+
+        l2_lookups = stats['l2_hits'] + stats['l2_misses']
+        families = {}
+        for family, entry in sorted(family_stats.items()):
+            lookups = entry['hits'] + entry['misses']
+            families[family] = {
+                'hits': entry['hits'],
+                'misses': entry['misses'],
+                'hit_rate': round(entry['hits'] / lookups, 4) if lookups else None,
+                'sets': entry['sets'],
+                'errors': entry['errors'],
+                'avg_ms': round(entry['seconds'] / entry['ops'] * 1000, 3) if entry['ops'] else None,
+                'avg_bytes': entry['size_bytes'] // entry['size_samples'] if entry['size_samples'] else None,
+                'max_bytes': entry['size_max'] if entry['size_samples'] else None
+            }
+        return {
+            'backend': cls._backend.get_stats() if cls._backend is not None else None,
+            'l1': cls._local_cache.get_stats() if cls._local_cache else None,
+            'l2': dict(
+                stats,
+                hit_rate=round(stats['l2_hits'] / l2_lookups, 4) if l2_lookups else None
+            ),
+            'invalidation': cls._invalidation.get_stats() if cls._invalidation else None,
+            'health': CacheHealth.get_stats(),
+            'families': families
+        }
+
+    @classmethod
+    def inspect_keyspace(cls, pattern='*', max_keys=100000):
+        """
+        遍历键空间, 按键族统计键数、占用字节数与剩余过期时间
+
+        Redis后端使用SCAN增量遍历(启用副本读取时在副本上执行), 每批键通过一个pipeline
+        获取MEMORY USAGE与PTTL; 键数较多时耗时较长, 仅供运维排查与调整缓存时长使用。
+
+        Args:
+            pattern: 键模式(不含键前缀, 支持通配符*)
+            max_keys: 最多统计的键数, 达到后停止遍历
+
+        Returns:
+            dict: 后端、统计的键数、是否截断、耗时及各键族的统计; 缓存不可用时返回None
+        """
+        if not cls.is_enabled():
+            return None
+
+        backend = cls._backend
+        started = time.perf_counter()
+        families = {}
+        scanned = 0
+        truncated = False
+        for batch in backend.scan(cls._get_key_prefix() + pattern):
+            batch = batch[:max_keys - scanned]
+            for key, size, ttl in batch:
+                entry = families.setdefault(cls._family(key), {
+                    'keys': 0, 'bytes': 0, 'sized_keys': 0, 'no_expiry': 0, 'ttl_sum': 0.0,
+                    'ttl_min': None, 'ttl_max': None,
+                    'ttl_distribution': dict.fromkeys([label for _, label in cls.TTL_BUCKETS] + ['>=1d'], 0)
+                })
+                entry['keys'] += 1
+                if size is not None:
+                    entry['bytes'] += size
+                    entry['sized_keys'] += 1
+                if ttl < 0:
+                    entry['no_expiry'] += 1
+                    continue
+                entry['ttl_sum'] += ttl
+                entry['ttl_min'] = ttl if entry['ttl_min'] is None else min(entry['ttl_min'], ttl)
+                entry['ttl_max'] = ttl if entry['ttl_max'] is None else max(entry['ttl_max'], ttl)
+                label = next((label for limit, label in cls.TTL_BUCKETS if ttl < limit), '>=1d')
+                entry['ttl_distribution'][label] += 1
+
+            scanned += len(batch)
+            if scanned >= max_keys:
+                truncated = True
+                break
+
+        result = {}
+        for family, entry in sorted(families.items()):
+            expiring = entry['keys'] - entry['no_expiry']
+            result[family] = {
+                'keys': entry['keys'],
+                # 后端不支持统计占用(如Redis禁用了MEMORY命令)时为None
+                'bytes': entry['bytes'] if entry['sized_keys'] else None,
+                'avg_bytes': entry['bytes'] // entry['sized_keys'] if entry['sized_keys'] else None,
+                'ttl': {
+                    'min': round(entry['ttl_min'], 1) if entry['ttl_min'] is not None else None,
+                    'avg': round(entry['ttl_sum'] / expiring, 1) if expiring else None,
+                    'max': round(entry['ttl_max'], 1) if entry['ttl_max'] is not None else None,
+                    'no_expiry': entry['no_expiry'],
+                    'distribution': entry['ttl_distribution']
+                }
+            }
+
+        return {
+            'backend': backend.name,
+            'pattern': pattern,
+            'keys': scanned,
+            'bytes': sum(entry['bytes'] or 0 for entry in result.values()),
+            'truncated': truncated,
+            'duration': round(time.perf_counter() - started, 3),
+            'families': result
+        }
+
     @classmethod
     def exists(cls, key):
         """
@@ -208,14 +963,7 @@ class CacheService:
         Returns:
             bool: 是否存在
         """
-        if not cls.is_enabled():
-            return False
-
-        try:
-            return cls._redis_client.exists(key) > 0
-        except Exception as e:
-            current_app.logger.error(f"检查缓存存在性失败 {key}: {str(e)}")
-            return False
+        return cls.get_ttl(key) != -2
 
     @classmethod
     def get_ttl(cls, key):
@@ -232,63 +980,125 @@ class CacheService:
             return -2
 
         try:
-            return cls._redis_client.ttl(key)
+            return cls._backend.ttl(key)
         except Exception as e:
+            CacheHealth.report_error(e)
             current_app.logger.error(f"获取TTL失败 {key}: {str(e)}")
             return -2
 
 
 # 缓存键常量定义
 class CacheKeys:
-    """缓存键模板"""
+    """
+    缓存键模板
+
+    项目ID与项目列表部分使用Redis哈希标签({...}), 同一项目的所有键(含标签集合、兜底副本与锁)
+    落在同一槽位, 集群模式下针对一个项目的多键操作不会跨节点。
+    """
 
     # 项目列表 (按scope分组)
-    PROJECTS_LIST = "projects:list:{scope}"
+    PROJECTS_LIST = "{projects}:list:<scope>"
 
     # 项目详情
-    PROJECT_INFO = "project:{project_id}:info"
+    PROJECT_INFO = "project:{<project_id>}:info"
 
     # 项目统计
-    PROJECT_STATS = "project:{project_id}:stats"
+    PROJECT_STATS = "project:{<project_id>}:stats"
 
     # 每日统计
-    PROJECT_DAILY_STATS = "project:{project_id}:daily_stats"
+    PROJECT_DAILY_STATS = "project:{<project_id>}:daily_stats"
 
     # 排行榜 (按type分组)
-    PROJECT_LEADERBOARD = "project:{project_id}:leaderboard:{type}"
+    PROJECT_LEADERBOARD = "project:{<project_id>}:leaderboard:<type>"
+
+    # 排行榜前N名 (浅层分页只读取这一小段)
+    PROJECT_LEADERBOARD_HEAD = "project:{<project_id>}:leaderboard:<type>:head"
 
     # 话题列表
-    PROJECT_TOPICS = "project:{project_id}:topics"
+    PROJECT_TOPICS = "project:{<project_id>}:topics"
+
+    @staticmethod
+    def hash_tag(value):
+        """
+        构建哈希标签
+
+        Args:
+            value: 标签内容, 集群模式下只按其计算槽位
+
+        Returns:
+            str: {value}
+        """
+        return '{' + str(value) + '}'
 
     @classmethod
     def projects_list(cls, scope='ongoing'):
         """构建项目列表缓存键"""
-        return CacheService.build_key('projects', 'list', scope)
+        return CacheService.build_key(cls.hash_tag('projects'), 'list', scope)
 
     @classmethod
     def project_info(cls, project_id):
         """构建项目详情缓存键"""
-        return CacheService.build_key('project', project_id, 'info')
+        return CacheService.build_key('project', cls.hash_tag(project_id), 'info')
 
     @classmethod
     def project_stats(cls, project_id):
         """构建项目统计缓存键"""
-        return CacheService.build_key('project', project_id, 'stats')
+        return CacheService.build_key('project', cls.hash_tag(project_id), 'stats')
 
     @classmethod
     def project_daily_stats(cls, project_id):
         """构建每日统计缓存键"""
-        return CacheService.build_key('project', project_id, 'daily_stats')
+        return CacheService.build_key('project', cls.hash_tag(project_id), 'daily_stats')
 
     @classmethod
     def project_leaderboard(cls, project_id, leaderboard_type='continuous'):
         """构建排行榜缓存键"""
-        return CacheService.build_key('project', project_id, 'leaderboard', leaderboard_type)
+        return CacheService.build_key('project', cls.hash_tag(project_id), 'leaderboard', leaderboard_type)
+
+    @classmethod
+    def project_leaderboard_head(cls, project_id, leaderboard_type='continuous'):
+        """构建排行榜前N名缓存键"""
+        return CacheService.build_key('project', cls.hash_tag(project_id), 'leaderboard', leaderboard_type, 'head')
 
     @classmethod
     def project_topics(cls, project_id):
         """构建话题列表缓存键"""
-        return CacheService.build_key('project', project_id, 'topics')
+        return CacheService.build_key('project', cls.hash_tag(project_id), 'topics')
+
+    @classmethod
+    def project_topics_checkpoint(cls, project_id):
+        """构建话题历史抓取检查点缓存键"""
+        return CacheService.build_key('project', cls.hash_tag(project_id), 'topics', 'checkpoint')
+
+    @classmethod
+    def projects_index(cls):
+        """构建项目索引缓存键 (checkin_id -> 原始项目)"""
+        return CacheService.build_key(cls.hash_tag('projects'), 'index')
+
+    @classmethod
+    def projects_index_scope(cls, scope):
+        """构建项目索引范围分区缓存键"""
+        return CacheService.build_key(cls.hash_tag('projects'), 'index', 'scope', scope)
+
+    @classmethod
+    def projects_index_meta(cls):
+        """构建项目索引元信息缓存键 (scope -> 建立时间)"""
+        return CacheService.build_key(cls.hash_tag('projects'), 'index', 'meta')
+
+    @classmethod
+    def project_tag(cls, project_id):
+        """构建项目标签集合键(登记该项目的所有缓存键, 与项目的键同一槽位)"""
+        return CacheService.build_key('tags', 'project', cls.hash_tag(project_id))
+
+    @classmethod
+    def revalidate_lock(cls, cache_key):
+        """构建后台刷新锁键(同一缓存键只由一个worker刷新)"""
+        return f"{cache_key}:revalidating"
+
+    @classmethod
+    def last_known(cls, cache_key):
+        """构建兜底副本缓存键(保存最后一次成功获取的数据)"""
+        return f"{cache_key}:last_known"
 
     @classmethod
     def project_all(cls, project_id):
@@ -301,8 +1111,7 @@ class CacheKeys:
         Returns:
             str: 键模式
         """
-        prefix = CacheService._get_key_prefix()
-        return f"{prefix}project:{project_id}:*"
+        return CacheService.build_key('project', cls.hash_tag(project_id), '*')
 
 
 # 初始化函数
@@ -313,5 +1122,8 @@ def init_cache(app, cache_config):
     Args:
         app: Flask应用实例
         cache_config: 缓存配置
+
+    Returns:
+        bool: 是否连接成功
     """
-    CacheService.init_cache(app, cache_config)
+    return CacheService.init_cache(app, cache_config)
@@ -0,0 +1,75 @@
+"""
+概率提前刷新模块
+XFetch算法: 缓存过期前按随剩余时间减少而增大的概率提前刷新, 热点键不会在同一时刻集中过期
+"""
+import math
+import random
+import threading
+
+
+class EarlyRefresh:
+    """
+    XFetch概率提前刷新
+
+    剩余新鲜时间为ttl、重新获取耗时为delta时, 当 delta * beta * -ln(rand) >= ttl 时提前刷新:
+    越接近过期概率越高, 获取越慢越早开始刷新, beta越大越积极。
+    delta取该数据类型最近上游获取耗时的指数加权平均(进程内统计, 尚无统计时不提前刷新)。
+    """
+
+    # 获取耗时指数加权平均的平滑系数
+    ALPHA = 0.2
+
+    _lock = threading.Lock()
+    _durations = {}
+    _stats = {'checks': 0, 'early_refreshes': 0}
+
+    @classmethod
+    def record(cls, family, duration):
+        """
+        记录一次上游获取耗时
+
+        Args:
+            family: 数据类型 (projects|info|stats|daily_stats|leaderboard|topics)
+            duration: 耗时(秒)
+        """
+        with cls._lock:
+            previous = cls._durations.get(family)
+            cls._durations[family] = duration if previous is None else (
+                cls.ALPHA * duration + (1 - cls.ALPHA) * previous
+            )
+
+    @classmethod
+    def should_refresh(cls, family, fresh_ttl, beta=1.0):
+        """
+        判断是否提前刷新
+
+        Args:
+            family: 数据类型
+            fresh_ttl: 剩余新鲜时间(秒)
+            beta: 提前程度系数
+
+        Returns:
+            bool: 是否提前刷新
+        """
+        delta = cls._durations.get(family)
+        if not delta or fresh_ttl is None or fresh_ttl <= 0 or math.isinf(fresh_ttl):
+            return False
+
+        cls._stats['checks'] += 1
+        # 1 - random() 取值 (0, 1], 避免 log(0)
+        if delta * float(beta) * -math.log(1.0 - random.random()) >= fresh_ttl:
+            cls._stats['early_refreshes'] += 1
+            return True
+        return False
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取提前刷新统计
+
+        Returns:
+            dict: 判断次数、提前刷新次数及各数据类型的平均获取耗时
+        """
+        with cls._lock:
+            durations = {family: round(delta, 4) for family, delta in cls._durations.items()}
+        return dict(cls._stats, fetch_seconds=durations)
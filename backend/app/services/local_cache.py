@@ -0,0 +1,270 @@
+"""
+进程内一级缓存模块
+在Redis前增加按字节数限制的LRU/TTL缓存, 通过Redis发布订阅在所有worker与节点间同步失效
+"""
+import fnmatch
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """
+    按字节数限制的LRU缓存(条目带过期时间)
+
+    条目保存解码后的对象, 命中时既不访问Redis也不再反序列化;
+    调用方不得修改返回的对象。
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=30, max_item_bytes=4 * 1024 * 1024, exclude=()):
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl)
+        self.max_item_bytes = int(max_item_bytes)
+        self.exclude = list(exclude or ())
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidations': 0}
+
+    def accepts(self, key):
+        """键是否允许进入一级缓存"""
+        return not any(fnmatch.fnmatchcase(key, pattern) for pattern in self.exclude)
+
+    def get(self, key):
+        """
+        读取缓存
+
+        Returns:
+            tuple: (是否命中, 数据)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return True, value
+
+    def set(self, key, value, size, ttl=None):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 解码后的数据
+            size: 序列化后的字节数(用于容量控制)
+            ttl: Redis中的过期时间, 一级缓存取其与自身ttl的较小值
+        """
+        if size > self.max_item_bytes or not self.accepts(key):
+            return
+
+        ttl = self.ttl if ttl is None else min(self.ttl, float(ttl))
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def _remove(self, key):
+        """删除条目(需持有锁)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def delete(self, keys):
+        """删除指定键, 返回删除的条目数"""
+        deleted = 0
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    deleted += 1
+            self._stats['invalidations'] += deleted
+        return deleted
+
+    def delete_pattern(self, pattern):
+        """删除匹配通配符模式的键, 返回删除的条目数"""
+        with self._lock:
+            keys = [k for k in self._entries if fnmatch.fnmatchcase(k, pattern)]
+            for key in keys:
+                self._remove(key)
+            self._stats['invalidations'] += len(keys)
+        return len(keys)
+
+    def scan(self, pattern='*'):
+        """
+        匹配通配符模式的条目快照
+
+        Returns:
+            list: (键, 字节数, 过期时刻(time.monotonic)) 列表
+        """
+        with self._lock:
+            return [
+                (key, entry[2], entry[1]) for key, entry in self._entries.items()
+                if fnmatch.fnmatchcase(key, pattern)
+            ]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        """获取一级缓存统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            })
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+
+class InvalidationBus:
+    """
+    基于Redis发布订阅的一级缓存失效通知
+
+    写入和删除缓存时广播失效消息, 每个进程的订阅线程收到后清除本地副本(跳过自己发出的消息)。
+    订阅断开期间无法收到通知, 因此只有订阅正常时才使用一级缓存, 重新订阅时清空本地缓存。
+    订阅线程以带超时的轮询读取消息, 频道空闲不会触发socket_timeout; 空闲时定期PING,
+    未按时收到回复才视为断开。
+    """
+
+    # 轮询消息的超时(秒)
+    POLL_TIMEOUT = 1.0
+    # 空闲多少秒后发送PING
+    PING_INTERVAL = 15.0
+    # PING后多少秒内未收到回复视为断开
+    PING_TIMEOUT = 5.0
+
+    def __init__(self, redis_client, channel, local_cache):
+        self.redis_client = redis_client
+        self.channel = channel
+        self.local_cache = local_cache
+        self.origin = uuid.uuid4().hex
+        self.connected = False
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'received': 0, 'reconnects': 0}
+
+    def ensure_running(self):
+        """确保本进程的订阅线程在运行(fork后需要重新启动)"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            # fork出的子进程: 继承的本地缓存未经订阅保护, 直接清空
+            self.connected = False
+            self.local_cache.clear()
+            self.origin = uuid.uuid4().hex
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._listen_loop, name='cache-invalidation', daemon=True)
+            self._thread.start()
+
+    def publish(self, pipe=None, keys=None, pattern=None):
+        """
+        广播失效消息
+
+        Args:
+            pipe: 可选的Redis pipeline, 与写操作一起发送以省去一次往返
+            keys: 失效的键列表
+            pattern: 失效的键模式
+        """
+        message = json.dumps({'origin': self.origin, 'keys': keys or [], 'pattern': pattern})
+        (pipe or self.redis_client).publish(self.channel, message)
+        self._stats['published'] += 1
+
+    def _listen_loop(self):
+        pid = os.getpid()
+        delay = 0.5
+        while self._pid == pid:
+            pubsub = None
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=False)
+                pubsub.subscribe(self.channel)
+                last_activity = time.monotonic()
+                ping_sent = None
+                while self._pid == pid:
+                    message = pubsub.get_message(timeout=self.POLL_TIMEOUT)
+                    now = time.monotonic()
+                    if message is None:
+                        if ping_sent is not None and now - ping_sent > self.PING_TIMEOUT:
+                            raise redis.ConnectionError(f"PING {self.PING_TIMEOUT:.0f}秒内未收到回复")
+                        if ping_sent is None and now - last_activity >= self.PING_INTERVAL:
+                            pubsub.ping()
+                            ping_sent = now
+                        continue
+
+                    last_activity = now
+                    ping_sent = None
+                    if message['type'] == 'subscribe':
+                        # 断开期间可能错过通知, 重新订阅后丢弃所有本地副本
+                        self.local_cache.clear()
+                        self.connected = True
+                        delay = 0.5
+                        logger.info(f"一级缓存失效订阅已连接: {self.channel}")
+                    elif message['type'] == 'message':
+                        self._handle(message['data'])
+            except (redis.RedisError, OSError, ValueError) as e:
+                logger.warning(f"一级缓存失效订阅断开, {delay:.1f}秒后重连: {str(e)}")
+            finally:
+                self.connected = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+            self._stats['reconnects'] += 1
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _handle(self, data):
+        """处理一条失效消息"""
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get('origin') == self.origin:
+            return
+
+        self._stats['received'] += 1
+        if message.get('keys'):
+            self.local_cache.delete(message['keys'])
+        if message.get('pattern'):
+            self.local_cache.delete_pattern(message['pattern'])
+
+    def get_stats(self):
+        stats = dict(self._stats)
+        stats.update({'connected': self.connected, 'channel': self.channel})
+        return stats
@@ -0,0 +1,184 @@
+"""
+项目索引模块
+以checkin_id为键维护所有项目的原始数据, 项目详情回退查询与按范围筛选都在本地完成
+"""
+import json
+import logging
+import threading
+from datetime import datetime
+import redis
+from .cache_service import CacheService, CacheKeys
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ('ongoing', 'closed', 'over')
+
+
+class ProjectIndex:
+    """
+    项目索引
+
+    Redis中保存:
+    - hash  {projects}:index            checkin_id -> 原始项目JSON(附带所属scope)
+    - set   {projects}:index:scope:<s>  该范围内的checkin_id
+    - hash  {projects}:index:meta       scope -> 最近一次建立索引的时间
+    Redis不可用时使用进程内字典。
+    """
+
+    _lock = threading.Lock()
+    _local_projects = {}
+    _local_scopes = {}
+    _local_meta = {}
+
+    @classmethod
+    def _use_redis(cls):
+        return CacheService.get_client() is not None
+
+    @classmethod
+    def update_scope(cls, scope, raw_projects):
+        """
+        用某个范围的最新项目列表更新索引
+
+        Args:
+            scope: 项目范围 (ongoing|closed|over)
+            raw_projects: 知识星球返回的原始项目列表
+        """
+        entries = {}
+        for project in raw_projects:
+            checkin_id = str(project.get('checkin_id', ''))
+            if checkin_id:
+                entries[checkin_id] = dict(project, _scope=scope)
+
+        if cls._use_redis():
+            try:
+                cls._update_scope_redis(scope, entries)
+                return
+            except redis.RedisError as e:
+                logger.warning(f"更新项目索引失败, 使用进程内索引: {str(e)}")
+
+        with cls._lock:
+            old_ids = cls._local_scopes.get(scope, set())
+            for checkin_id in old_ids - set(entries):
+                # 项目可能已移动到其他范围, 只删除仍属于本范围的条目
+                if cls._local_projects.get(checkin_id, {}).get('_scope') == scope:
+                    cls._local_projects.pop(checkin_id, None)
+            cls._local_projects.update(entries)
+            cls._local_scopes[scope] = set(entries)
+            cls._local_meta[scope] = datetime.now().isoformat()
+
+    @classmethod
+    def _update_scope_redis(cls, scope, entries):
+        """在Redis中更新某个范围的索引"""
+        client = CacheService.get_client()
+        index_key = CacheKeys.projects_index()
+        scope_key = CacheKeys.projects_index_scope(scope)
+
+        old_ids = set(client.smembers(scope_key))
+        removed_ids = list(old_ids - set(entries))
+
+        stale_ids = []
+        if removed_ids:
+            for checkin_id, raw in zip(removed_ids, client.hmget(index_key, removed_ids)):
+                if raw and json.loads(raw).get('_scope') == scope:
+                    stale_ids.append(checkin_id)
+
+        # 索引的各个键共用{projects}哈希标签; 集群模式的pipeline不支持事务
+        pipe = client.pipeline(transaction=not CacheService.is_cluster())
+        if stale_ids:
+            pipe.hdel(index_key, *stale_ids)
+        if entries:
+            pipe.hset(index_key, mapping={
+                checkin_id: json.dumps(project, ensure_ascii=False)
+                for checkin_id, project in entries.items()
+            })
+        pipe.delete(scope_key)
+        if entries:
+            pipe.sadd(scope_key, *entries.keys())
+        pipe.hset(CacheKeys.projects_index_meta(), scope, datetime.now().isoformat())
+        pipe.execute()
+
+    @classmethod
+    def get(cls, checkin_id):
+        """
+        按checkin_id查找项目(O(1))
+
+        Args:
+            checkin_id: 项目ID
+
+        Returns:
+            dict: 原始项目数据, 不存在返回None
+        """
+        checkin_id = str(checkin_id)
+
+        if cls._use_redis():
+            try:
+                raw = CacheService.get_client().hget(CacheKeys.projects_index(), checkin_id)
+                return cls._strip(json.loads(raw)) if raw else None
+            except redis.RedisError as e:
+                logger.warning(f"读取项目索引失败: {str(e)}")
+
+        project = cls._local_projects.get(checkin_id)
+        return cls._strip(project) if project else None
+
+    @classmethod
+    def get_by_scope(cls, scope):
+        """
+        获取某个范围内的所有项目
+
+        Args:
+            scope: 项目范围
+
+        Returns:
+            list: 原始项目列表, 该范围尚未建立索引时返回None
+        """
+        if not cls.is_scope_indexed(scope):
+            return None
+
+        if cls._use_redis():
+            try:
+                client = CacheService.get_client()
+                ids = list(client.smembers(CacheKeys.projects_index_scope(scope)))
+                if not ids:
+                    return []
+                raws = client.hmget(CacheKeys.projects_index(), ids)
+                return [cls._strip(json.loads(raw)) for raw in raws if raw]
+            except redis.RedisError as e:
+                logger.warning(f"读取项目索引失败: {str(e)}")
+
+        with cls._lock:
+            return [
+                cls._strip(cls._local_projects[checkin_id])
+                for checkin_id in cls._local_scopes.get(scope, set())
+                if checkin_id in cls._local_projects
+            ]
+
+    @classmethod
+    def get_indexed_scopes(cls):
+        """
+        获取已建立索引的范围
+
+        Returns:
+            dict: scope -> 最近一次建立索引的时间
+        """
+        if cls._use_redis():
+            try:
+                return CacheService.get_client().hgetall(CacheKeys.projects_index_meta())
+            except redis.RedisError as e:
+                logger.warning(f"读取项目索引失败: {str(e)}")
+        return dict(cls._local_meta)
+
+    @classmethod
+    def is_scope_indexed(cls, scope):
+        """范围是否已建立索引"""
+        return scope in cls.get_indexed_scopes()
+
+    @classmethod
+    def is_complete(cls):
+        """三个范围是否都已建立索引"""
+        indexed = cls.get_indexed_scopes()
+        return all(scope in indexed for scope in SCOPES)
+
+    @staticmethod
+    def _strip(project):
+        """去掉索引内部字段"""
+        return {key: value for key, value in project.items() if key != '_scope'}
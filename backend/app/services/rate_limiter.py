@@ -0,0 +1,328 @@
+"""
+上游API限流模块
+基于Redis的分布式令牌桶, 所有worker和节点共享同一份调用预算
+"""
+import logging
+import threading
+import time
+import redis
+from ..utils.metrics import Metrics
+from .cache_service import CacheService, CacheKeys
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """上游调用预算耗尽"""
+    def __init__(self, endpoint_name, wait):
+        super().__init__(f"上游调用预算耗尽: {endpoint_name}, 需等待 {wait:.2f} 秒")
+        self.endpoint_name = endpoint_name
+        self.wait = wait
+
+
+# 令牌桶脚本: 预约一个令牌并返回需要等待的时间
+# 令牌数允许为负(表示已被预约), 等待时间超过上限时不扣减令牌
+# KEYS[1]: 令牌桶hash  KEYS[2]: 速率系数
+# ARGV: rate, burst, max_wait_ms, recover_step, factor_ttl
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local recover_step = tonumber(ARGV[4])
+local factor_ttl = tonumber(ARGV[5])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local factor = tonumber(redis.call('GET', KEYS[2]) or '1')
+local effective_rate = rate * factor
+
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1])
+local ts = tonumber(data[2])
+if tokens == nil or ts == nil then
+    tokens = burst
+    ts = now
+end
+
+tokens = math.min(burst, tokens + math.max(now - ts, 0) / 1000 * effective_rate)
+
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / effective_rate * 1000
+end
+
+local granted = 1
+if wait > max_wait then
+    granted = 0
+else
+    tokens = tokens - 1
+    -- 成功放行时逐步恢复被429压低的速率
+    if factor < 1 then
+        factor = math.min(1, factor + recover_step)
+        if factor >= 1 then
+            redis.call('DEL', KEYS[2])
+        else
+            redis.call('SET', KEYS[2], tostring(factor), 'EX', factor_ttl)
+        end
+    end
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / effective_rate * 1000) + max_wait + 1000)
+
+return {granted, tostring(tokens), tostring(wait), tostring(factor)}
+"""
+
+# 收到429时: 压低速率系数并清空令牌桶
+# KEYS[1]: 令牌桶hash  KEYS[2]: 速率系数
+# ARGV: decrease_factor, min_factor, factor_ttl
+THROTTLED_SCRIPT = """
+local factor = tonumber(redis.call('GET', KEYS[2]) or '1')
+factor = math.max(tonumber(ARGV[2]), factor * tonumber(ARGV[1]))
+redis.call('SET', KEYS[2], tostring(factor), 'EX', tonumber(ARGV[3]))
+redis.call('HSET', KEYS[1], 'tokens', '0')
+return tostring(factor)
+"""
+
+
+class UpstreamRateLimiter:
+    """
+    上游API令牌桶限流器
+
+    每次调用知识星球API前按端点申请令牌; Redis不可用时退化为进程内令牌桶。
+    收到429后按乘性递减压低共享速率, 之后每次成功放行按加性递增恢复。
+    """
+
+    _lock = threading.Lock()
+    _scripts = {}
+    _local_buckets = {}
+    _stats = {}
+
+    @classmethod
+    def _get_budget(cls, endpoint_name, config):
+        """
+        获取端点的速率与突发容量
+
+        Args:
+            endpoint_name: 逻辑端点名
+            config: 限流配置
+
+        Returns:
+            tuple: (每秒速率, 突发容量)
+        """
+        endpoint_config = config.get('endpoints', {}).get(endpoint_name, {})
+        rate = float(endpoint_config.get('rate', config.get('rate', 5)))
+        burst = float(endpoint_config.get('burst', config.get('burst', 10)))
+        return max(rate, 0.001), max(burst, 1.0)
+
+    @classmethod
+    def _get_stats_entry(cls, endpoint_name):
+        """获取端点的统计条目"""
+        entry = cls._stats.get(endpoint_name)
+        if entry is None:
+            with cls._lock:
+                entry = cls._stats.setdefault(endpoint_name, {
+                    'acquired': 0,
+                    'throttled': 0,
+                    'rejected': 0,
+                    'upstream_429': 0,
+                    'wait_seconds_total': 0.0,
+                    'wait_seconds_max': 0.0,
+                    'tokens': None,
+                    'rate_factor': 1.0,
+                    'backend': None
+                })
+        return entry
+
+    @classmethod
+    def _get_script(cls, redis_client, name, source):
+        """获取已注册的Lua脚本(按客户端缓存)"""
+        cache_key = (id(redis_client), name)
+        script = cls._scripts.get(cache_key)
+        if script is None:
+            script = redis_client.register_script(source)
+            cls._scripts[cache_key] = script
+        return script
+
+    @classmethod
+    def _keys(cls, endpoint_name):
+        """构建令牌桶与速率系数的缓存键(同一哈希标签, 集群模式下脚本访问的两个键在同一槽位)"""
+        tag = CacheKeys.hash_tag(f'ratelimit:{endpoint_name}')
+        return [
+            CacheService.build_key(tag, 'bucket'),
+            CacheService.build_key(tag, 'factor')
+        ]
+
+    @classmethod
+    def _reserve_local(cls, endpoint_name, rate, burst, max_wait, config):
+        """
+        进程内令牌桶(Redis不可用时使用)
+
+        Returns:
+            tuple: (是否放行, 剩余令牌, 等待秒数, 速率系数)
+        """
+        now = time.monotonic()
+        with cls._lock:
+            bucket = cls._local_buckets.setdefault(endpoint_name, {
+                'tokens': burst,
+                'ts': now,
+                'factor': 1.0,
+                'factor_expire': 0
+            })
+
+            if bucket['factor'] < 1 and now > bucket['factor_expire']:
+                bucket['factor'] = 1.0
+
+            effective_rate = rate * bucket['factor']
+            tokens = min(burst, bucket['tokens'] + (now - bucket['ts']) * effective_rate)
+            wait = (1 - tokens) / effective_rate if tokens < 1 else 0.0
+
+            granted = wait <= max_wait
+            if granted:
+                tokens -= 1
+                if bucket['factor'] < 1:
+                    bucket['factor'] = min(1.0, bucket['factor'] + config.get('recover_step', 0.02))
+
+            bucket['tokens'] = tokens
+            bucket['ts'] = now
+            return granted, tokens, wait, bucket['factor']
+
+    @staticmethod
+    def get_max_wait(config, call_class='background'):
+        """
+        获取调用类别可接受的最长等待时间
+
+        用户请求在请求线程中等待会占住worker, 只等待interactive_max_wait;
+        定时任务与后台刷新等待max_wait。
+
+        Args:
+            config: 限流配置
+            call_class: 调用类别 (interactive|background)
+
+        Returns:
+            float: 最长等待秒数
+        """
+        if call_class == 'interactive':
+            return float(config.get('interactive_max_wait', 0.5))
+        return float(config.get('max_wait', 5))
+
+    @classmethod
+    def acquire(cls, endpoint_name, config, call_class='background'):
+        """
+        申请一次上游调用的令牌, 必要时阻塞等待
+
+        Args:
+            endpoint_name: 逻辑端点名
+            config: 限流配置 (知识星球.rate_limit)
+            call_class: 调用类别 (interactive|background), 决定最长等待时间
+
+        Returns:
+            float: 实际等待的秒数
+
+        Raises:
+            RateLimitExceeded: 等待时间超过该调用类别的最长等待时间
+        """
+        if not config.get('enabled', True):
+            return 0.0
+
+        rate, burst = cls._get_budget(endpoint_name, config)
+        max_wait = cls.get_max_wait(config, call_class)
+        entry = cls._get_stats_entry(endpoint_name)
+
+        redis_client = CacheService.get_client()
+        granted = None
+        if redis_client is not None:
+            try:
+                script = cls._get_script(redis_client, 'reserve', TOKEN_BUCKET_SCRIPT)
+                result = script(
+                    keys=cls._keys(endpoint_name),
+                    args=[rate, burst, int(max_wait * 1000),
+                          config.get('recover_step', 0.02), config.get('factor_ttl', 600)]
+                )
+                granted = int(result[0]) == 1
+                tokens = float(result[1])
+                wait = float(result[2]) / 1000
+                factor = float(result[3])
+                entry['backend'] = 'redis'
+            except redis.RedisError as e:
+                logger.warning(f"Redis限流不可用, 使用进程内限流: {str(e)}")
+
+        if granted is None:
+            granted, tokens, wait, factor = cls._reserve_local(endpoint_name, rate, burst, max_wait, config)
+            entry['backend'] = 'local'
+
+        entry['tokens'] = round(tokens, 3)
+        entry['rate_factor'] = round(factor, 3)
+        Metrics.set('zsxq_ratelimit_tokens', entry['tokens'], endpoint=endpoint_name)
+        Metrics.set('zsxq_ratelimit_rate_factor', entry['rate_factor'], endpoint=endpoint_name)
+
+        if not granted:
+            entry['rejected'] += 1
+            Metrics.inc('zsxq_ratelimit_requests_total', endpoint=endpoint_name, result='rejected')
+            raise RateLimitExceeded(endpoint_name, wait)
+
+        entry['acquired'] += 1
+        if wait > 0:
+            entry['throttled'] += 1
+            entry['wait_seconds_total'] += wait
+            entry['wait_seconds_max'] = max(entry['wait_seconds_max'], wait)
+            Metrics.inc('zsxq_ratelimit_requests_total', endpoint=endpoint_name, result='throttled')
+            Metrics.observe('zsxq_ratelimit_wait_seconds', wait, endpoint=endpoint_name)
+            time.sleep(wait)
+        else:
+            Metrics.inc('zsxq_ratelimit_requests_total', endpoint=endpoint_name, result='immediate')
+
+        return wait
+
+    @classmethod
+    def record_throttled(cls, endpoint_name, config):
+        """
+        上游返回429时压低该端点的共享速率
+
+        Args:
+            endpoint_name: 逻辑端点名
+            config: 限流配置
+        """
+        if not config.get('enabled', True):
+            return
+
+        entry = cls._get_stats_entry(endpoint_name)
+        entry['upstream_429'] += 1
+        Metrics.inc('zsxq_ratelimit_upstream_throttled_total', endpoint=endpoint_name)
+
+        decrease = float(config.get('decrease_factor', 0.5))
+        min_factor = float(config.get('min_factor', 0.1))
+        factor_ttl = int(config.get('factor_ttl', 600))
+
+        redis_client = CacheService.get_client()
+        if redis_client is not None:
+            try:
+                script = cls._get_script(redis_client, 'throttled', THROTTLED_SCRIPT)
+                factor = float(script(keys=cls._keys(endpoint_name), args=[decrease, min_factor, factor_ttl]))
+                entry['rate_factor'] = round(factor, 3)
+                Metrics.set('zsxq_ratelimit_rate_factor', entry['rate_factor'], endpoint=endpoint_name)
+                logger.warning(f"上游限流 {endpoint_name}: 速率系数降至 {factor:.3f}")
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Redis限流不可用, 使用进程内限流: {str(e)}")
+
+        with cls._lock:
+            bucket = cls._local_buckets.get(endpoint_name)
+            if bucket is not None:
+                bucket['factor'] = max(min_factor, bucket['factor'] * decrease)
+                bucket['factor_expire'] = time.monotonic() + factor_ttl
+                bucket['tokens'] = 0.0
+                entry['rate_factor'] = round(bucket['factor'], 3)
+                Metrics.set('zsxq_ratelimit_rate_factor', entry['rate_factor'], endpoint=endpoint_name)
+        logger.warning(f"上游限流 {endpoint_name}: 速率系数降至 {entry['rate_factor']:.3f}")
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取限流统计
+
+        Returns:
+            dict: 端点名 -> 统计信息(令牌余量、速率系数、等待时间等)
+        """
+        return {name: dict(entry) for name, entry in cls._stats.items()}
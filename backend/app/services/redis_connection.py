@@ -0,0 +1,134 @@
+"""
+Redis连接模块
+按配置创建单机、Sentinel或Cluster模式的客户端, 缓存读取可路由到副本
+"""
+import logging
+from collections import namedtuple
+import redis
+from redis.cluster import RedisCluster, ClusterNode
+from redis.exceptions import RedisClusterException
+from redis.sentinel import Sentinel
+
+logger = logging.getLogger(__name__)
+
+MODE_STANDALONE = 'standalone'
+MODE_SENTINEL = 'sentinel'
+MODE_CLUSTER = 'cluster'
+
+# primary: 主节点客户端(解码为字符串, 用于锁、标签、索引与发布订阅)
+# value: 主节点二进制客户端(写入缓存值)
+# read: 读取缓存值的二进制客户端(启用副本读取时指向副本, 否则与value相同)
+RedisClients = namedtuple('RedisClients', ['primary', 'value', 'read', 'mode'])
+
+# 建立连接可能抛出的异常(集群拓扑错误不是RedisError的子类)
+CONNECTION_ERRORS = (redis.RedisError, RedisClusterException)
+
+
+def parse_nodes(nodes, default_port):
+    """
+    解析节点列表
+
+    Args:
+        nodes: "host:port" 字符串或 [host, port] 列表组成的列表
+        default_port: 未指定端口时使用的端口
+
+    Returns:
+        list: (host, port) 列表
+    """
+    parsed = []
+    for node in nodes or []:
+        if isinstance(node, str):
+            host, separator, port = node.rpartition(':')
+            parsed.append((host, int(port)) if separator else (node, default_port))
+        else:
+            parsed.append((node[0], int(node[1]) if len(node) > 1 else default_port))
+    return parsed
+
+
+def create_redis_clients(redis_config):
+    """
+    按配置创建Redis客户端
+
+    Args:
+        redis_config: Redis配置 (缓存配置.redis)
+
+    Returns:
+        RedisClients: 客户端集合; 单机与Sentinel模式在首次使用时建立连接,
+                      Cluster模式创建时即读取集群拓扑
+
+    Raises:
+        ValueError: 模式未知或缺少节点配置
+        RedisClusterException: Cluster模式无法读取集群拓扑
+    """
+    mode = redis_config.get('mode', MODE_STANDALONE)
+    read_from_replicas = bool(redis_config.get('read_from_replicas', False))
+    connection_kwargs = dict(
+        password=redis_config.get('password', None),
+        socket_timeout=5,
+        socket_connect_timeout=redis_config.get('connect_timeout', 5)
+    )
+
+    if mode == MODE_STANDALONE:
+        connection_kwargs.update(
+            host=redis_config.get('host', 'localhost'),
+            port=redis_config.get('port', 6379),
+            db=redis_config.get('db', 0)
+        )
+        value_client = redis.Redis(decode_responses=False, **connection_kwargs)
+        return RedisClients(
+            primary=redis.Redis(decode_responses=True, **connection_kwargs),
+            value=value_client,
+            read=value_client,
+            mode=mode
+        )
+
+    if mode == MODE_SENTINEL:
+        sentinel_config = redis_config.get('sentinel', {})
+        nodes = parse_nodes(sentinel_config.get('nodes'), 26379)
+        if not nodes:
+            raise ValueError("sentinel模式需要配置 缓存配置.redis.sentinel.nodes")
+        service_name = sentinel_config.get('service_name', 'mymaster')
+        sentinel = Sentinel(
+            nodes,
+            sentinel_kwargs={
+                'password': sentinel_config.get('password'),
+                'socket_timeout': connection_kwargs['socket_timeout'],
+                'socket_connect_timeout': connection_kwargs['socket_connect_timeout']
+            },
+            db=redis_config.get('db', 0),
+            **connection_kwargs
+        )
+        value_client = sentinel.master_for(service_name, decode_responses=False)
+        return RedisClients(
+            primary=sentinel.master_for(service_name, decode_responses=True),
+            value=value_client,
+            # 没有可用的从节点时自动回退到主节点
+            read=sentinel.slave_for(service_name, decode_responses=False) if read_from_replicas else value_client,
+            mode=mode
+        )
+
+    if mode == MODE_CLUSTER:
+        cluster_config = redis_config.get('cluster', {})
+        nodes = parse_nodes(cluster_config.get('nodes'), 6379)
+        if not nodes:
+            raise ValueError("cluster模式需要配置 缓存配置.redis.cluster.nodes")
+        if redis_config.get('db', 0):
+            logger.warning("cluster模式只支持db 0, 已忽略 缓存配置.redis.db")
+
+        def cluster_client(decode_responses, replicas=False):
+            return RedisCluster(
+                startup_nodes=[ClusterNode(host, port) for host, port in nodes],
+                decode_responses=decode_responses,
+                read_from_replicas=replicas,
+                **connection_kwargs
+            )
+
+        value_client = cluster_client(False)
+        return RedisClients(
+            primary=cluster_client(True),
+            value=value_client,
+            read=cluster_client(False, replicas=True) if read_from_replicas else value_client,
+            mode=mode
+        )
+
+    raise ValueError(f"未知的Redis部署模式: {mode}")
@@ -0,0 +1,118 @@
+"""
+后台刷新模块
+缓存过了软过期时间后先返回旧数据, 由后台线程刷新(同一缓存键同一时间只刷新一次)
+"""
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import redis
+from .cache_service import CacheService, CacheKeys
+from .single_flight import RELEASE_LOCK_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+
+class Revalidator:
+    """
+    stale-while-revalidate的后台刷新
+
+    进程内: 同一缓存键已在刷新中时不再提交。
+    跨进程: 提交前在Redis上抢占短期锁, 只有抢到锁的worker执行刷新。
+    """
+
+    _lock = threading.Lock()
+    _executor = None
+    _executor_pid = None
+    _pending = set()
+    _stats = {'triggered': 0, 'skipped': 0, 'succeeded': 0, 'failed': 0}
+
+    @classmethod
+    def _get_executor(cls, max_workers):
+        """获取本进程的刷新线程池(fork后重新创建)"""
+        with cls._lock:
+            if cls._executor is None or cls._executor_pid != os.getpid():
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=max(int(max_workers), 1),
+                    thread_name_prefix='cache-revalidate'
+                )
+                cls._executor_pid = os.getpid()
+                cls._pending = set()
+            return cls._executor
+
+    @classmethod
+    def submit(cls, app, cache_key, func, config):
+        """
+        提交一次后台刷新
+
+        Args:
+            app: Flask应用实例(非current_app代理)
+            cache_key: 缓存键
+            func: 刷新函数, 在应用上下文中执行
+            config: 配置 (缓存配置.stale_while_revalidate)
+
+        Returns:
+            bool: 是否已提交(同一键已在刷新中时返回False)
+        """
+        executor = cls._get_executor(config.get('max_workers', 4))
+
+        with cls._lock:
+            if cache_key in cls._pending:
+                cls._stats['skipped'] += 1
+                return False
+            cls._pending.add(cache_key)
+
+        lock_key = CacheKeys.revalidate_lock(cache_key)
+        token = uuid.uuid4().hex
+        client = CacheService.get_client()
+        if client is not None:
+            try:
+                if not client.set(lock_key, token, nx=True, ex=int(config.get('lock_ttl', 30))):
+                    # 其他worker正在刷新
+                    cls._finish(cache_key)
+                    cls._stats['skipped'] += 1
+                    return False
+            except redis.RedisError as e:
+                logger.warning(f"获取刷新锁失败, 在本进程刷新 {cache_key}: {str(e)}")
+
+        cls._stats['triggered'] += 1
+        executor.submit(cls._run, app, cache_key, func, lock_key, token)
+        return True
+
+    @classmethod
+    def _run(cls, app, cache_key, func, lock_key, token):
+        try:
+            with app.app_context():
+                func()
+            cls._stats['succeeded'] += 1
+            logger.debug(f"后台刷新完成: {cache_key}")
+        except Exception as e:
+            cls._stats['failed'] += 1
+            logger.warning(f"后台刷新失败 {cache_key}: {str(e)}")
+        finally:
+            cls._finish(cache_key)
+            client = CacheService.get_client()
+            if client is not None:
+                try:
+                    client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except redis.RedisError:
+                    pass
+
+    @classmethod
+    def _finish(cls, cache_key):
+        with cls._lock:
+            cls._pending.discard(cache_key)
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取后台刷新统计
+
+        Returns:
+            dict: 提交、跳过(已在刷新中)、成功与失败次数, 以及进行中的刷新数
+        """
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['in_flight'] = len(cls._pending)
+        return stats
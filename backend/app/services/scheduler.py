@@ -127,7 +127,7 @@ class CacheScheduler:
                         cache_key = CacheKeys.projects_list(scope)
                         CacheService.delete(cache_key)
 
-                        # 重新获取并缓存
+                        # 重新获取并缓存(同时更新项目索引)
                         service.get_projects(scope=scope)
                         cls._app.logger.debug(f"刷新 {scope} 项目列表成功")
                     except Exception as e:
@@ -147,24 +147,16 @@ class CacheScheduler:
                 service = ZSXQService(cls._app)
 
                 # 获取所有进行中的项目
-                projects = service.get_projects(scope='ongoing')
+                project_ids = service.get_project_ids(scope='ongoing')
 
-                for project in projects:
-                    project_id = project['project_id']
-
-                    for leaderboard_type in ['continuous', 'accumulated']:
-                        try:
-                            # 先删除缓存
-                            cache_key = CacheKeys.project_leaderboard(project_id, leaderboard_type)
-                            CacheService.delete(cache_key)
-
-                            # 重新获取并缓存
-                            service.get_leaderboard(project_id, leaderboard_type=leaderboard_type, limit=100)
-                            cls._app.logger.debug(f"刷新项目 {project_id} {leaderboard_type} 排行榜成功")
-                        except Exception as e:
-                            cls._app.logger.error(
-                                f"刷新项目 {project_id} {leaderboard_type} 排行榜失败: {str(e)}"
-                            )
+                for leaderboard_type in ['continuous', 'accumulated']:
+                    # 并发获取所有项目的完整排行榜并覆盖缓存
+                    result = service.refresh_many(
+                        'leaderboard',
+                        project_ids,
+                        leaderboard_type=leaderboard_type
+                    )
+                    cls._log_refresh_result(f"{leaderboard_type} 排行榜", result)
 
                 cls._app.logger.info("排行榜刷新完成")
 
@@ -180,20 +172,10 @@ class CacheScheduler:
                 service = ZSXQService(cls._app)
 
                 # 获取所有进行中的项目
-                projects = service.get_projects(scope='ongoing')
-
-                for project in projects:
-                    project_id = project['project_id']
-                    try:
-                        # 先删除缓存
-                        cache_key = CacheKeys.project_stats(project_id)
-                        CacheService.delete(cache_key)
+                project_ids = service.get_project_ids(scope='ongoing')
 
-                        # 重新获取并缓存
-                        service.get_project_stats(project_id)
-                        cls._app.logger.debug(f"刷新项目 {project_id} 统计成功")
-                    except Exception as e:
-                        cls._app.logger.error(f"刷新项目 {project_id} 统计失败: {str(e)}")
+                result = service.refresh_many('stats', project_ids)
+                cls._log_refresh_result("统计", result)
 
                 cls._app.logger.info("项目统计刷新完成")
 
@@ -209,20 +191,10 @@ class CacheScheduler:
                 service = ZSXQService(cls._app)
 
                 # 获取所有进行中的项目
-                projects = service.get_projects(scope='ongoing')
-
-                for project in projects:
-                    project_id = project['project_id']
-                    try:
-                        # 先删除缓存
-                        cache_key = CacheKeys.project_daily_stats(project_id)
-                        CacheService.delete(cache_key)
+                project_ids = service.get_project_ids(scope='ongoing')
 
-                        # 重新获取并缓存
-                        service.get_daily_stats(project_id)
-                        cls._app.logger.debug(f"刷新项目 {project_id} 每日统计成功")
-                    except Exception as e:
-                        cls._app.logger.error(f"刷新项目 {project_id} 每日统计失败: {str(e)}")
+                result = service.refresh_many('daily_stats', project_ids)
+                cls._log_refresh_result("每日统计", result)
 
                 cls._app.logger.info("每日统计刷新完成")
 
@@ -238,26 +210,29 @@ class CacheScheduler:
                 service = ZSXQService(cls._app)
 
                 # 获取所有进行中的项目
-                projects = service.get_projects(scope='ongoing')
+                project_ids = service.get_project_ids(scope='ongoing')
 
-                for project in projects:
-                    project_id = project['project_id']
-                    try:
-                        # 先删除缓存
-                        cache_key = CacheKeys.project_topics(project_id)
-                        CacheService.delete(cache_key)
-
-                        # 重新获取并缓存
-                        service.get_topics(project_id, count=20)
-                        cls._app.logger.debug(f"刷新项目 {project_id} 话题列表成功")
-                    except Exception as e:
-                        cls._app.logger.error(f"刷新项目 {project_id} 话题列表失败: {str(e)}")
+                result = service.refresh_many('topics', project_ids, count=20)
+                cls._log_refresh_result("话题列表", result)
 
                 cls._app.logger.info("话题列表刷新完成")
 
             except Exception as e:
                 cls._app.logger.error(f"刷新话题列表异常: {str(e)}", exc_info=True)
 
+    @classmethod
+    def _log_refresh_result(cls, name, result):
+        """
+        记录批量刷新结果
+
+        Args:
+            name: 数据名称
+            result: ZSXQService.refresh_many 返回的统计
+        """
+        cls._app.logger.debug(f"刷新项目{name}: 成功 {result['success']} 个, 失败 {result['failed']} 个")
+        for error in result['errors']:
+            cls._app.logger.error(f"刷新项目{name}失败: {error}")
+
     @classmethod
     def shutdown(cls):
         """关闭调度器"""
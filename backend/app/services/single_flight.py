@@ -0,0 +1,200 @@
+"""
+请求合并(single-flight)模块
+同一缓存键的并发未命中只向上游发起一次请求, 其余调用者等待并共享结果
+"""
+import logging
+import threading
+import time
+import uuid
+import redis
+from ..utils.metrics import Metrics
+from .cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+
+# 仅当锁仍由自己持有时才释放
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    """一次进行中的上游调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    请求合并
+
+    进程内: 同一键的并发调用由第一个线程执行, 其余线程等待共享结果。
+    跨进程(可选): 执行者先在Redis上抢占锁, 抢不到的worker轮询缓存等待结果,
+    超时后再自行获取; on_contention为stale时抢不到锁的worker直接返回兜底副本(无副本时仍等待)。
+    """
+
+    _calls = {}
+    _lock = threading.Lock()
+    _release_script = None
+    _stats = {
+        'executed': 0,
+        'coalesced': 0,
+        'distributed_coalesced': 0,
+        'distributed_timeouts': 0,
+        'stale_served': 0
+    }
+
+    @classmethod
+    def do(cls, key, func, config, cache_reader=None, stale_reader=None):
+        """
+        执行或加入同一键的调用
+
+        Args:
+            key: 合并键(缓存键, 已包含端点与参数)
+            func: 实际执行的函数
+            config: 合并配置 (缓存配置.single_flight, 可被数据类型的stampede配置覆盖)
+            cache_reader: 跨进程合并时读取结果的函数, 返回None表示尚无结果
+            stale_reader: 其他worker持锁时读取兜底副本的函数(on_contention为stale时使用), 返回None表示无副本
+
+        Returns:
+            func的返回值(所有等待者共享同一结果)
+
+        Raises:
+            func抛出的异常(同样传递给所有等待者)
+        """
+        if not config.get('enabled', True):
+            return func()
+
+        with cls._lock:
+            call = cls._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                is_leader = False
+            else:
+                call = _Call()
+                cls._calls[key] = call
+                is_leader = True
+
+        if not is_leader:
+            call.event.wait()
+            cls._stats['coalesced'] += 1
+            Metrics.inc('zsxq_singleflight_coalesced_total', scope='local')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = cls._execute(key, func, config, cache_reader, stale_reader)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with cls._lock:
+                cls._calls.pop(key, None)
+            call.event.set()
+
+    @classmethod
+    def _execute(cls, key, func, config, cache_reader, stale_reader=None):
+        """执行调用, 按需在Redis上与其他worker合并"""
+        redis_client = CacheService.get_client()
+        if not config.get('distributed', False) or redis_client is None or cache_reader is None:
+            cls._stats['executed'] += 1
+            Metrics.inc('zsxq_singleflight_executed_total')
+            return func()
+
+        lock_key = f"{key}:flight"
+        token = uuid.uuid4().hex
+        lock_ttl_ms = int(float(config.get('lock_ttl', 15)) * 1000)
+
+        try:
+            acquired = redis_client.set(lock_key, token, nx=True, px=lock_ttl_ms)
+        except redis.RedisError as e:
+            logger.warning(f"获取合并锁失败, 直接请求上游: {str(e)}")
+            cls._stats['executed'] += 1
+            Metrics.inc('zsxq_singleflight_executed_total')
+            return func()
+
+        if acquired:
+            try:
+                cls._stats['executed'] += 1
+                Metrics.inc('zsxq_singleflight_executed_total')
+                return func()
+            finally:
+                cls._release(redis_client, lock_key, token)
+
+        # 其他worker正在获取: 有兜底副本时直接返回, 否则轮询缓存等待结果
+        if config.get('on_contention') == 'stale' and stale_reader is not None:
+            result = stale_reader()
+            if result is not None:
+                cls._stats['stale_served'] += 1
+                return result
+
+        result = cls._wait_for_result(redis_client, lock_key, config, cache_reader)
+        if result is not None:
+            cls._stats['distributed_coalesced'] += 1
+            Metrics.inc('zsxq_singleflight_coalesced_total', scope='distributed')
+            return result
+
+        cls._stats['distributed_timeouts'] += 1
+        cls._stats['executed'] += 1
+        Metrics.inc('zsxq_singleflight_executed_total')
+        return func()
+
+    @classmethod
+    def _wait_for_result(cls, redis_client, lock_key, config, cache_reader):
+        """
+        等待其他worker写入缓存
+
+        Returns:
+            缓存结果, 超时或对方失败(锁已释放但无结果)时返回None
+        """
+        deadline = time.monotonic() + float(config.get('wait_timeout', 10))
+        poll_interval = float(config.get('poll_interval', 0.05))
+
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+
+            result = cache_reader()
+            if result is not None:
+                return result
+
+            try:
+                if not redis_client.exists(lock_key):
+                    # 持锁方已结束但没有写入结果, 再读一次以防竞争
+                    return cache_reader()
+            except redis.RedisError:
+                return None
+
+        return None
+
+    @classmethod
+    def _release(cls, redis_client, lock_key, token):
+        """释放合并锁"""
+        try:
+            if cls._release_script is None:
+                cls._release_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+            cls._release_script(keys=[lock_key], args=[token], client=redis_client)
+        except redis.RedisError as e:
+            logger.warning(f"释放合并锁失败 {lock_key}: {str(e)}")
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取合并统计
+
+        Returns:
+            dict: executed为实际上游调用次数, coalesced/distributed_coalesced为被合并(节省)的调用次数,
+                  stale_served为其他worker持锁时直接返回兜底副本的次数
+        """
+        stats = dict(cls._stats)
+        stats['in_flight'] = len(cls._calls)
+        return stats
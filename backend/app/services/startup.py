@@ -0,0 +1,149 @@
+"""
+应用启动模块
+Redis连接、定时任务调度器与缓存预热可以在后台线程中完成, 应用无需等待即可开始处理请求
+"""
+import threading
+import time
+from datetime import datetime
+
+STATE_PENDING = 'pending'
+STATE_RUNNING = 'running'
+STATE_READY = 'ready'
+STATE_FAILED = 'failed'
+STATE_SKIPPED = 'skipped'
+
+# 按启动顺序排列的组件
+COMPONENTS = ('redis', 'scheduler', 'warmup')
+
+
+class StartupManager:
+    """
+    启动过程管理
+
+    blocking: 在create_app中依次完成所有组件(原有行为)
+    background: create_app立即返回, 组件在后台线程中依次启动, 就绪状态由 /api/health/ready 报告
+    Redis尚未连接时请求直接访问上游(与Redis不可用时的降级模式相同)。
+    """
+
+    _lock = threading.Lock()
+    _components = {}
+    _mode = 'blocking'
+    _started_at = None
+    _thread = None
+
+    @classmethod
+    def start(cls, app, cache_config, startup_config):
+        """
+        启动缓存相关组件
+
+        Args:
+            app: Flask应用实例
+            cache_config: 缓存配置
+            startup_config: 启动配置 (系统配置.startup)
+        """
+        cls._mode = startup_config.get('mode', 'blocking')
+        cls._started_at = time.monotonic()
+        cls._components = {name: {'state': STATE_PENDING} for name in COMPONENTS}
+
+        if not cache_config.get('enabled', True):
+            for name in COMPONENTS:
+                cls._set_state(name, STATE_SKIPPED, '缓存未启用')
+            return
+
+        if cls._mode == 'background':
+            cls._thread = threading.Thread(
+                target=cls._run,
+                args=(app, cache_config, startup_config),
+                name='app-startup',
+                daemon=True
+            )
+            cls._thread.start()
+            app.logger.info("后台启动: Redis连接、定时任务与缓存预热将在后台完成")
+        else:
+            cls._run(app, cache_config, startup_config)
+
+    @classmethod
+    def _run(cls, app, cache_config, startup_config):
+        """依次启动各组件, 单个组件失败不影响后续组件"""
+        from .cache_service import init_cache
+        cls._step(app, 'redis', lambda: init_cache(app, cache_config))
+
+        from .scheduler import init_scheduler
+        cls._step(app, 'scheduler', lambda: init_scheduler(app))
+
+        if startup_config.get('warmup', False):
+            cls._step(app, 'warmup', lambda: cls._warmup(app))
+        else:
+            cls._set_state('warmup', STATE_SKIPPED, '未启用预热')
+
+        app.logger.info(f"启动完成, 耗时 {time.monotonic() - cls._started_at:.2f} 秒")
+
+    @classmethod
+    def _step(cls, app, name, func):
+        """
+        执行一个启动步骤并记录状态
+
+        func返回False表示失败(如Redis连接失败后进入降级模式)
+        """
+        cls._set_state(name, STATE_RUNNING)
+        started = time.monotonic()
+        try:
+            result = func()
+        except Exception as e:
+            app.logger.error(f"启动步骤 {name} 失败: {str(e)}", exc_info=True)
+            cls._set_state(name, STATE_FAILED, str(e), time.monotonic() - started)
+            return
+
+        if result is False:
+            cls._set_state(name, STATE_FAILED, '降级运行', time.monotonic() - started)
+        else:
+            cls._set_state(name, STATE_READY, None, time.monotonic() - started)
+
+    @classmethod
+    def _warmup(cls, app):
+        """预热项目列表缓存"""
+        from .zsxq_service import ZSXQService
+        with app.app_context():
+            stats = ZSXQService(app).refresh_all_cache()
+        return stats['failed'] == 0
+
+    @classmethod
+    def _set_state(cls, name, state, message=None, duration=None):
+        with cls._lock:
+            entry = {'state': state, 'updated_at': datetime.now().isoformat()}
+            if message:
+                entry['message'] = message
+            if duration is not None:
+                entry['duration'] = round(duration, 3)
+            cls._components[name] = entry
+
+    @classmethod
+    def is_ready(cls):
+        """
+        是否启动完成
+
+        Returns:
+            bool: 所有组件都已结束(就绪、跳过或失败后降级)
+        """
+        with cls._lock:
+            return all(
+                entry['state'] not in (STATE_PENDING, STATE_RUNNING)
+                for entry in cls._components.values()
+            )
+
+    @classmethod
+    def get_status(cls):
+        """
+        获取启动状态
+
+        Returns:
+            dict: 启动模式、是否就绪、已耗时及各组件状态
+        """
+        with cls._lock:
+            components = {name: dict(entry) for name, entry in cls._components.items()}
+        return {
+            'mode': cls._mode,
+            'ready': cls.is_ready(),
+            'uptime': round(time.monotonic() - cls._started_at, 3) if cls._started_at else None,
+            'components': components
+        }
@@ -0,0 +1,245 @@
+"""
+打卡话题历史抓取模块
+以时间游标向前翻页遍历项目的完整话题历史, 游标检查点保存在Redis中
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+import redis
+from .cache_service import CacheService, CacheKeys
+
+logger = logging.getLogger(__name__)
+
+# 知识星球时间格式, 如 2025-01-15T08:30:00.123+0800
+ZSXQ_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
+
+
+def parse_zsxq_time(value):
+    """
+    解析知识星球时间字符串
+
+    Args:
+        value: 时间字符串
+
+    Returns:
+        datetime: 带时区的时间, 无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, ZSXQ_TIME_FORMAT)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+
+def format_zsxq_time(dt):
+    """
+    格式化为知识星球时间字符串(毫秒精度)
+
+    Args:
+        dt: 带时区的时间
+
+    Returns:
+        str: 时间字符串
+    """
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}" + dt.strftime('%z')
+
+
+class TopicHistoryCrawler:
+    """
+    话题历史抓取器
+
+    从最新话题开始, 以上一页最后一条话题的创建时间作为end_time向前翻页,
+    逐条产出格式化后的话题。每处理完一页即把游标写入检查点:
+    - 中断后再次运行会从检查点继续(同一页可能重复产出, 即至少一次);
+    - 完整遍历后记录最新话题时间, 之后的运行只抓取该时间之后的新话题。
+    检查点直接以JSON保存在Redis中, 不登记项目标签, 清除项目缓存不会重置抓取进度;
+    Redis不可用时使用进程内字典。
+    """
+
+    _lock = threading.Lock()
+    _local_checkpoints = {}
+
+    def __init__(self, service, project_id, page_size=20, max_pages=None, checkpoint_ttl=None):
+        """
+        初始化抓取器
+
+        Args:
+            service: ZSXQService实例
+            project_id: 项目ID
+            page_size: 每页条数
+            max_pages: 本次运行最多抓取的页数,None表示不限制
+            checkpoint_ttl: 检查点保留时间(秒)
+        """
+        self.service = service
+        self.client = service.client
+        self.project_id = project_id
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.checkpoint_ttl = checkpoint_ttl or 30 * 86400
+        self.checkpoint_key = CacheKeys.project_topics_checkpoint(project_id)
+
+        self.pages_fetched = 0
+        self.topics_yielded = 0
+
+    def load_checkpoint(self):
+        """
+        读取检查点
+
+        Returns:
+            dict: 检查点, 不存在时返回None
+        """
+        client = CacheService.get_client()
+        if client is not None:
+            try:
+                raw = client.get(self.checkpoint_key)
+                return json.loads(raw) if raw else None
+            except ValueError:
+                # 旧版本经缓存值格式写入的检查点, 视为不存在
+                return None
+            except redis.RedisError as e:
+                logger.warning(f"读取话题抓取检查点失败: {str(e)}")
+
+        with self._lock:
+            checkpoint = self._local_checkpoints.get(self.checkpoint_key)
+        return dict(checkpoint) if checkpoint else None
+
+    def reset(self):
+        """删除检查点, 下次从头抓取"""
+        client = CacheService.get_client()
+        if client is not None:
+            try:
+                client.delete(self.checkpoint_key)
+            except redis.RedisError as e:
+                logger.warning(f"删除话题抓取检查点失败: {str(e)}")
+
+        with self._lock:
+            self._local_checkpoints.pop(self.checkpoint_key, None)
+
+    def _save_checkpoint(self, checkpoint):
+        """写入检查点"""
+        checkpoint['updated_at'] = datetime.now().isoformat()
+
+        client = CacheService.get_client()
+        if client is not None:
+            try:
+                client.set(self.checkpoint_key, json.dumps(checkpoint, ensure_ascii=False), ex=self.checkpoint_ttl)
+                return
+            except redis.RedisError as e:
+                logger.warning(f"写入话题抓取检查点失败, 使用进程内检查点: {str(e)}")
+
+        with self._lock:
+            self._local_checkpoints[self.checkpoint_key] = dict(checkpoint)
+
+    def _start_state(self):
+        """
+        根据检查点确定本次运行的起点
+
+        Returns:
+            dict: 本次运行的检查点状态
+        """
+        checkpoint = self.load_checkpoint()
+
+        if checkpoint and not checkpoint.get('complete'):
+            logger.info(
+                f"项目 {self.project_id} 话题抓取从检查点继续: "
+                f"end_time={checkpoint.get('cursor')}, 已抓取 {checkpoint.get('count', 0)} 条"
+            )
+            return checkpoint
+
+        # 新一轮: 已完整抓取过则只抓取上次最新话题之后的内容
+        checkpoint = checkpoint or {}
+        return {
+            'cursor': None,
+            'boundary_ids': [],
+            'stop_at': checkpoint.get('newest'),
+            'stop_ids': checkpoint.get('newest_ids', []),
+            'newest': checkpoint.get('newest'),
+            'newest_ids': checkpoint.get('newest_ids', []),
+            'pass_newest': None,
+            'pass_newest_ids': [],
+            'count': 0,
+            'complete': False
+        }
+
+    def _finish(self, state):
+        """标记本轮抓取完成"""
+        state['complete'] = True
+        if state.get('pass_newest'):
+            state['newest'] = state['pass_newest']
+            state['newest_ids'] = state['pass_newest_ids']
+        state['cursor'] = None
+        state['boundary_ids'] = []
+        self._save_checkpoint(state)
+        logger.info(f"项目 {self.project_id} 话题抓取完成, 本轮共 {state['count']} 条")
+
+    def __iter__(self):
+        state = self._start_state()
+        stop_at = parse_zsxq_time(state.get('stop_at'))
+        stop_ids = set(state.get('stop_ids', []))
+
+        while True:
+            if self.max_pages is not None and self.pages_fetched >= self.max_pages:
+                return
+
+            raw_data = self.client.get_topics(
+                self.project_id,
+                count=self.page_size,
+                end_time=state.get('cursor')
+            )
+            self.pages_fetched += 1
+
+            raw_topics = raw_data.get('topics', [])
+            boundary_ids = set(state.get('boundary_ids', []))
+            new_topics = [
+                t for t in raw_topics
+                if str(t.get('topic', {}).get('topic_id', '')) not in boundary_ids
+            ]
+
+            reached_known = False
+            for raw_topic in new_topics:
+                topic_id = str(raw_topic.get('topic', {}).get('topic_id', ''))
+                create_time = raw_topic.get('topic', {}).get('create_time', '')
+                created_dt = parse_zsxq_time(create_time)
+                if stop_at is not None and created_dt is not None:
+                    # 到达上一轮已抓取的范围(同一时刻的话题按ID区分)
+                    if created_dt < stop_at or (created_dt == stop_at and topic_id in stop_ids):
+                        reached_known = True
+                        break
+
+                if state.get('pass_newest') is None:
+                    state['pass_newest'] = create_time
+                if create_time == state['pass_newest']:
+                    state['pass_newest_ids'].append(topic_id)
+
+                state['count'] += 1
+                self.topics_yielded += 1
+                yield self.service._format_topic(raw_topic)
+
+            if reached_known or len(raw_topics) < self.page_size:
+                self._finish(state)
+                return
+
+            last_time = raw_topics[-1].get('topic', {}).get('create_time', '')
+            if not new_topics:
+                # 整页都与上一页边界重复(同一时刻话题过多), 游标前移1毫秒
+                last_dt = parse_zsxq_time(last_time)
+                if last_dt is None:
+                    self._finish(state)
+                    return
+                state['cursor'] = format_zsxq_time(last_dt - timedelta(milliseconds=1))
+                state['boundary_ids'] = []
+            else:
+                # 以最后一条的时间为游标, 同一时刻的话题记录ID用于去重
+                state['cursor'] = last_time
+                state['boundary_ids'] = [
+                    str(t.get('topic', {}).get('topic_id', ''))
+                    for t in raw_topics
+                    if t.get('topic', {}).get('create_time', '') == last_time
+                ]
+
+            self._save_checkpoint(state)
@@ -2,15 +2,41 @@
 知识星球业务服务层
 整合API客户端和缓存服务,提供统一的业务接口
 """
+import time
 from datetime import datetime
-from ..models.zsxq_client import ZSXQClient, ZSXQAPIError
+from ..models.zsxq_client import ZSXQClient, ZSXQAPIError, CircuitOpenError
+from ..models.async_zsxq_client import AsyncZSXQClient
 from .cache_service import CacheService, CacheKeys
-from flask import current_app
+from .single_flight import SingleFlight
+from .revalidator import Revalidator
+from .early_refresh import EarlyRefresh
+from .project_index import ProjectIndex, SCOPES
+from .topic_crawler import TopicHistoryCrawler
+from ..utils.response import mark_stale, mark_cached_at
+from ..utils.config_loader import get_leaderboard_config
+from flask import current_app, has_request_context
+
+
+class _Uncached:
+    """数据获取函数返回的不写入缓存的结果(如请求中只获取了前几页的排行榜)"""
+
+    def __init__(self, data):
+        self.data = data
 
 
 class ZSXQService:
     """知识星球业务服务类"""
 
+    # 各类数据的默认缓存过期时间(秒), 可通过 缓存配置.ttl 覆盖
+    CACHE_TTL = {
+        'projects': 7200,     # 2小时
+        'info': 7200,         # 2小时
+        'stats': 3600,        # 1小时
+        'daily_stats': 1800,  # 30分钟
+        'leaderboard': 3600,  # 1小时
+        'topics': 600         # 10分钟
+    }
+
     def __init__(self, app):
         """
         初始化服务
@@ -21,39 +47,454 @@ class ZSXQService:
         self.app = app
         self.client = ZSXQClient(app)
 
-    def _get_with_cache(self, cache_key, fetch_func, ttl=None):
+        ttl_config = self._get_cache_config().get('ttl') or {}
+        if ttl_config:
+            self.CACHE_TTL = dict(self.CACHE_TTL, **{
+                family: int(ttl) for family, ttl in ttl_config.items() if family in self.CACHE_TTL
+            })
+
+    def _get_with_cache(self, cache_key, fetch_func, ttl=None, tags=None, family=None):
         """
         带缓存的数据获取
 
         Args:
             cache_key: 缓存键
             fetch_func: 数据获取函数
-            ttl: 缓存过期时间
+            ttl: 缓存过期时间, None且指定family时使用CACHE_TTL[family]
+            tags: 缓存键登记的标签集合(如项目标签, 用于整体清除)
+            family: 数据类型(CACHE_TTL的键), 用于按类型选择防击穿策略 (缓存配置.stampede)
 
         Returns:
             数据
         """
-        # 尝试从缓存获取
+        if ttl is None and family is not None:
+            ttl = self.CACHE_TTL[family]
+        policy = self._get_stampede_policy(family)
+
+        # 尝试从缓存获取(同一次往返取回剩余过期时间)
         if CacheService.is_enabled():
-            cached_data = CacheService.get(cache_key)
-            if cached_data:
-                self.app.logger.debug(f"缓存命中: {cache_key}")
-                return cached_data
-            else:
+            revalidate = ttl is not None and self._get_swr_config().get('enabled', True)
+            early_refresh = family is not None and policy.get('early_refresh', False)
+            entry = CacheService.get_with_ttl(cache_key, grace=self._get_max_stale() if revalidate else 0)
+
+            if entry is None:
                 self.app.logger.info(f"缓存未命中: {cache_key}")
+            elif entry.negative is not None:
+                # 否定缓存(如项目不存在): 在其短TTL内不再请求上游
+                self.app.logger.debug(f"否定缓存命中: {cache_key}")
+                return self._raise_negative(entry.negative)
+            else:
+                # 命中(包括缓存的空列表/空字典)
+                if revalidate and entry.fresh_ttl is not None and entry.fresh_ttl <= 0:
+                    # 已过软过期: 立即返回旧数据, 由后台刷新
+                    self.app.logger.debug(f"缓存已过软过期, 后台刷新: {cache_key}")
+                    self._revalidate(cache_key, fetch_func, ttl, tags, family)
+                    mark_stale()
+                elif early_refresh and EarlyRefresh.should_refresh(family, entry.fresh_ttl, policy.get('beta', 1.0)):
+                    # 概率提前刷新: 返回当前数据, 后台刷新
+                    self.app.logger.debug(f"缓存提前刷新(剩余 {entry.fresh_ttl:.0f} 秒): {cache_key}")
+                    self._revalidate(cache_key, fetch_func, ttl, tags, family)
+                else:
+                    self.app.logger.debug(f"缓存命中: {cache_key}")
+                mark_cached_at(entry.cached_at)
+                return entry.data
+
+        # 缓存未命中,调用API(并发的相同请求只发起一次)
+        data, is_stale, cached_at = SingleFlight.do(
+            cache_key,
+            lambda: self._fetch_and_store(cache_key, fetch_func, ttl, tags=tags, family=family),
+            self._get_single_flight_config(policy),
+            cache_reader=lambda: self._read_flight_result(cache_key),
+            stale_reader=lambda: self._read_last_known(cache_key)
+        ) if CacheService.is_enabled() else self._fetch_and_store(cache_key, fetch_func, ttl, tags=tags, family=family)
+
+        if is_stale:
+            mark_stale()
+        mark_cached_at(cached_at)
+        return data
 
-        # 缓存未命中,调用API
-        data = fetch_func()
+    def _read_flight_result(self, cache_key):
+        """
+        读取其他worker写入的结果(跨进程请求合并时使用)
 
-        # 添加缓存时间戳
-        if isinstance(data, dict):
-            data['cached_at'] = datetime.now().isoformat()
+        Returns:
+            tuple: (数据, False, 缓存时间), 尚无结果时返回None
 
-        # 写入缓存
+        Raises:
+            ZSXQAPIError: 其他worker写入的是带错误信息的否定缓存
+        """
+        entry = CacheService.get_with_ttl(cache_key)
+        if entry is None:
+            return None
+        if entry.negative is not None:
+            return self._raise_negative(entry.negative), False, entry.cached_at
+        return entry.data, False, entry.cached_at
+
+    def _read_last_known(self, cache_key):
+        """
+        读取兜底副本(其他worker持锁获取时直接返回, 见stampede.on_contention)
+
+        Returns:
+            tuple: (数据, True, 缓存时间), 无副本时返回None
+        """
+        entry = CacheService.get_with_ttl(CacheKeys.last_known(cache_key))
+        if entry is None:
+            return None
+        return entry.data, True, entry.cached_at
+
+    def _fetch_and_store(self, cache_key, fetch_func, ttl=None, tags=None, family=None):
+        """
+        调用上游获取数据并写入缓存
+
+        Args:
+            cache_key: 缓存键
+            fetch_func: 数据获取函数, 返回_Uncached时直接返回其数据而不写入缓存
+            ttl: 缓存过期时间
+            tags: 缓存键登记的标签集合
+            family: 数据类型, 用于统计获取耗时(概率提前刷新)
+
+        Returns:
+            tuple: (数据, 是否为过期的兜底数据, 缓存时间)
+        """
+        try:
+            started = time.monotonic()
+            data = fetch_func()
+            if family is not None:
+                EarlyRefresh.record(family, time.monotonic() - started)
+        except ZSXQAPIError as e:
+            if self._is_negative_error(e):
+                # 资源不存在等确定性错误: 短期记住, 期间不再请求上游
+                self._store_negative(cache_key, self._negative_reason(e), tags=tags)
+                raise
+            # 上游熔断或故障时退回最后一次成功获取的数据
+            stale_entry = self._get_last_known(cache_key, e)
+            if stale_entry is None:
+                raise
+            return stale_entry.data, True, stale_entry.cached_at
+
+        cached_at = datetime.now().isoformat()
+        if isinstance(data, _Uncached):
+            return data.data, False, cached_at
+        if data is None:
+            self._store_negative(cache_key, {}, tags=tags)
+            return None, False, cached_at
+        return self._store(cache_key, data, ttl=ttl, tags=tags, cached_at=cached_at), False, cached_at
+
+    def _store_negative(self, cache_key, reason, tags=None):
+        """
+        写入否定缓存(不写兜底副本, 已有的兜底副本保留)
+
+        Args:
+            cache_key: 缓存键
+            reason: 原因, 空字典表示上游返回了"不存在"(None)
+            tags: 缓存键登记的标签集合
+        """
+        negative_config = self._get_negative_cache_config()
+        if not negative_config.get('enabled', True) or not CacheService.is_enabled():
+            return
+        CacheService.set_negative(cache_key, int(negative_config.get('ttl', 60)), reason, tags=tags)
+
+    def _is_negative_error(self, error):
+        """上游错误是否可以作为否定结果缓存(不可重试且属于配置的错误类别)"""
+        if isinstance(error, CircuitOpenError) or error.retryable:
+            return False
+        return error.error_class in self._get_negative_cache_config().get('error_classes', ['business', 'not_found'])
+
+    @staticmethod
+    def _negative_reason(error):
+        """从上游错误生成否定缓存原因"""
+        return {'message': str(error), 'status_code': error.status_code, 'error_class': error.error_class}
+
+    @staticmethod
+    def _raise_negative(reason):
+        """
+        按否定缓存原因返回结果
+
+        Returns:
+            None: 原因为空(上游返回"不存在")
+
+        Raises:
+            ZSXQAPIError: 原因中带有错误信息时, 重新抛出缓存的错误
+        """
+        if not reason:
+            return None
+        raise ZSXQAPIError(reason.get('message', ''), status_code=reason.get('status_code'),
+                           error_class=reason.get('error_class', 'other'))
+
+    @staticmethod
+    def _can_fall_back(error):
+        """上游错误是否可以退回兜底副本(熔断、可重试的故障, 或用户请求等待令牌超时)"""
+        return isinstance(error, CircuitOpenError) or error.retryable or error.error_class == 'rate_limited'
+
+    def _get_last_known(self, cache_key, error):
+        """
+        获取最后一次成功缓存的数据(已过期的兜底副本)
+
+        Args:
+            cache_key: 缓存键
+            error: 导致回退的ZSXQAPIError
+
+        Returns:
+            CacheEntry: 兜底副本, 不可回退或无副本时返回None
+        """
+        if not CacheService.is_enabled():
+            return None
+        if not self._can_fall_back(error):
+            return None
+
+        entry = CacheService.get_with_ttl(CacheKeys.last_known(cache_key))
+        if entry is None:
+            return None
+
+        self.app.logger.warning(f"上游不可用({str(error)}), 返回过期缓存: {cache_key}")
+        return entry
+
+    def _store(self, cache_key, data, ttl=None, tags=None, cached_at=None):
+        """
+        写入缓存
+
+        Args:
+            cache_key: 缓存键
+            data: 数据
+            ttl: 缓存过期时间
+            tags: 缓存键登记的标签集合
+            cached_at: 缓存时间, None则取当前时间
+
+        Returns:
+            数据
+        """
+        # 同时保留一份长期副本供上游故障时兜底, 两者通过一个pipeline写入
+        return self._store_many({cache_key: (data, ttl)}, tags=tags, cached_at=cached_at)[cache_key]
+
+    def _get_many_with_cache(self, requests, tags=None, primary=None):
+        """
+        批量的带缓存数据获取
+
+        所有键通过一次批量读取检查缓存, 只有未命中的键才并发请求上游,
+        结果(及兜底副本)通过一个pipeline写回缓存。
+
+        Args:
+            requests: 缓存键 -> (数据获取函数 fetch(client), 缓存过期时间, 数据类型)
+                      并发获取在工作线程中执行, client的调用类别在当前线程确定;
+                      数据类型用于统计获取耗时(概率提前刷新)
+            tags: 所有缓存键登记的标签集合
+            primary: 主数据的缓存键, 其结果为None(不存在)时直接返回, 不抛出其他键的错误
+
+        Returns:
+            dict: 缓存键 -> 数据
+
+        Raises:
+            ZSXQAPIError: 某个未命中的键获取失败且没有可用的兜底副本, 或命中了带错误信息的否定缓存
+        """
+        results = {}
+        # 命中的否定缓存: 缓存键 -> 原因
+        negative = {}
         if CacheService.is_enabled():
-            CacheService.set(cache_key, data, ttl=ttl)
+            revalidate = self._get_swr_config().get('enabled', True)
+            entries = CacheService.get_many_with_ttl(list(requests), grace=self._get_max_stale() if revalidate else 0)
+            stale_keys = [
+                key for key, entry in entries.items()
+                if revalidate and entry.fresh_ttl is not None and entry.fresh_ttl <= 0
+            ]
+            for cache_key in stale_keys:
+                fetch_func, ttl, family = requests[cache_key]
+                self._revalidate(cache_key, lambda fetch_func=fetch_func: fetch_func(self.client), ttl, tags, family)
+            if stale_keys:
+                mark_stale()
+            for cache_key, entry in entries.items():
+                if entry.negative is not None:
+                    negative[cache_key] = entry.negative
+                    continue
+                results[cache_key] = entry.data
+                mark_cached_at(entry.cached_at)
+        missing = [key for key in requests if key not in results and key not in negative]
+        if results or negative:
+            self.app.logger.debug(f"批量缓存命中 {len(results) + len(negative)}/{len(requests)}")
+        if primary is not None and primary in negative and not negative[primary]:
+            # 主数据不存在: 其他键的否定缓存(如统计接口的404)不再抛出
+            return {primary: None}
+        for cache_key, reason in negative.items():
+            results[cache_key] = self._raise_negative(reason)
+        if not missing:
+            return results
+
+        self.app.logger.info(f"批量缓存未命中: {', '.join(missing)}")
+
+        app = self._get_app()
+        # 在当前线程创建, 工作线程中的请求沿用当前的调用类别(interactive|background)
+        async_client = AsyncZSXQClient(self.app)
+
+        def fetch(cache_key):
+            fetch_func, _, family = requests[cache_key]
+            with app.app_context():
+                started = time.monotonic()
+                data = fetch_func(async_client.client)
+                EarlyRefresh.record(family, time.monotonic() - started)
+                return data
+
+        fetched = async_client.run_many_sync(fetch, missing)
+
+        to_store = {}
+        failed = {}
+        for cache_key, result in zip(missing, fetched):
+            if isinstance(result, ZSXQAPIError) and self._is_negative_error(result):
+                self._store_negative(cache_key, self._negative_reason(result), tags=tags)
+                failed[cache_key] = result
+            elif isinstance(result, Exception):
+                failed[cache_key] = result
+            elif result is None:
+                self._store_negative(cache_key, {}, tags=tags)
+                results[cache_key] = None
+            else:
+                to_store[cache_key] = (result, requests[cache_key][1])
+        cached_at = datetime.now().isoformat()
+        results.update(self._store_many(to_store, tags=tags, cached_at=cached_at))
+        if to_store:
+            mark_cached_at(cached_at)
+
+        if failed:
+            # 失败的键批量读取兜底副本
+            fallback_keys = {
+                CacheKeys.last_known(key): key for key, error in failed.items()
+                if self._can_fall_back(error)
+            }
+            stale = CacheService.get_many_with_ttl(list(fallback_keys)) if CacheService.is_enabled() else {}
+            for last_known_key, entry in stale.items():
+                cache_key = fallback_keys[last_known_key]
+                self.app.logger.warning(f"上游不可用({str(failed.pop(cache_key))}), 返回过期缓存: {cache_key}")
+                results[cache_key] = entry.data
+                mark_cached_at(entry.cached_at)
+            if stale:
+                mark_stale()
+            if failed and primary is not None and primary not in failed and results.get(primary) is None:
+                # 主数据不存在时其他键失败是预期的, 由调用方按不存在处理
+                return results
+            if failed:
+                raise next(iter(failed.values()))
+
+        return results
+
+    def _store_many(self, items, tags=None, cached_at=None):
+        """
+        批量写入缓存(与兜底副本一起通过一个pipeline写入, 缓存时间记录在缓存值的信封中)
 
-        return data
+        Args:
+            items: 缓存键 -> (数据, 缓存过期时间)
+            tags: 标签集合列表(所有键共用), 或 缓存键 -> 标签列表 的字典
+            cached_at: 缓存时间, None则取当前时间
+
+        Returns:
+            dict: 缓存键 -> 数据
+        """
+        values = {}
+        ttls = {}
+        key_tags = {}
+        last_known_ttl = self._get_last_known_ttl()
+
+        for cache_key, (data, ttl) in items.items():
+            last_known_key = CacheKeys.last_known(cache_key)
+            values[cache_key] = values[last_known_key] = data
+            ttls[cache_key] = self._get_hard_ttl(ttl)
+            ttls[last_known_key] = last_known_ttl
+            key_tags[cache_key] = key_tags[last_known_key] = (
+                tags.get(cache_key) if isinstance(tags, dict) else tags
+            )
+
+        if values and CacheService.is_enabled():
+            CacheService.set_many(values, ttl=ttls, tags=key_tags if tags else None, cached_at=cached_at)
+
+        return {cache_key: data for cache_key, (data, _) in items.items()}
+
+    def _revalidate(self, cache_key, fetch_func, ttl, tags=None, family=None):
+        """
+        提交一次后台刷新(stale-while-revalidate或概率提前刷新)
+
+        Args:
+            cache_key: 缓存键
+            fetch_func: 数据获取函数
+            ttl: 缓存过期时间(软过期)
+            tags: 缓存键登记的标签集合
+            family: 数据类型
+        """
+        Revalidator.submit(
+            self._get_app(),
+            cache_key,
+            lambda: self._fetch_and_store(cache_key, fetch_func, ttl, tags=tags, family=family),
+            self._get_swr_config()
+        )
+
+    def _get_app(self):
+        """获取实际的应用对象(路由中传入的是current_app代理, 后台线程中需要用实际对象推入上下文)"""
+        return getattr(self.app, '_get_current_object', lambda: self.app)()
+
+    def _get_hard_ttl(self, ttl):
+        """
+        计算写入Redis的过期时间
+
+        启用stale-while-revalidate时, 键在软过期(ttl)之后再保留max_stale秒, 期间返回旧数据并后台刷新
+
+        Args:
+            ttl: 缓存过期时间(软过期), None则使用默认值且不保留旧数据
+
+        Returns:
+            int: Redis过期时间(硬过期)
+        """
+        if ttl is None or not self._get_swr_config().get('enabled', True):
+            return ttl
+        return int(ttl) + self._get_max_stale()
+
+    def _get_swr_config(self):
+        """获取stale-while-revalidate配置"""
+        return self._get_cache_config().get('stale_while_revalidate', {})
+
+    def _get_max_stale(self):
+        """获取软过期后仍可返回旧数据的时间(秒)"""
+        return int(self._get_swr_config().get('max_stale', 3600))
+
+    def _get_cache_config(self):
+        """获取缓存配置"""
+        return self.app.config.get('ZSXQ_CONFIG', {}).get('缓存配置', {})
+
+    def _get_negative_cache_config(self):
+        """获取否定缓存配置"""
+        return self._get_cache_config().get('negative_cache', {})
+
+    def _get_last_known_ttl(self):
+        """获取兜底副本的保留时间(秒)"""
+        return self._get_cache_config().get('last_known_ttl', 86400)
+
+    def _get_single_flight_config(self, policy=None):
+        """
+        获取请求合并配置
+
+        Args:
+            policy: 数据类型的防击穿策略, lock为true时强制跨进程合并, on_contention覆盖未抢到锁时的行为
+
+        Returns:
+            dict: 请求合并配置
+        """
+        config = self._get_cache_config().get('single_flight', {})
+        if policy and 'lock' in policy:
+            config = dict(config, distributed=policy['lock'])
+        if policy and 'on_contention' in policy:
+            config = dict(config, on_contention=policy['on_contention'])
+        return config
+
+    def _get_stampede_policy(self, family):
+        """
+        获取数据类型的防击穿策略
+
+        Args:
+            family: 数据类型, None时返回默认策略
+
+        Returns:
+            dict: lock/on_contention/early_refresh/beta, 未配置的项沿用默认策略
+        """
+        stampede_config = self._get_cache_config().get('stampede', {})
+        policy = dict(stampede_config.get('default', {}))
+        if family is not None:
+            policy.update(stampede_config.get(family, {}))
+        return policy
 
     def get_projects(self, scope='ongoing'):
         """
@@ -69,9 +510,58 @@ class ZSXQService:
 
         def fetch():
             raw_projects = self.client.get_projects(scope=scope)
+            ProjectIndex.update_scope(scope, raw_projects)
             return [self._format_project(p) for p in raw_projects]
 
-        return self._get_with_cache(cache_key, fetch, ttl=7200)  # 2小时
+        return self._get_with_cache(cache_key, fetch, family='projects')
+
+    def get_project_ids(self, scope='ongoing'):
+        """
+        获取某个范围内的项目ID
+
+        优先从项目索引中按范围筛选, 索引尚未建立时回退到项目列表
+
+        Args:
+            scope: 项目范围
+
+        Returns:
+            list: 项目ID列表
+        """
+        indexed = ProjectIndex.get_by_scope(scope)
+        if indexed is not None:
+            return [str(p['checkin_id']) for p in indexed]
+        return [p['project_id'] for p in self.get_projects(scope=scope)]
+
+    def _find_indexed_project(self, project_id, client=None):
+        """
+        从项目索引中查找项目(项目详情接口失败时使用)
+
+        尚未建立索引的范围先各请求一次项目列表补齐, 之后的查找不再访问上游
+
+        Args:
+            project_id: 项目ID
+            client: 请求项目列表使用的客户端, None则使用self.client
+
+        Returns:
+            dict: 原始项目数据, 不存在返回None
+        """
+        project = ProjectIndex.get(project_id)
+        if project is not None:
+            return project
+
+        for scope in SCOPES:
+            if ProjectIndex.is_scope_indexed(scope):
+                continue
+            try:
+                ProjectIndex.update_scope(scope, (client or self.client).get_projects(scope=scope))
+            except ZSXQAPIError as e:
+                self.app.logger.warning(f"建立项目索引失败 {scope}: {str(e)}")
+                continue
+            project = ProjectIndex.get(project_id)
+            if project is not None:
+                return project
+
+        return None
 
     def get_project_detail(self, project_id):
         """
@@ -86,12 +576,13 @@ class ZSXQService:
         cache_key = CacheKeys.project_info(project_id)
 
         def fetch():
-            raw_project = self.client.get_project_detail(project_id)
+            raw_project = self.client.get_project_detail(project_id, fallback=self._find_indexed_project)
             if not raw_project:
                 return None
             return self._format_project_detail(raw_project)
 
-        return self._get_with_cache(cache_key, fetch, ttl=7200)  # 2小时
+        return self._get_with_cache(cache_key, fetch, family='info',
+                                    tags=[CacheKeys.project_tag(project_id)])
 
     def get_project_stats(self, project_id):
         """
@@ -109,7 +600,8 @@ class ZSXQService:
             raw_stats = self.client.get_project_stats(project_id)
             return self._format_project_stats(raw_stats)
 
-        return self._get_with_cache(cache_key, fetch, ttl=3600)  # 1小时
+        return self._get_with_cache(cache_key, fetch, family='stats',
+                                    tags=[CacheKeys.project_tag(project_id)])
 
     def get_daily_stats(self, project_id):
         """
@@ -127,9 +619,52 @@ class ZSXQService:
             raw_stats = self.client.get_daily_stats(project_id)
             return self._format_daily_stats(raw_stats)
 
-        return self._get_with_cache(cache_key, fetch, ttl=1800)  # 30分钟
+        return self._get_with_cache(cache_key, fetch, family='daily_stats',
+                                    tags=[CacheKeys.project_tag(project_id)])
+
+    def get_project_overview(self, project_id):
+        """
+        获取项目概览(详情、统计与每日统计, 一次批量读取缓存)
+
+        Args:
+            project_id: 项目ID
+
+        Returns:
+            dict: {'project': 项目详情, 'stats': 统计数据, 'daily_stats': 每日统计},
+                  项目不存在则返回None
+        """
+        def fetch_detail(client):
+            raw_project = client.get_project_detail(
+                project_id, fallback=lambda pid: self._find_indexed_project(pid, client)
+            )
+            if not raw_project:
+                return None
+            return self._format_project_detail(raw_project)
+
+        keys = {
+            'project': CacheKeys.project_info(project_id),
+            'stats': CacheKeys.project_stats(project_id),
+            'daily_stats': CacheKeys.project_daily_stats(project_id)
+        }
+        results = self._get_many_with_cache({
+            keys['project']: (fetch_detail, self.CACHE_TTL['info'], 'info'),
+            keys['stats']: (
+                lambda client: self._format_project_stats(client.get_project_stats(project_id)),
+                self.CACHE_TTL['stats'],
+                'stats'
+            ),
+            keys['daily_stats']: (
+                lambda client: self._format_daily_stats(client.get_daily_stats(project_id)),
+                self.CACHE_TTL['daily_stats'],
+                'daily_stats'
+            )
+        }, tags=[CacheKeys.project_tag(project_id)], primary=keys['project'])
+
+        if not results.get(keys['project']):
+            return None
+        return {name: results.get(key) for name, key in keys.items()}
 
-    def get_leaderboard(self, project_id, leaderboard_type='continuous', limit=10):
+    def get_leaderboard(self, project_id, leaderboard_type='continuous', limit=10, offset=0):
         """
         获取排行榜
 
@@ -137,22 +672,129 @@ class ZSXQService:
             project_id: 项目ID
             leaderboard_type: 排行榜类型
             limit: 返回数量
+            offset: 起始位置(用于查看靠后的排名)
+
+        Returns:
+            dict: 排行榜数据, total为真实上榜人数
+        """
+        head_size = self._get_leaderboard_head_size()
+        if offset + limit > head_size:
+            full_leaderboard = self.get_full_leaderboard(project_id, leaderboard_type)
+            return self._slice_leaderboard(full_leaderboard, limit, offset)
+
+        # 浅层分页只读取单独缓存的前N名, 不必解码整个排行榜
+        cache_key = CacheKeys.project_leaderboard_head(project_id, leaderboard_type)
+
+        def fetch():
+            leaderboard, partial = self._load_full_leaderboard(project_id, leaderboard_type)
+            head = self._leaderboard_head(leaderboard, head_size)
+            return _Uncached(head) if partial else head
+
+        head = self._get_with_cache(cache_key, fetch, family='leaderboard',
+                                    tags=[CacheKeys.project_tag(project_id)])
+        return self._slice_leaderboard(head, limit, offset)
+
+    def get_full_leaderboard(self, project_id, leaderboard_type='continuous'):
+        """
+        获取完整排行榜(遍历所有分页)
+
+        API请求中缓存未命中时只获取前 排行榜配置.interactive_max_pages 页并立即返回(complete为false),
+        这部分结果不写入缓存, 同时提交后台刷新获取完整排行榜; 定时任务与后台刷新始终获取完整排行榜。
+
+        Args:
+            project_id: 项目ID
+            leaderboard_type: 排行榜类型
+
+        Returns:
+            dict: 完整排行榜, 或前几页(complete为false, total只是已获取部分的人数)
+        """
+        return self._load_full_leaderboard(project_id, leaderboard_type)[0]
+
+    def _load_full_leaderboard(self, project_id, leaderboard_type):
+        """
+        获取完整排行榜, 同时返回是否只获取了前几页(见get_full_leaderboard)
 
         Returns:
-            dict: 排行榜数据
+            tuple: (排行榜, 是否为未写入缓存的部分结果)
         """
         cache_key = CacheKeys.project_leaderboard(project_id, leaderboard_type)
+        tags = [CacheKeys.project_tag(project_id)]
+        interactive_max_pages = int(get_leaderboard_config(self.app).get('interactive_max_pages', 2))
+        partial = []
 
         def fetch():
-            # 知识星球API一次返回所有数据,我们在这里做限制
-            raw_data = self.client.get_ranking_list(
-                project_id,
-                ranking_type=leaderboard_type,
-                index=0
+            # 后台刷新在请求上下文之外执行, 获取完整排行榜
+            if not has_request_context() or interactive_max_pages <= 0:
+                return self._build_full_leaderboard(project_id, leaderboard_type)
+            leaderboard = self._build_full_leaderboard(project_id, leaderboard_type,
+                                                       max_pages=interactive_max_pages)
+            if not leaderboard['complete']:
+                # 部分结果不写入缓存, 否则在整个TTL内返回截断的排行榜
+                partial.append(True)
+                return _Uncached(leaderboard)
+            return leaderboard
+
+        leaderboard = self._get_with_cache(cache_key, fetch, family='leaderboard', tags=tags)
+        if partial:
+            self._revalidate(cache_key, lambda: self._build_full_leaderboard(project_id, leaderboard_type),
+                             self.CACHE_TTL['leaderboard'], tags=tags, family='leaderboard')
+        return leaderboard, bool(partial)
+
+    def _leaderboard_head(self, leaderboard, head_size=None):
+        """
+        截取排行榜前N名(total等字段保持完整排行榜的值)
+
+        Args:
+            leaderboard: 完整排行榜
+            head_size: 保留的名次数, None则使用 排行榜配置.head_size
+
+        Returns:
+            dict: 只包含前N名的排行榜
+        """
+        head = dict(leaderboard)
+        head['rankings'] = leaderboard.get('rankings', [])[:head_size or self._get_leaderboard_head_size()]
+        return head
+
+    def _get_leaderboard_head_size(self):
+        """获取单独缓存的排行榜名次数"""
+        return int(get_leaderboard_config(self.app).get('head_size', 100))
+
+    def _build_full_leaderboard(self, project_id, leaderboard_type, max_pages=None):
+        """
+        逐页获取排行榜并增量组装
+
+        原始分页数据逐条格式化后即丢弃, 内存中只保留格式化后的条目。
+
+        Args:
+            project_id: 项目ID
+            leaderboard_type: 排行榜类型
+            max_pages: 最多获取的页数, None则使用 排行榜配置.max_pages
+
+        Returns:
+            dict: 完整排行榜, 页数达到上限时complete为false
+        """
+        leaderboard_config = get_leaderboard_config(self.app)
+        iterator = self.client.iter_ranking_list(
+            project_id,
+            ranking_type=leaderboard_type,
+            page_size=leaderboard_config.get('page_size', 200),
+            max_pages=max_pages or leaderboard_config.get('max_pages', 50)
+        )
+
+        rankings = [self._format_ranking_item(item) for item in iterator]
+
+        if iterator.truncated and max_pages is None:
+            self.app.logger.warning(
+                f"项目 {project_id} {leaderboard_type} 排行榜超过 {iterator.pages_fetched} 页, 已截断"
             )
-            return self._format_leaderboard(raw_data, leaderboard_type, limit)
 
-        return self._get_with_cache(cache_key, fetch, ttl=3600)  # 1小时
+        return {
+            'type': leaderboard_type,
+            'rankings': rankings,
+            'total': len(rankings),
+            'complete': not iterator.truncated,
+            'user_rank': self._format_user_rank(iterator.user_specific) if iterator.user_specific else None
+        }
 
     def get_topics(self, project_id, count=20):
         """
@@ -172,7 +814,110 @@ class ZSXQService:
             topics = raw_data.get('topics', [])
             return [self._format_topic(t) for t in topics]
 
-        return self._get_with_cache(cache_key, fetch, ttl=600)  # 10分钟
+        return self._get_with_cache(cache_key, fetch, family='topics',
+                                    tags=[CacheKeys.project_tag(project_id)])
+
+    def crawl_topic_history(self, project_id, page_size=20, max_pages=None):
+        """
+        流式抓取项目的完整话题历史
+
+        Args:
+            project_id: 项目ID
+            page_size: 每页条数
+            max_pages: 本次最多抓取的页数,None表示不限制
+
+        Returns:
+            TopicHistoryCrawler: 逐条产出格式化话题的可迭代对象, 中断后可从检查点继续
+        """
+        crawl_config = self._get_cache_config().get('topic_crawl', {})
+        return TopicHistoryCrawler(
+            self,
+            project_id,
+            page_size=page_size,
+            max_pages=max_pages,
+            checkpoint_ttl=crawl_config.get('checkpoint_ttl')
+        )
+
+    def refresh_many(self, kind, project_ids, **kwargs):
+        """
+        并发刷新多个项目的同类数据并写入缓存
+
+        Args:
+            kind: 数据类型 (stats|daily_stats|leaderboard|topics)
+            project_ids: 项目ID列表
+            **kwargs: 数据类型相关参数
+                leaderboard: leaderboard_type
+                topics: count
+
+        Returns:
+            dict: 刷新结果统计 {'success': int, 'failed': int, 'errors': list}
+        """
+        if kind == 'stats':
+            key_func = CacheKeys.project_stats
+
+            def fetch_func(pid):
+                return self._format_project_stats(self.client.get_project_stats(pid))
+        elif kind == 'daily_stats':
+            key_func = CacheKeys.project_daily_stats
+
+            def fetch_func(pid):
+                return self._format_daily_stats(self.client.get_daily_stats(pid))
+        elif kind == 'leaderboard':
+            leaderboard_type = kwargs.get('leaderboard_type', 'continuous')
+
+            def key_func(pid):
+                return CacheKeys.project_leaderboard(pid, leaderboard_type)
+
+            def fetch_func(pid):
+                return self._build_full_leaderboard(pid, leaderboard_type)
+        elif kind == 'topics':
+            count = kwargs.get('count', 20)
+            key_func = CacheKeys.project_topics
+
+            def fetch_func(pid):
+                topics = self.client.get_topics(pid, count=count).get('topics', [])
+                return [self._format_topic(t) for t in topics]
+        else:
+            raise ValueError(f"不支持的数据类型: {kind}")
+
+        app = self._get_app()
+
+        def fetch(project_id):
+            # 工作线程中没有应用上下文, 与_get_many_with_cache一样推入
+            with app.app_context():
+                return fetch_func(project_id)
+
+        project_ids = list(project_ids)
+        async_client = AsyncZSXQClient(self.app)
+        results = async_client.run_many_sync(fetch, project_ids)
+
+        stats = {'success': 0, 'failed': 0, 'errors': []}
+        to_store = {}
+        tags = {}
+        fetched = 0
+        for project_id, result in zip(project_ids, results):
+            if isinstance(result, Exception):
+                stats['failed'] += 1
+                stats['errors'].append(f"项目 {project_id}: {str(result)}")
+                continue
+            fetched += 1
+            to_store[key_func(project_id)] = (result, self.CACHE_TTL[kind])
+            tags[key_func(project_id)] = [CacheKeys.project_tag(project_id)]
+            if kind == 'leaderboard':
+                # 前N名与完整排行榜一起写入, 浅层分页读到的是同一次刷新的结果
+                head_key = CacheKeys.project_leaderboard_head(project_id, leaderboard_type)
+                to_store[head_key] = (self._leaderboard_head(result), self.CACHE_TTL[kind])
+                tags[head_key] = tags[key_func(project_id)]
+
+        # 所有项目的结果通过一个pipeline写入
+        try:
+            self._store_many(to_store, tags=tags)
+            stats['success'] += fetched
+        except Exception as e:
+            stats['failed'] += fetched
+            stats['errors'].append(f"写入缓存失败: {str(e)}")
+
+        return stats
 
     # ==================== 数据格式化方法 ====================
 
@@ -257,30 +1002,22 @@ class ZSXQService:
             'active_members': raw_stats.get('active_users', 0)
         }
 
-    def _format_leaderboard(self, raw_data, leaderboard_type, limit):
+    def _slice_leaderboard(self, full_leaderboard, limit, offset=0):
         """
-        格式化排行榜数据
+        从完整排行榜中截取一段
 
         Args:
-            raw_data: 原始排行榜数据
-            leaderboard_type: 排行榜类型
+            full_leaderboard: 完整排行榜
             limit: 返回数量限制
+            offset: 起始位置
 
         Returns:
-            dict: 格式化后的排行榜
+            dict: 排行榜片段
         """
-        ranking_list = raw_data.get('ranking_list', [])
-        user_specific = raw_data.get('user_specific', {})
-
-        # 限制返回数量
-        limited_rankings = ranking_list[:limit]
-
-        return {
-            'type': leaderboard_type,
-            'rankings': [self._format_ranking_item(item) for item in limited_rankings],
-            'total': len(ranking_list),
-            'user_rank': self._format_user_rank(user_specific) if user_specific else None
-        }
+        result = {key: value for key, value in full_leaderboard.items() if key != 'rankings'}
+        result['rankings'] = full_leaderboard.get('rankings', [])[offset:offset + limit]
+        result['offset'] = offset
+        return result
 
     def _format_ranking_item(self, raw_item):
         """
@@ -381,14 +1118,15 @@ class ZSXQService:
         """
         清除项目相关的所有缓存
 
+        只删除项目标签集合中登记的键(写入缓存时登记), 不遍历整个键空间
+
         Args:
             project_id: 项目ID
 
         Returns:
             int: 清除的键数量
         """
-        pattern = CacheKeys.project_all(project_id)
-        count = CacheService.delete_pattern(pattern)
+        count = CacheService.delete_tag(CacheKeys.project_tag(project_id))
         self.app.logger.info(f"清除项目 {project_id} 缓存,共 {count} 个键")
         return count
 
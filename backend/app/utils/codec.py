@@ -0,0 +1,115 @@
+"""
+序列化编解码模块
+统一上游响应解析与缓存值序列化, 可在标准库json、orjson、msgpack之间切换
+"""
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+
+class JsonCodec:
+    """标准库json"""
+
+    name = 'json'
+    # 输出为JSON文本, 可用于解析上游响应
+    is_json = True
+
+    def dumps(self, value):
+        return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """orjson(输出与标准库json兼容, 速度更快)"""
+
+    name = 'orjson'
+    is_json = True
+
+    def dumps(self, value):
+        # 与标准库json一致: 非字符串的字典键转为字符串
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    """msgpack二进制格式(体积更小, 仅用于缓存)"""
+
+    name = 'msgpack'
+    is_json = False
+
+    def dumps(self, value):
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+CODECS = {
+    'json': (JsonCodec, lambda: True),
+    'orjson': (OrjsonCodec, lambda: orjson is not None),
+    'msgpack': (MsgpackCodec, lambda: msgpack is not None)
+}
+
+# 依赖缺失时的回退顺序
+FALLBACK_ORDER = ['msgpack', 'orjson', 'json']
+
+_instances = {}
+
+
+def available_codecs():
+    """
+    获取当前环境可用的编解码器
+
+    Returns:
+        list: 编解码器名称
+    """
+    return [name for name, (_, available) in CODECS.items() if available()]
+
+
+def get_codec(name='auto', json_only=False):
+    """
+    按名称获取编解码器, 依赖未安装时自动回退(msgpack -> orjson -> json)
+
+    Args:
+        name: json|orjson|msgpack|auto, auto表示优先orjson
+        json_only: 是否只接受JSON文本格式(解析上游响应时使用)
+
+    Returns:
+        编解码器实例
+    """
+    requested = ((name or 'auto').lower(), json_only)
+    codec = _instances.get(requested)
+    if codec is not None:
+        return codec
+
+    name = requested[0]
+    if name == 'auto' or (json_only and name == 'msgpack'):
+        name = 'orjson'
+    if name not in CODECS:
+        logger.warning(f"未知的编解码器 {name}, 使用json")
+        name = 'json'
+
+    for candidate in FALLBACK_ORDER[FALLBACK_ORDER.index(name):]:
+        codec_class, available = CODECS[candidate]
+        if available():
+            break
+    if candidate != name and requested[0] != 'auto':
+        logger.warning(f"编解码器 {name} 依赖未安装, 回退到 {candidate}")
+
+    codec = _instances.setdefault(requested, codec_class())
+    return codec
@@ -0,0 +1,363 @@
+"""
+运行指标模块
+进程内计数器、仪表与直方图, 以Prometheus文本格式导出; 多worker部署时各进程定期写入快照文件, 导出时汇总
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+UPSTREAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CACHE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RATE_LIMIT_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+VALUE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# 指标名 -> (类型, 说明, 直方图分桶)
+METRICS = {
+    'zsxq_upstream_request_duration_seconds': (
+        HISTOGRAM, '知识星球API单次HTTP请求耗时', UPSTREAM_BUCKETS),
+    'zsxq_upstream_responses_total': (
+        COUNTER, '知识星球API响应数(按HTTP状态码)', None),
+    'zsxq_upstream_response_bytes_total': (
+        COUNTER, '知识星球API响应体字节数', None),
+    'zsxq_upstream_errors_total': (
+        COUNTER, '知识星球API调用失败次数(按错误类别)', None),
+    'zsxq_ratelimit_requests_total': (
+        COUNTER, '上游令牌申请次数(按结果: immediate立即放行, throttled等待后放行, rejected超过max_wait被拒绝)', None),
+    'zsxq_ratelimit_wait_seconds': (
+        HISTOGRAM, '上游令牌申请的等待时间(仅统计需要等待的申请)', RATE_LIMIT_WAIT_BUCKETS),
+    'zsxq_ratelimit_upstream_throttled_total': (
+        COUNTER, '上游返回429的次数(每次都会压低速率系数)', None),
+    'zsxq_ratelimit_tokens': (
+        GAUGE, '令牌桶剩余令牌数(负数表示已被预约)', None),
+    'zsxq_ratelimit_rate_factor': (
+        GAUGE, '上游速率系数(收到429后降低, 成功放行后逐步恢复到1)', None),
+    'zsxq_singleflight_executed_total': (
+        COUNTER, '请求合并后实际执行的上游获取次数', None),
+    'zsxq_singleflight_coalesced_total': (
+        COUNTER, '被合并(节省)的上游获取次数(按范围: local进程内, distributed跨worker)', None),
+    'zsxq_cache_requests_total': (
+        COUNTER, '缓存操作次数(按结果)', None),
+    'zsxq_cache_operation_duration_seconds': (
+        HISTOGRAM, '缓存操作耗时', CACHE_BUCKETS),
+    'zsxq_cache_value_bytes': (
+        HISTOGRAM, '缓存值序列化后的字节数(写入时抽样, 按键族)', VALUE_SIZE_BUCKETS),
+    'zsxq_cache_degraded_seconds_total': (
+        COUNTER, 'Redis不可用的累计秒数(按实际使用的后端, none为无缓存)', None),
+    'zsxq_cache_backend_switches_total': (
+        COUNTER, '缓存后端切换次数(按切换后的后端)', None),
+    'zsxq_http_requests_total': (
+        COUNTER, 'API请求数(按路由与状态码)', None),
+    'zsxq_http_request_duration_seconds': (
+        HISTOGRAM, 'API请求耗时(按路由)', HTTP_BUCKETS)
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_key, extra=None):
+    items = list(label_key) + (extra or [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    进程内指标注册表
+
+    记录只做字典更新, 不涉及IO; 配置multiprocess_dir后由后台线程定期把本进程快照
+    写入 metrics_{pid}.json, 导出时合并目录中所有进程的快照。
+    计数器与直方图合并时累加; 仪表反映的是共享状态(如Redis令牌桶), 合并时取最近一次设置的值。
+    """
+
+    _lock = threading.Lock()
+    _counters = {}
+    _gauges = {}
+    _histograms = {}
+    _enabled = True
+    _directory = None
+    _flush_interval = 5.0
+    _retention = 0
+    _flusher = None
+    _flusher_pid = None
+
+    @classmethod
+    def init_app(cls, app, config):
+        """
+        初始化指标并注册Flask请求钩子
+
+        Args:
+            app: Flask应用实例
+            config: 指标配置 (系统配置.metrics)
+        """
+        cls._enabled = config.get('enabled', True)
+        if not cls._enabled:
+            return
+
+        cls._directory = os.getenv('METRICS_DIR') or config.get('multiprocess_dir') or None
+        cls._flush_interval = float(config.get('flush_interval', 5))
+        cls._retention = float(config.get('retention', 0))
+        if cls._directory:
+            os.makedirs(cls._directory, exist_ok=True)
+            app.logger.info(f"多进程指标目录: {cls._directory}")
+
+        app.before_request(cls._before_request)
+        app.after_request(cls._after_request)
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """fork出的子进程不继承父进程的计数(父进程的计数由其自身的快照导出)"""
+        cls._lock = threading.Lock()
+        cls._counters = {}
+        cls._gauges = {}
+        cls._histograms = {}
+        cls._flusher = None
+
+    @classmethod
+    def inc(cls, name, value=1, **labels):
+        """
+        计数器累加
+
+        Args:
+            name: 指标名(须在METRICS中定义)
+            value: 增量
+            **labels: 标签
+        """
+        if not cls._enabled:
+            return
+        key = (name, _label_key(labels))
+        with cls._lock:
+            cls._counters[key] = cls._counters.get(key, 0) + value
+
+    @classmethod
+    def set(cls, name, value, **labels):
+        """
+        设置仪表的当前值
+
+        Args:
+            name: 指标名(须在METRICS中定义)
+            value: 当前值
+            **labels: 标签
+        """
+        if not cls._enabled:
+            return
+        key = (name, _label_key(labels))
+        with cls._lock:
+            cls._gauges[key] = (value, time.time())
+
+    @classmethod
+    def observe(cls, name, value, **labels):
+        """
+        直方图记录一次观测值
+
+        Args:
+            name: 指标名(须在METRICS中定义)
+            value: 观测值
+            **labels: 标签
+        """
+        if not cls._enabled:
+            return
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        index = bisect_left(buckets, value)
+        with cls._lock:
+            histogram = cls._histograms.get(key)
+            if histogram is None:
+                # 各分桶计数(非累计) + 超出最大分桶的计数, 总和, 次数
+                histogram = cls._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @classmethod
+    def _before_request(cls):
+        g.metrics_started = time.perf_counter()
+        cls._ensure_flusher()
+
+    @classmethod
+    def _after_request(cls, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            cls.observe('zsxq_http_request_duration_seconds', time.perf_counter() - started,
+                        route=route, method=request.method)
+            cls.inc('zsxq_http_requests_total', route=route, method=request.method,
+                    status=response.status_code)
+        return response
+
+    # ==================== 多进程快照 ====================
+
+    @classmethod
+    def snapshot(cls):
+        """
+        导出本进程的指标快照
+
+        Returns:
+            dict: 可JSON序列化的快照
+        """
+        with cls._lock:
+            return {
+                'counters': [[name, list(map(list, labels)), value]
+                             for (name, labels), value in cls._counters.items()],
+                'gauges': [[name, list(map(list, labels)), value, updated]
+                           for (name, labels), (value, updated) in cls._gauges.items()],
+                'histograms': [[name, list(map(list, labels)), list(h[0]), h[1], h[2]]
+                               for (name, labels), h in cls._histograms.items()]
+            }
+
+    @classmethod
+    def _snapshot_path(cls, pid=None):
+        return os.path.join(cls._directory, f"metrics_{pid or os.getpid()}.json")
+
+    @classmethod
+    def flush(cls):
+        """把本进程快照写入指标目录(原子替换)"""
+        if not cls._directory:
+            return
+        path = cls._snapshot_path()
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cls.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入指标快照失败: {str(e)}")
+
+    @classmethod
+    def _ensure_flusher(cls):
+        """确保本进程的快照写入线程在运行(fork后需重新启动)"""
+        if not cls._directory or (cls._flusher is not None and cls._flusher_pid == os.getpid()):
+            return
+        with cls._lock:
+            if cls._flusher is not None and cls._flusher_pid == os.getpid():
+                return
+            cls._flusher_pid = os.getpid()
+            cls._flusher = threading.Thread(target=cls._flush_loop, name='metrics-flusher', daemon=True)
+            cls._flusher.start()
+
+    @classmethod
+    def _flush_loop(cls):
+        pid = os.getpid()
+        while cls._flusher_pid == pid:
+            time.sleep(cls._flush_interval)
+            cls.flush()
+
+    @classmethod
+    def _load_snapshots(cls):
+        """读取指标目录中的所有快照(本进程使用内存中的最新数据)"""
+        snapshots = [cls.snapshot()]
+        if not cls._directory:
+            return snapshots
+
+        own_path = cls._snapshot_path()
+        now = time.time()
+        for filename in os.listdir(cls._directory):
+            if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            path = os.path.join(cls._directory, filename)
+            if path == own_path:
+                continue
+            try:
+                if cls._retention and now - os.path.getmtime(path) > cls._retention:
+                    # 长时间未更新, 视为已退出的worker
+                    os.remove(path)
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取指标快照失败 {filename}: {str(e)}")
+        return snapshots
+
+    @classmethod
+    def collect(cls):
+        """
+        合并所有进程的指标
+
+        Returns:
+            tuple: (计数器dict, 仪表dict, 直方图dict), 键为(指标名, 标签元组)
+        """
+        counters = {}
+        gauges = {}
+        histograms = {}
+        for snapshot in cls._load_snapshots():
+            for name, labels, value in snapshot.get('counters', []):
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, value, updated in snapshot.get('gauges', []):
+                key = (name, tuple(map(tuple, labels)))
+                if key not in gauges or updated > gauges[key][1]:
+                    gauges[key] = (value, updated)
+            for name, labels, buckets, total, count in snapshot.get('histograms', []):
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = [list(buckets), total, count]
+                else:
+                    merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                    merged[1] += total
+                    merged[2] += count
+        return counters, {key: value for key, (value, _) in gauges.items()}, histograms
+
+    @classmethod
+    def render(cls):
+        """
+        以Prometheus文本格式导出所有进程的指标
+
+        Returns:
+            str: 指标文本
+        """
+        cls._ensure_flusher()
+        counters, gauges, histograms = cls.collect()
+        lines = []
+
+        for name, (metric_type, help_text, buckets) in METRICS.items():
+            values = {COUNTER: counters, GAUGE: gauges, HISTOGRAM: histograms}[metric_type]
+            series = sorted((labels, value) for (n, labels), value in values.items() if n == name)
+            if not series:
+                continue
+
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+            for labels, value in series:
+                if metric_type != HISTOGRAM:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+
+                bucket_counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', repr(float(bound)))])} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return '\n'.join(lines) + '\n'
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=Metrics._reset_after_fork)
@@ -1,7 +1,32 @@
 """
 统一响应格式工具
 """
-from flask import jsonify
+from flask import jsonify, g, has_request_context
+
+
+def mark_stale():
+    """
+    标记当前请求返回的数据来自过期缓存
+
+    success_response会在响应中附加 "stale": true
+    """
+    if has_request_context():
+        g.stale_data = True
+
+
+def mark_cached_at(cached_at):
+    """
+    记录当前请求返回的数据的缓存时间
+
+    一个请求使用多份缓存数据时保留最早的时间, success_response会在响应中附加 "cached_at"
+
+    Args:
+        cached_at: 缓存时间(ISO格式字符串), None时忽略
+    """
+    if cached_at and has_request_context():
+        previous = g.get('cached_at')
+        if previous is None or cached_at < previous:
+            g.cached_at = cached_at
 
 
 def success_response(data=None, message="success", code=0):
@@ -24,6 +49,14 @@ def success_response(data=None, message="success", code=0):
     if data is not None:
         response["data"] = data
 
+    # 上游不可用时返回的过期数据
+    if has_request_context() and g.get('stale_data'):
+        response["stale"] = True
+
+    # 数据的缓存时间(来自缓存值的信封)
+    if has_request_context() and g.get('cached_at'):
+        response["cached_at"] = g.cached_at
+
     return jsonify(response)
 
 
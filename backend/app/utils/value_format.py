@@ -0,0 +1,137 @@
+"""
+缓存值格式模块
+缓存值 = 1字节格式头 + 编解码器输出(超过阈值时压缩), 内容为包含数据与缓存时间的信封;
+格式头取值不会出现在旧格式值(JSON文本、msgpack容器)的首字节, 新旧格式的值可以共存
+"""
+import logging
+import zlib
+from .codec import get_codec
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+COMPRESSION_NONE = 'none'
+COMPRESSION_ZLIB = 'zlib'
+COMPRESSION_ZSTD = 'zstd'
+
+# (编解码器类别, 压缩算法) -> 格式头; json类别包括json与orjson(输出相同)
+HEADERS = {
+    ('json', COMPRESSION_NONE): 0x01,
+    ('json', COMPRESSION_ZLIB): 0x02,
+    ('json', COMPRESSION_ZSTD): 0x03,
+    ('msgpack', COMPRESSION_NONE): 0x04,
+    ('msgpack', COMPRESSION_ZLIB): 0x05,
+    ('msgpack', COMPRESSION_ZSTD): 0x06
+}
+FORMATS = {header: key for key, header in HEADERS.items()}
+
+# 信封字段
+FIELD_DATA = 'd'
+FIELD_CACHED_AT = 'at'
+# 否定缓存标记(项目不存在等), 值为描述原因的字典
+FIELD_NEGATIVE = 'n'
+
+
+class ValueFormat:
+    """
+    缓存值编解码
+
+    写入时总是使用新格式; 读取时按格式头识别编解码器与压缩算法,
+    没有格式头的旧值按配置的编解码器直接解析(其cached_at仍在数据字典中)。
+    """
+
+    def __init__(self, codec, compression=COMPRESSION_ZLIB, threshold=1024, level=None):
+        """
+        初始化
+
+        Args:
+            codec: 编解码器实例 (见utils.codec)
+            compression: 压缩算法 none|zlib|zstd, zstd依赖未安装时回退到zlib
+            threshold: 序列化后超过该字节数才压缩
+            level: 压缩级别, None使用算法默认值(zlib 6, zstd 3)
+        """
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            logger.warning("zstd依赖(zstandard)未安装, 缓存压缩回退到zlib")
+            compression = COMPRESSION_ZLIB
+        if compression not in (COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_ZSTD):
+            logger.warning(f"未知的压缩算法 {compression}, 不压缩")
+            compression = COMPRESSION_NONE
+
+        self.codec = codec
+        self.kind = 'json' if codec.is_json else 'msgpack'
+        self.compression = compression
+        self.threshold = int(threshold)
+        self.level = level
+
+    @property
+    def name(self):
+        return f"{self.codec.name}+{self.compression}"
+
+    def encode(self, data, cached_at=None, negative=None):
+        """
+        编码缓存值
+
+        Args:
+            data: 数据
+            cached_at: 缓存时间(ISO格式字符串)
+            negative: 否定缓存的原因(字典), None表示普通值
+
+        Returns:
+            bytes: 缓存值
+        """
+        envelope = {FIELD_DATA: data, FIELD_CACHED_AT: cached_at}
+        if negative is not None:
+            envelope[FIELD_NEGATIVE] = negative
+        payload = self.codec.dumps(envelope)
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) > self.threshold:
+            compressed = self._compress(payload)
+            # 压缩无收益(如已是短文本)时保留原文
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+        return bytes((HEADERS[(self.kind, compression)],)) + payload
+
+    def decode(self, value):
+        """
+        解码缓存值
+
+        Args:
+            value: 缓存值(bytes)
+
+        Returns:
+            tuple: (数据, 缓存时间, 否定缓存原因), 旧格式值的缓存时间取自数据字典中的cached_at
+
+        Raises:
+            ValueError: 格式无法识别或解压所需的依赖未安装
+        """
+        value_format = FORMATS.get(value[0]) if value else None
+        if value_format is None:
+            data = self.codec.loads(value)
+            return data, data.get('cached_at') if isinstance(data, dict) else None, None
+
+        kind, compression = value_format
+        payload = self._decompress(value[1:], compression)
+        codec = get_codec(kind) if kind != self.kind else self.codec
+        if codec.is_json != (kind == 'json'):
+            raise ValueError(f"缓存值为{kind}格式, 但对应的编解码器依赖未安装")
+        envelope = codec.loads(payload)
+        return envelope[FIELD_DATA], envelope.get(FIELD_CACHED_AT), envelope.get(FIELD_NEGATIVE)
+
+    def _compress(self, payload):
+        if self.compression == COMPRESSION_ZSTD:
+            # 压缩器实例不能跨线程并发使用, 每次新建
+            return zstandard.ZstdCompressor(level=self.level or 3).compress(payload)
+        return zlib.compress(payload, self.level or 6)
+
+    def _decompress(self, payload, compression):
+        if compression == COMPRESSION_NONE:
+            return payload
+        if compression == COMPRESSION_ZLIB:
+            return zlib.decompress(payload)
+        if zstandard is None:
+            raise ValueError("缓存值为zstd压缩, 但zstandard未安装")
+        return zstandard.ZstdDecompressor().decompress(payload)
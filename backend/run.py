@@ -10,7 +10,6 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from app import create_app
-from app.utils.config_loader import load_config
 
 
 def main():
@@ -22,7 +21,7 @@ def main():
 
     try:
         # 创建Flask应用
-        app = create_app(config_path)
+        app = create_app(config_path, startup_mode=os.getenv('STARTUP_MODE'))
 
         # 获取Flask配置
         flask_config = app.config['ZSXQ_CONFIG'].get('系统配置', {}).get('flask', {})
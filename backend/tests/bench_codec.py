@@ -0,0 +1,184 @@
+"""
+编解码器基准测试脚本
+对比json/orjson/msgpack在典型负载(排行榜、话题列表、上游原始响应)上的序列化性能,
+以及缓存值格式在不同压缩算法下的体积与编解码耗时
+运行方式: python backend/tests/bench_codec.py [--rounds 200]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+# 设置UTF-8编码
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.codec import CODECS, available_codecs, get_codec  # noqa: E402
+from app.utils import value_format  # noqa: E402
+from app.utils.value_format import ValueFormat  # noqa: E402
+
+
+NAMES = ['张三', '李四', '王五', '赵六', 'Alice', 'Bob', '小明', '打卡达人']
+
+
+def make_leaderboard(size=2000):
+    """完整排行榜(与缓存中的格式一致)"""
+    rankings = []
+    for i in range(size):
+        rankings.append({
+            'rank': i + 1,
+            'user': {
+                'user_id': 10000000 + i,
+                'name': f"{random.choice(NAMES)}{i}",
+                'alias': '',
+                'avatar': f"https://images.zsxq.com/avatar/{i}.jpg?imageMogr2/thumbnail/120x120"
+            },
+            'days': size - i
+        })
+    return {
+        'type': 'accumulated',
+        'rankings': rankings,
+        'total': size,
+        'complete': True,
+        'user_rank': None,
+        'cached_at': '2025-01-01T00:00:00'
+    }
+
+
+def make_topics(size=200):
+    """话题列表(正文较长, 含中文)"""
+    topics = []
+    for i in range(size):
+        topics.append({
+            'topic_id': str(50000000000000 + i),
+            'title': f"第{i}天打卡",
+            'content': '今天完成了晨跑和阅读, 继续坚持! ' * 20,
+            'create_time': '2025-01-01T08:00:00.000+0800',
+            'user': {
+                'user_id': 10000000 + i,
+                'name': random.choice(NAMES),
+                'avatar': f"https://images.zsxq.com/avatar/{i}.jpg"
+            }
+        })
+    return {'topics': topics, 'total': size}
+
+
+def make_ranking_page(size=200):
+    """上游ranking_list原始响应"""
+    items = [{
+        'rankings': i + 1,
+        'checkined_days': 300 - i,
+        'user': {
+            'user_id': 10000000 + i,
+            'name': random.choice(NAMES),
+            'avatar_url': f"https://images.zsxq.com/avatar/{i}.jpg",
+            'location': '北京'
+        }
+    } for i in range(size)]
+    return {'succeeded': True, 'resp_data': {'ranking_list': items, 'user_specific': {}}}
+
+
+def bench(codec, payload, rounds):
+    """
+    测试单个编解码器
+
+    Returns:
+        tuple: (编码后字节数, 平均编码毫秒, 平均解码毫秒)
+    """
+    encoded = codec.dumps(payload)
+    assert codec.loads(encoded) is not None
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        codec.dumps(payload)
+    dumps_ms = (time.perf_counter() - start) / rounds * 1000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        codec.loads(encoded)
+    loads_ms = (time.perf_counter() - start) / rounds * 1000
+
+    return len(encoded), dumps_ms, loads_ms
+
+
+def bench_format(value_fmt, payload, rounds):
+    """
+    测试缓存值格式(信封 + 压缩)
+
+    Returns:
+        tuple: (缓存值字节数, 平均编码毫秒, 平均解码毫秒)
+    """
+    encoded = value_fmt.encode(payload, cached_at='2025-01-01T00:00:00')
+    assert value_fmt.decode(encoded)[0] is not None
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        value_fmt.encode(payload, cached_at='2025-01-01T00:00:00')
+    encode_ms = (time.perf_counter() - start) / rounds * 1000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        value_fmt.decode(encoded)
+    decode_ms = (time.perf_counter() - start) / rounds * 1000
+
+    return len(encoded), encode_ms, decode_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='编解码器基准测试')
+    parser.add_argument('--rounds', type=int, default=200, help='每项测试的重复次数')
+    args = parser.parse_args()
+
+    random.seed(42)
+    payloads = [
+        ('排行榜(2000条)', make_leaderboard()),
+        ('话题列表(200条)', make_topics()),
+        ('上游排行榜页(200条)', make_ranking_page())
+    ]
+
+    codecs = available_codecs()
+    missing = [name for name in CODECS if name not in codecs]
+
+    print("=" * 72)
+    print("编解码器基准测试")
+    print("=" * 72)
+    print(f"可用: {', '.join(codecs)}" + (f"  未安装: {', '.join(missing)}" if missing else ''))
+
+    for title, payload in payloads:
+        print(f"\n{title}")
+        print(f"  {'codec':<10}{'size(KB)':>10}{'dumps(ms)':>12}{'loads(ms)':>12}{'vs json':>10}")
+
+        baseline = None
+        for name in codecs:
+            codec = CODECS[name][0]()
+            size, dumps_ms, loads_ms = bench(codec, payload, args.rounds)
+            total = dumps_ms + loads_ms
+            if baseline is None:
+                baseline = total
+            print(f"  {name:<10}{size / 1024:>10.1f}{dumps_ms:>12.3f}{loads_ms:>12.3f}{baseline / total:>9.1f}x")
+
+    compressions = ['none', 'zlib'] + (['zstd'] if value_format.zstandard is not None else [])
+    codec = get_codec('auto')
+    print("\n" + "-" * 72)
+    print(f"缓存值压缩 (编解码器: {codec.name}, 阈值1KB)" +
+          ('' if 'zstd' in compressions else '  zstd未安装(pip install zstandard)'))
+
+    for title, payload in payloads[:2]:
+        print(f"\n{title}")
+        print(f"  {'compress':<10}{'size(KB)':>10}{'encode(ms)':>12}{'decode(ms)':>12}{'ratio':>10}")
+
+        raw_size = None
+        for compression in compressions:
+            size, encode_ms, decode_ms = bench_format(ValueFormat(codec, compression=compression), payload, args.rounds)
+            if raw_size is None:
+                raw_size = size
+            print(f"  {compression:<10}{size / 1024:>10.1f}{encode_ms:>12.3f}{decode_ms:>12.3f}{raw_size / size:>9.1f}x")
+
+    print("\n" + "=" * 72)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+启动耗时基准测试脚本
+分别以blocking/background模式启动后端进程, 测量从进程启动到首个请求成功(time-to-first-request)
+以及到 /api/health/ready 就绪的耗时; 测量前先检查background模式下create_app没有导入上游客户端与业务服务模块
+
+运行方式:
+    python backend/tests/bench_startup.py --config config.yml
+    # 模拟Redis不可达(连接超时)的场景
+    python backend/tests/bench_startup.py --config config.yml --redis-host 10.255.255.1
+    # 只检查延迟导入
+    python backend/tests/bench_startup.py --config config.yml --check-only
+"""
+import argparse
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+import yaml
+
+# 设置UTF-8编码
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PROJECT_ROOT = os.path.dirname(BACKEND_DIR)
+
+SERVER_CODE = """
+import sys
+sys.path.insert(0, {backend!r})
+from werkzeug.serving import make_server
+from app import create_app
+app = create_app({config!r})
+make_server('127.0.0.1', {port}, app, threaded=True).serve_forever()
+"""
+
+# background模式下create_app返回时不应导入的模块(应在后台启动或首次请求时才导入)
+LAZY_MODULES = ('app.models.zsxq_client', 'app.services.zsxq_service')
+
+# 后台启动线程在快照之后才开始运行, 避免其导入的模块干扰检查
+IMPORT_CHECK_CODE = """
+import json
+import sys
+import threading
+sys.path.insert(0, {backend!r})
+from app.services.startup import StartupManager
+gate = threading.Event()
+run = StartupManager._run
+StartupManager._run = classmethod(lambda cls, *args: (gate.wait(), run(*args)))
+from app import create_app
+create_app({config!r}, startup_mode='background')
+print(json.dumps([name for name in {modules!r} if name in sys.modules]))
+gate.set()
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, deadline, expect_status=200):
+    """轮询直到返回期望的状态码, 返回到达时刻"""
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == expect_status:
+                return time.monotonic()
+        except requests.RequestException:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def run_once(config, mode, timeout):
+    """
+    以指定模式启动一次后端
+
+    Returns:
+        tuple: (首个请求成功耗时, 就绪耗时), 超时为None
+    """
+    config = dict(config)
+    config['系统配置'] = dict(config.get('系统配置', {}))
+    config['系统配置']['startup'] = dict(config['系统配置'].get('startup', {}), mode=mode)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.yml', delete=False, encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+        config_path = f.name
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}/api"
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_CODE.format(backend=BACKEND_DIR, config=config_path, port=port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    try:
+        deadline = started + timeout
+        first_request = wait_for(f"{base_url}/ping", deadline)
+        ready = wait_for(f"{base_url}/health/ready", deadline)
+        return (
+            first_request - started if first_request else None,
+            ready - started if ready else None
+        )
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        os.remove(config_path)
+
+
+def check_lazy_imports(config):
+    """
+    检查background模式下create_app返回时没有导入LAZY_MODULES
+
+    Returns:
+        list: 已被导入的模块名, 为空表示检查通过
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.yml', delete=False, encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+        config_path = f.name
+
+    try:
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_CHECK_CODE.format(
+                backend=BACKEND_DIR, config=config_path, modules=LAZY_MODULES
+            )],
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=True
+        ).stdout
+    finally:
+        os.remove(config_path)
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('--config', default='config.yml', help='配置文件(相对于项目根目录)')
+    parser.add_argument('--runs', type=int, default=3, help='每种模式的启动次数')
+    parser.add_argument('--redis-host', default=None, help='覆盖Redis地址(如不可达地址以模拟连接超时)')
+    parser.add_argument('--redis-port', type=int, default=None, help='覆盖Redis端口')
+    parser.add_argument('--no-warmup', action='store_true', help='关闭启动预热')
+    parser.add_argument('--timeout', type=float, default=60, help='单次启动的最长等待时间(秒)')
+    parser.add_argument('--check-only', action='store_true', help='只检查延迟导入, 不测量启动耗时')
+    args = parser.parse_args()
+
+    with open(os.path.join(PROJECT_ROOT, args.config), 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    redis_config = config.setdefault('缓存配置', {}).setdefault('redis', {})
+    if args.redis_host:
+        redis_config['host'] = args.redis_host
+    if args.redis_port:
+        redis_config['port'] = args.redis_port
+    config.setdefault('系统配置', {}).setdefault('startup', {})
+    if args.no_warmup:
+        config['系统配置']['startup']['warmup'] = False
+
+    print("=" * 60)
+    print("启动耗时基准测试")
+    print("=" * 60)
+
+    loaded = check_lazy_imports(config)
+    if loaded:
+        print(f"延迟导入检查失败, create_app已导入: {', '.join(loaded)}")
+        sys.exit(1)
+    print("延迟导入检查通过: create_app未导入上游客户端与业务服务模块")
+    if args.check_only:
+        return
+
+    for mode in ('blocking', 'background'):
+        first_times, ready_times = [], []
+        for _ in range(args.runs):
+            first_request, ready = run_once(config, mode, args.timeout)
+            if first_request is not None:
+                first_times.append(first_request)
+            if ready is not None:
+                ready_times.append(ready)
+
+        def fmt(values):
+            return f"{statistics.median(values):.2f}s" if values else "超时"
+
+        print(f"{mode:<12} 首个请求: {fmt(first_times):>8}   就绪: {fmt(ready_times):>8}   ({args.runs}次中位数)")
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+"""
+pytest公共配置
+单元测试不需要启动API服务, 也不需要Redis; quick_test.py与load_test.py是针对运行中服务的脚本, 不参与收集
+"""
+import pytest
+from flask import Flask
+
+collect_ignore = ['quick_test.py', 'load_test.py']
+
+
+@pytest.fixture
+def app():
+    """只带最小配置的Flask应用(缓存未初始化, 客户端不发出真实请求)"""
+    app = Flask('zsxq-tests')
+    app.config['ZSXQ_CONFIG'] = {
+        '知识星球': {
+            'token': 'test-token',
+            'group_id': '1000',
+            'rate_limit': {'enabled': False}
+        },
+        '缓存配置': {'enabled': False}
+    }
+    return app
@@ -0,0 +1,122 @@
+"""
+后端压测脚本
+并发请求后端API, 统计吞吐量与延迟分位数; 配合mock_zsxq_server.py可完全离线运行
+
+运行方式:
+    python backend/tests/load_test.py --url http://localhost:5000 --concurrency 16 --duration 30
+"""
+import argparse
+import io
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+
+# 设置UTF-8编码
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+
+def discover_paths(base_url, max_projects):
+    """根据项目列表生成压测路径"""
+    paths = ['/api/projects?scope=ongoing']
+    response = requests.get(f"{base_url}/api/projects?scope=ongoing", timeout=30)
+    response.raise_for_status()
+    projects = response.json().get('data', {}).get('projects', [])
+
+    for project in projects[:max_projects]:
+        project_id = project['project_id']
+        paths.extend([
+            f"/api/projects/{project_id}",
+            f"/api/projects/{project_id}/stats",
+            f"/api/projects/{project_id}/daily-stats",
+            f"/api/projects/{project_id}/leaderboard?type=accumulated&limit=50",
+            f"/api/projects/{project_id}/leaderboard?type=continuous&limit=50&offset=100",
+            f"/api/projects/{project_id}/topics?limit=20"
+        ])
+    return paths
+
+
+def percentile(sorted_values, p):
+    """计算分位数(最近秩法)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def worker(base_url, paths, deadline, results, lock):
+    """单个并发连接: 循环随机请求直到截止时间"""
+    session = requests.Session()
+    latencies = []
+    statuses = Counter()
+
+    while time.monotonic() < deadline:
+        path = random.choice(paths)
+        started = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=30)
+            status = str(response.status_code)
+            if response.status_code == 200 and response.json().get('stale'):
+                status = '200(stale)'
+        except requests.RequestException as e:
+            status = type(e).__name__
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses[status] += 1
+
+    with lock:
+        results['latencies'].extend(latencies)
+        results['statuses'].update(statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='后端压测')
+    parser.add_argument('--url', default='http://localhost:5000', help='后端地址')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发数')
+    parser.add_argument('--duration', type=float, default=20, help='持续时间(秒)')
+    parser.add_argument('--projects', type=int, default=5, help='参与压测的项目数')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    base_url = args.url.rstrip('/')
+    paths = discover_paths(base_url, args.projects)
+
+    print("=" * 60)
+    print("后端压测")
+    print("=" * 60)
+    print(f"目标: {base_url}  并发: {args.concurrency}  时长: {args.duration}s  路径: {len(paths)}个")
+
+    results = {'latencies': [], 'statuses': Counter()}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    started = time.monotonic()
+
+    threads = [
+        threading.Thread(target=worker, args=(base_url, paths, deadline, results, lock))
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.monotonic() - started
+    latencies = sorted(results['latencies'])
+    total = len(latencies)
+
+    print(f"\n请求总数: {total}  吞吐量: {total / elapsed:.1f} req/s")
+    print(f"状态: {dict(results['statuses'])}")
+    if total:
+        print("延迟(ms): " + "  ".join(
+            f"p{p}={percentile(latencies, p):.1f}" for p in (50, 90, 95, 99)
+        ) + f"  max={latencies[-1]:.1f}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
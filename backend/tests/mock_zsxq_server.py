@@ -0,0 +1,411 @@
+"""
+知识星球API本地模拟服务
+无需Token和网络即可对后端做压测, 支持可配置的数据规模与故障注入(延迟、429、5xx、畸形响应)
+
+运行方式:
+    python backend/tests/mock_zsxq_server.py --port 8089 --members 5000 --topics 2000
+    然后将config.yml中的 知识星球.api_base 改为 http://127.0.0.1:8089
+
+运行时调整故障注入:
+    curl -X POST http://127.0.0.1:8089/__mock__/config -d '{"error_5xx_rate": 0.2}'
+    curl http://127.0.0.1:8089/__mock__/stats
+"""
+import argparse
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+TZ = timezone(timedelta(hours=8))
+SCOPES = ('ongoing', 'closed', 'over')
+NAMES = ['张三', '李四', '王五', '赵六', '小明', '小红', '打卡达人', 'Alice', 'Bob', 'Carol']
+TEXT = '今天完成了晨跑5公里和30分钟阅读, 继续坚持打卡! '
+
+ROUTES = [
+    ('projects', re.compile(r'^/v2/groups/(?P<gid>[^/]+)/checkins$')),
+    ('project_detail', re.compile(r'^/v2/groups/(?P<gid>[^/]+)/checkins/(?P<pid>\d+)$')),
+    ('statistics', re.compile(r'^/v2/groups/(?P<gid>[^/]+)/checkins/(?P<pid>\d+)/statistics$')),
+    ('daily_stats', re.compile(r'^/v2/groups/(?P<gid>[^/]+)/checkins/(?P<pid>\d+)/statistics/daily$')),
+    ('ranking_list', re.compile(r'^/v2/groups/(?P<gid>[^/]+)/checkins/(?P<pid>\d+)/ranking_list$')),
+    ('topics', re.compile(r'^/v2/groups/(?P<gid>[^/]+)/checkins/(?P<pid>\d+)/topics$'))
+]
+
+
+def format_time(dt):
+    """格式化为知识星球时间格式 2025-01-01T08:00:00.000+0800"""
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}" + dt.strftime('%z')
+
+
+class MockData:
+    """
+    模拟数据集
+
+    项目列表在启动时生成; 排行榜与话题按项目首次访问时生成并缓存, 同一seed下结果确定。
+    """
+
+    def __init__(self, group_id, projects_per_scope, members, topics, seed):
+        self.group_id = str(group_id)
+        self.members = members
+        self.topics_count = topics
+        self.seed = seed
+        self.now = datetime.now(TZ).replace(microsecond=0)
+        self.projects = {}
+        self._rankings = {}
+        self._topics = {}
+        self._lock = threading.Lock()
+
+        checkin_id = 8424481000
+        for scope in SCOPES:
+            for i in range(projects_per_scope):
+                checkin_id += 1
+                self.projects[str(checkin_id)] = self._make_project(checkin_id, scope, i)
+
+    def _make_project(self, checkin_id, scope, i):
+        """生成单个项目, 起止时间与scope一致"""
+        if scope == 'ongoing':
+            start, end = self.now - timedelta(days=30 + i), self.now + timedelta(days=30 + i)
+        elif scope == 'closed':
+            start, end = self.now + timedelta(days=7 + i), self.now + timedelta(days=60 + i)
+        else:
+            start, end = self.now - timedelta(days=120 + i), self.now - timedelta(days=10 + i)
+
+        return {
+            'checkin_id': checkin_id,
+            'name': f"{scope}打卡项目{i + 1}",
+            'description': f"模拟项目 {checkin_id}",
+            'scope': scope,
+            'start_time': format_time(start),
+            'end_time': format_time(end),
+            'create_time': format_time(start - timedelta(days=3)),
+            'background': {'image_url': f"https://images.zsxq.com/checkin/{checkin_id}.jpg"},
+            'users_count': self.members,
+            'checkined_count': self.members * 12,
+            'current_continuous_days': 7,
+            'rules': '每天打卡一次'
+        }
+
+    def rankings(self, project_id, ranking_type):
+        """生成(并缓存)项目的完整排行榜"""
+        key = (project_id, ranking_type)
+        with self._lock:
+            if key not in self._rankings:
+                rnd = random.Random(f"{self.seed}:{project_id}:{ranking_type}")
+                days = sorted((rnd.randint(1, 365) for _ in range(self.members)), reverse=True)
+                self._rankings[key] = [{
+                    'rankings': i + 1,
+                    'checkined_days': days[i],
+                    'user': {
+                        'user_id': 10000000 + i,
+                        'name': f"{rnd.choice(NAMES)}{i}",
+                        'alias': '',
+                        'avatar_url': f"https://images.zsxq.com/avatar/{10000000 + i}.jpg"
+                    }
+                } for i in range(self.members)]
+            return self._rankings[key]
+
+    def topics(self, project_id):
+        """生成(并缓存)项目的话题, 按创建时间倒序, 部分话题共享同一时间戳"""
+        with self._lock:
+            if project_id not in self._topics:
+                rnd = random.Random(f"{self.seed}:{project_id}:topics")
+                created = self.now
+                items = []
+                for i in range(self.topics_count):
+                    # 约10%的话题与上一条同一毫秒, 用于覆盖分页边界
+                    if i == 0 or rnd.random() > 0.1:
+                        created = created - timedelta(seconds=rnd.randint(1, 600))
+                    topic_id = 50000000000000 + int(project_id) % 100000 * 100000 + i
+                    items.append({
+                        'topic': {
+                            'topic_id': topic_id,
+                            'title': f"第{self.topics_count - i}次打卡",
+                            'text': TEXT * rnd.randint(1, 8),
+                            'create_time': format_time(created),
+                            'user': {
+                                'user_id': 10000000 + rnd.randrange(max(self.members, 1)),
+                                'name': rnd.choice(NAMES),
+                                'avatar_url': ''
+                            }
+                        }
+                    })
+                self._topics[project_id] = items
+            return self._topics[project_id]
+
+
+class MockState:
+    """故障注入配置与请求统计(运行时可通过 /__mock__/config 修改)"""
+
+    FAULT_KEYS = ('latency_ms', 'latency_jitter_ms', 'error_429_rate', 'error_5xx_rate',
+                  'malformed_rate', 'retry_after')
+
+    def __init__(self, **faults):
+        self.faults = {key: faults.get(key, 0) for key in self.FAULT_KEYS}
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def record(self, endpoint, outcome):
+        with self.lock:
+            entry = self.stats.setdefault(endpoint, {})
+            entry[outcome] = entry.get(outcome, 0) + 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """模拟知识星球API的请求处理器"""
+
+    protocol_version = 'HTTP/1.1'
+    data = None
+    state = None
+    quiet = True
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def _send(self, status, body, headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _ok(self, resp_data):
+        self._send(200, {'succeeded': True, 'resp_data': resp_data})
+
+    def _fail(self, message, code=1059):
+        self._send(200, {'succeeded': False, 'code': code, 'error': {'message': message}})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/__mock__/config':
+            self._send(404, {'error': 'not found'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            updates = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, {'error': 'invalid json'})
+            return
+        with self.state.lock:
+            for key, value in updates.items():
+                if key in MockState.FAULT_KEYS:
+                    self.state.faults[key] = value
+            faults = dict(self.state.faults)
+        self._send(200, faults)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == '/__mock__/stats':
+            with self.state.lock:
+                self._send(200, {'faults': dict(self.state.faults), 'endpoints': self.state.stats})
+            return
+
+        for endpoint, pattern in ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            self._send(404, {'succeeded': False, 'error': {'message': '接口不存在'}})
+            return
+
+        if not self.headers.get('Authorization'):
+            self.state.record(endpoint, '401')
+            self._send(401, {'succeeded': False, 'error': {'message': '未登录'}})
+            return
+
+        if self._inject_faults(endpoint):
+            return
+
+        params = match.groupdict()
+        if params['gid'] != self.data.group_id:
+            self.state.record(endpoint, 'not_found')
+            self._fail('星球不存在')
+            return
+
+        self.state.record(endpoint, 'ok')
+        getattr(self, f"_handle_{endpoint}")(params.get('pid'), query)
+
+    def _inject_faults(self, endpoint):
+        """
+        按配置注入延迟与故障
+
+        Returns:
+            bool: 是否已返回故障响应
+        """
+        with self.state.lock:
+            faults = dict(self.state.faults)
+
+        delay = float(faults['latency_ms'])
+        if faults['latency_jitter_ms']:
+            delay += random.uniform(0, float(faults['latency_jitter_ms']))
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < faults['error_429_rate']:
+            self.state.record(endpoint, '429')
+            headers = {'Retry-After': faults['retry_after']} if faults['retry_after'] else None
+            self._send(429, {'succeeded': False, 'error': {'message': '请求过于频繁'}}, headers)
+            return True
+        roll -= faults['error_429_rate']
+
+        if roll < faults['error_5xx_rate']:
+            status = random.choice([500, 502, 503, 504])
+            self.state.record(endpoint, str(status))
+            self._send(status, b'<html><body>Bad Gateway</body></html>')
+            return True
+        roll -= faults['error_5xx_rate']
+
+        if roll < faults['malformed_rate']:
+            self.state.record(endpoint, 'malformed')
+            self._send(200, b'{"succeeded": true, "resp_data": {"checkins": [')
+            return True
+
+        return False
+
+    def _get_project(self, project_id):
+        project = self.data.projects.get(project_id)
+        if project is None:
+            self._fail('打卡项目不存在')
+        return project
+
+    def _handle_projects(self, _, query):
+        scope = query.get('scope', 'ongoing')
+        count = min(int(query.get('count', 20)), 100)
+        checkins = [p for p in self.data.projects.values() if p['scope'] == scope][:count]
+        self._ok({'checkins': checkins})
+
+    def _handle_project_detail(self, project_id, _):
+        project = self._get_project(project_id)
+        if project is not None:
+            self._ok(project)
+
+    def _handle_statistics(self, project_id, _):
+        project = self._get_project(project_id)
+        if project is not None:
+            self._ok({
+                'users_count': project['users_count'],
+                'checkined_count': project['checkined_count'],
+                'today_count': project['users_count'] // 3,
+                'continuous_rate': 0.42
+            })
+
+    def _handle_daily_stats(self, project_id, query):
+        project = self._get_project(project_id)
+        if project is not None:
+            date = unquote(unquote(query.get('date', ''))) or format_time(self.data.now)
+            self._ok({
+                'date': date[:10],
+                'count': project['users_count'] // 3,
+                'new_users': project['users_count'] // 50,
+                'active_users': project['users_count'] // 2
+            })
+
+    def _handle_ranking_list(self, project_id, query):
+        if self._get_project(project_id) is None:
+            return
+        ranking_type = query.get('type', 'continuous')
+        index = max(int(query.get('index', 0)), 0)
+        count = min(max(int(query.get('count', 30)), 1), 200)
+        rankings = self.data.rankings(project_id, ranking_type)
+        page = rankings[index * count:(index + 1) * count]
+        self._ok({
+            'ranking_list': page,
+            'user_specific': rankings[0] if rankings else {}
+        })
+
+    def _handle_topics(self, project_id, query):
+        if self._get_project(project_id) is None:
+            return
+        count = min(max(int(query.get('count', 20)), 1), 30)
+        topics = self.data.topics(project_id)
+        end_time = query.get('end_time')
+        if end_time:
+            # 与上游一致: 返回创建时间不晚于end_time的话题(包含边界)
+            end_time = unquote(end_time).replace(' ', '+')
+            topics = [t for t in topics if t['topic']['create_time'] <= end_time]
+        self._ok({'topics': topics[:count]})
+
+
+def create_server(host='127.0.0.1', port=8089, group_id='123456', projects_per_scope=5,
+                  members=1000, topics=500, seed=42, quiet=True, **faults):
+    """
+    创建模拟服务(供脚本内嵌使用)
+
+    Returns:
+        ThreadingHTTPServer: 未启动的服务实例, 调用serve_forever()运行
+    """
+    handler = type('BoundMockHandler', (MockHandler,), {
+        'data': MockData(group_id, projects_per_scope, members, topics, seed),
+        'state': MockState(**faults),
+        'quiet': quiet
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description='知识星球API本地模拟服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--group-id', default='123456', help='需与config.yml中的group_id一致')
+    parser.add_argument('--projects', type=int, default=5, help='每个scope的项目数')
+    parser.add_argument('--members', type=int, default=1000, help='每个项目的排行榜人数')
+    parser.add_argument('--topics', type=int, default=500, help='每个项目的话题数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, default=0, help='固定延迟(毫秒)')
+    parser.add_argument('--latency-jitter-ms', type=float, default=0, help='额外随机延迟上限(毫秒)')
+    parser.add_argument('--error-429-rate', type=float, default=0, help='返回429的比例')
+    parser.add_argument('--error-5xx-rate', type=float, default=0, help='返回5xx的比例')
+    parser.add_argument('--malformed-rate', type=float, default=0, help='返回截断JSON的比例')
+    parser.add_argument('--retry-after', type=float, default=0, help='429响应的Retry-After(秒), 0表示不返回')
+    parser.add_argument('--verbose', action='store_true', help='打印每个请求')
+    args = parser.parse_args()
+
+    server = create_server(
+        host=args.host,
+        port=args.port,
+        group_id=args.group_id,
+        projects_per_scope=args.projects,
+        members=args.members,
+        topics=args.topics,
+        seed=args.seed,
+        quiet=not args.verbose,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_429_rate=args.error_429_rate,
+        error_5xx_rate=args.error_5xx_rate,
+        malformed_rate=args.malformed_rate,
+        retry_after=args.retry_after
+    )
+
+    print("=" * 60)
+    print("知识星球API模拟服务")
+    print("=" * 60)
+    print(f"地址: http://{args.host}:{args.port}  group_id: {args.group_id}")
+    print(f"项目: {args.projects}/scope  排行榜: {args.members}人  话题: {args.topics}条/项目")
+    print(f"故障注入: {json.dumps(server.RequestHandlerClass.state.faults)}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,9 @@ API接口测试脚本
 运行方式: python backend/tests/test_api.py
 """
 import requests
+import inspect
 import json
+import os
 import sys
 from datetime import datetime
 
@@ -117,6 +119,37 @@ class APITester:
             self.print_error(f"请求失败: {str(e)}")
             return False
 
+    def check_async_client_parity(self):
+        """
+        检查异步客户端与同步客户端的接口签名一致
+
+        异步客户端的方法直接转发到同步客户端, 同步客户端新增参数时异步客户端需同步补上
+        """
+        print(f"\n{Colors.BOLD}测试: 异步客户端接口一致性{Colors.RESET}")
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        try:
+            from app.models.zsxq_client import ZSXQClient
+            from app.models.async_zsxq_client import AsyncZSXQClient
+        except ImportError as e:
+            self.print_warning(f"无法导入客户端模块, 跳过: {str(e)}")
+            return False
+
+        mismatched = []
+        for method_name in AsyncZSXQClient.ENDPOINTS.values():
+            sync_params = inspect.signature(getattr(ZSXQClient, method_name)).parameters
+            async_params = inspect.signature(getattr(AsyncZSXQClient, method_name)).parameters
+            if [(p.name, p.default) for p in sync_params.values()] != \
+                    [(p.name, p.default) for p in async_params.values()]:
+                mismatched.append(f"{method_name}: 同步{list(sync_params)} 异步{list(async_params)}")
+
+        if mismatched:
+            for item in mismatched:
+                self.print_error(f"签名不一致 {item}")
+            return False
+
+        self.print_success(f"{len(AsyncZSXQClient.ENDPOINTS)} 个方法签名一致")
+        return True
+
     def _format_data_summary(self, data):
         """格式化数据摘要"""
         if isinstance(data, dict):
@@ -254,6 +287,14 @@ class APITester:
             expected_status=404
         )
 
+        # 测试13b: 不存在项目的概览(统计接口的错误不应变成500)
+        self.test_endpoint(
+            name="不存在项目的概览",
+            method="GET",
+            endpoint="/api/projects/999999999/overview",
+            expected_status=404
+        )
+
         # 测试14: 无效的排行榜类型
         if projects:
             self.test_endpoint(
@@ -264,6 +305,10 @@ class APITester:
                 expected_status=400
             )
 
+        # 测试15: 异步客户端接口一致性
+        self.print_header("客户端一致性测试")
+        self.check_async_client_parity()
+
         # 打印测试摘要
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
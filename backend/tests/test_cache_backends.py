@@ -0,0 +1,153 @@
+"""
+缓存存储后端单元测试(Redis后端需要运行中的Redis, 不在此覆盖)
+"""
+import time
+import pytest
+from app.services.cache_backends import MemoryBackend, SQLiteBackend
+
+
+class FakeClock:
+    """同时替代time.time与time.monotonic的可推进时钟"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, 'time', clock)
+    monkeypatch.setattr(time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path, clock):
+    if request.param == 'memory':
+        return MemoryBackend(max_bytes=1024 * 1024)
+    return SQLiteBackend(path=str(tmp_path / 'cache' / 'cache.sqlite3'))
+
+
+def write(backend, values, ttl=60, key_tags=None):
+    backend.write_many(values, {key: ttl for key in values}, key_tags)
+
+
+def test_read_write_round_trip(backend):
+    write(backend, {'zsxq:a': b'1', 'zsxq:b': b'2'})
+
+    assert backend.read_many(['zsxq:a', 'zsxq:missing', 'zsxq:b']) == [b'1', None, b'2']
+
+
+def test_read_with_ttl(backend, clock):
+    write(backend, {'zsxq:a': b'1'}, ttl=60)
+    clock.now += 10
+
+    assert backend.read_many(['zsxq:a', 'zsxq:missing'], with_ttl=True) == [(b'1', 50000), (None, -2)]
+    assert backend.ttl('zsxq:a') == 50
+    assert backend.ttl('zsxq:missing') == -2
+
+
+def test_entries_expire(backend, clock):
+    write(backend, {'zsxq:a': b'1'}, ttl=60)
+    clock.now += 60
+
+    assert backend.read_many(['zsxq:a']) == [None]
+    assert backend.ttl('zsxq:a') == -2
+
+
+def test_overwrite_resets_ttl(backend, clock):
+    write(backend, {'zsxq:a': b'1'}, ttl=10)
+    clock.now += 5
+    write(backend, {'zsxq:a': b'2'}, ttl=10)
+    clock.now += 8
+
+    assert backend.read_many(['zsxq:a']) == [b'2']
+
+
+def test_delete_many(backend):
+    write(backend, {'zsxq:a': b'1', 'zsxq:b': b'2'})
+
+    assert backend.delete_many(['zsxq:a', 'zsxq:missing']) == 1
+    assert backend.read_many(['zsxq:a', 'zsxq:b']) == [None, b'2']
+
+
+def test_delete_tag_removes_registered_keys(backend):
+    write(backend, {'zsxq:a': b'1', 'zsxq:b': b'2', 'zsxq:c': b'3'}, key_tags={
+        'zsxq:a': ['tag:project:1'],
+        'zsxq:b': ['tag:project:1', 'tag:group'],
+        'zsxq:c': ['tag:group']
+    })
+
+    keys, deleted = backend.delete_tag('tag:project:1')
+
+    assert sorted(keys) == ['zsxq:a', 'zsxq:b']
+    assert deleted == 2
+    assert backend.read_many(['zsxq:a', 'zsxq:b', 'zsxq:c']) == [None, None, b'3']
+    # 标签集合本身也被清除
+    assert backend.delete_tag('tag:project:1') == ([], 0)
+
+
+def test_delete_tag_includes_expired_keys(backend, clock):
+    write(backend, {'zsxq:a': b'1'}, ttl=10, key_tags={'zsxq:a': ['tag:x']})
+    write(backend, {'zsxq:b': b'2'}, ttl=60, key_tags={'zsxq:b': ['tag:x']})
+    clock.now += 10
+
+    keys, deleted = backend.delete_tag('tag:x')
+
+    assert sorted(keys) == ['zsxq:a', 'zsxq:b']
+    # 过期但尚未清理的条目同样计入删除数
+    assert deleted == 2
+    assert backend.read_many(['zsxq:b']) == [None]
+
+
+def test_delete_pattern(backend):
+    write(backend, {'zsxq:project:1': b'1', 'zsxq:project:2': b'2', 'zsxq:stats:1': b'3'})
+
+    assert backend.delete_pattern('zsxq:project:*') == 2
+    assert backend.read_many(['zsxq:project:1', 'zsxq:stats:1']) == [None, b'3']
+
+
+def test_scan_skips_expired_entries(backend, clock):
+    write(backend, {'zsxq:project:1': b'1'}, ttl=10)
+    write(backend, {'zsxq:project:2': b'22', 'zsxq:stats:1': b'3'}, ttl=60)
+    clock.now += 10
+
+    entries = [entry for batch in backend.scan('zsxq:project:*') for entry in batch]
+
+    assert [(key, ttl) for key, _, ttl in entries] == [('zsxq:project:2', 50)]
+    assert entries[0][1] >= 2
+
+
+def test_ping(backend):
+    backend.ping()
+
+
+def test_memory_backend_evicts_over_byte_limit(clock):
+    backend = MemoryBackend(max_bytes=10)
+    write(backend, {'zsxq:a': b'12345'})
+    write(backend, {'zsxq:b': b'12345'})
+    write(backend, {'zsxq:c': b'12345'})
+
+    assert backend.read_many(['zsxq:a', 'zsxq:b', 'zsxq:c']) == [None, b'12345', b'12345']
+
+
+def test_sqlite_shares_data_between_instances(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    write(SQLiteBackend(path=path), {'zsxq:a': b'1'})
+
+    assert SQLiteBackend(path=path).read_many(['zsxq:a']) == [b'1']
+
+
+def test_sqlite_sweep_purges_expired_entries_and_their_tags(tmp_path, clock):
+    backend = SQLiteBackend(path=str(tmp_path / 'cache.sqlite3'))
+    backend.PURGE_EVERY = 2
+    write(backend, {'zsxq:a': b'1'}, ttl=10, key_tags={'zsxq:a': ['tag:x']})
+    clock.now += 10
+    write(backend, {'zsxq:b': b'2'}, ttl=60, key_tags={'zsxq:b': ['tag:x']})
+
+    connection = backend._connect()
+    assert [row[0] for row in connection.execute("SELECT key FROM cache_entries")] == ['zsxq:b']
+    assert [row[0] for row in connection.execute("SELECT key FROM cache_tags")] == ['zsxq:b']
@@ -0,0 +1,210 @@
+"""
+熔断器单元测试
+"""
+import pytest
+from app.models import circuit_breaker
+from app.models.circuit_breaker import (
+    CircuitBreaker, CircuitBreakerRegistry, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+)
+from app.models.zsxq_client import CircuitOpenError, ZSXQAPIError, ZSXQClient
+
+
+class FakeClock:
+    """可手动推进的monotonic时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('statistics', failure_threshold=3, recovery_timeout=10, half_open_max_calls=1)
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure('boom')
+
+
+def test_opens_after_consecutive_failures(breaker):
+    breaker.record_failure('boom')
+    breaker.record_failure('boom')
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record_failure('boom')
+    assert breaker.state == STATE_OPEN
+
+
+def test_success_resets_failure_count(breaker):
+    breaker.record_failure('boom')
+    breaker.record_failure('boom')
+    breaker.record_success()
+    breaker.record_failure('boom')
+
+    assert breaker.state == STATE_CLOSED
+    assert breaker.consecutive_failures == 1
+
+
+def test_open_rejects_until_recovery_timeout(breaker, clock):
+    open_breaker(breaker)
+
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1
+    assert breaker.retry_in() == 10
+
+    clock.now += 10
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_half_open_limits_probes(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 10
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_half_open_probe_success_closes(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.allow_request()
+
+    breaker.record_success()
+
+    assert breaker.state == STATE_CLOSED
+    assert [t['to'] for t in breaker.transitions] == [STATE_OPEN, STATE_HALF_OPEN, STATE_CLOSED]
+
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.allow_request()
+
+    breaker.record_failure('still down')
+
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+
+def test_release_returns_half_open_slot(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.allow_request()
+
+    breaker.release()
+
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_release_outside_half_open_is_noop(breaker):
+    breaker.release()
+
+    assert breaker.state == STATE_CLOSED
+    assert breaker.half_open_calls == 0
+
+
+@pytest.fixture
+def registry():
+    CircuitBreakerRegistry._breakers = {}
+    yield CircuitBreakerRegistry
+    CircuitBreakerRegistry._breakers = {}
+
+
+def test_registry_shares_breaker_per_family(registry):
+    config = {'failure_threshold': 5, 'families': {'statistics': {'failure_threshold': 2}}}
+
+    stats = registry.get('statistics', config)
+
+    assert registry.get('daily_stats', config) is stats
+    assert stats.failure_threshold == 2
+    assert registry.get('topics', config).failure_threshold == 5
+    assert registry.get('unknown', config).family == 'other'
+
+
+def test_registry_disabled_returns_none(registry):
+    assert registry.get('statistics', {'enabled': False}) is None
+
+
+class TestSendWithBreaker:
+    """ZSXQClient._send_with_breaker 对不同结果的熔断处理"""
+
+    @pytest.fixture
+    def client(self, app):
+        return ZSXQClient(app)
+
+    @pytest.fixture
+    def half_open(self, breaker, clock):
+        open_breaker(breaker)
+        clock.now += 10
+        return breaker
+
+    def send(self, client, breaker, monkeypatch, outcome):
+        def fake_send_request(*args, **kwargs):
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        monkeypatch.setattr(client, '_send_request', fake_send_request)
+        return client._send_with_breaker(breaker, 'GET', '/v2/test', None, None, 'statistics')
+
+    def test_success_closes_half_open(self, client, half_open, monkeypatch):
+        assert self.send(client, half_open, monkeypatch, {'ok': True}) == {'ok': True}
+        assert half_open.state == STATE_CLOSED
+
+    def test_retryable_error_reopens(self, client, half_open, monkeypatch):
+        error = ZSXQAPIError("服务器错误", status_code=502, retryable=True, error_class='server_error')
+
+        with pytest.raises(ZSXQAPIError):
+            self.send(client, half_open, monkeypatch, error)
+        assert half_open.state == STATE_OPEN
+
+    def test_rate_limited_is_neutral(self, client, half_open, monkeypatch):
+        error = ZSXQAPIError("请求过于频繁", status_code=429, retryable=True, error_class='rate_limited')
+
+        with pytest.raises(ZSXQAPIError):
+            self.send(client, half_open, monkeypatch, error)
+        assert half_open.state == STATE_HALF_OPEN
+        assert half_open.allow_request()
+
+    def test_rate_limited_does_not_count_as_failure(self, client, breaker, monkeypatch):
+        error = ZSXQAPIError("请求过于频繁", status_code=429, retryable=True, error_class='rate_limited')
+
+        for _ in range(breaker.failure_threshold + 1):
+            with pytest.raises(ZSXQAPIError):
+                self.send(client, breaker, monkeypatch, error)
+        assert breaker.state == STATE_CLOSED
+        assert breaker.consecutive_failures == 0
+
+    def test_client_error_counts_as_success(self, client, half_open, monkeypatch):
+        error = ZSXQAPIError("请求的资源不存在", status_code=404, error_class='not_found')
+
+        with pytest.raises(ZSXQAPIError):
+            self.send(client, half_open, monkeypatch, error)
+        assert half_open.state == STATE_CLOSED
+
+    def test_unexpected_error_releases_probe(self, client, half_open, monkeypatch):
+        with pytest.raises(RuntimeError):
+            self.send(client, half_open, monkeypatch, RuntimeError("redis down"))
+        assert half_open.state == STATE_HALF_OPEN
+        assert half_open.allow_request()
+
+    def test_open_breaker_fails_fast(self, client, breaker, monkeypatch):
+        open_breaker(breaker)
+
+        with pytest.raises(CircuitOpenError) as excinfo:
+            self.send(client, breaker, monkeypatch, {'ok': True})
+        assert excinfo.value.family == 'statistics'
+        assert excinfo.value.retry_in == 10
@@ -0,0 +1,143 @@
+"""
+进程内一级缓存单元测试
+"""
+import json
+import pytest
+from app.services import local_cache
+from app.services.local_cache import InvalidationBus, LocalCache
+
+
+class FakeClock:
+    """可手动推进的monotonic时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(local_cache.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+def test_get_returns_stored_value(clock):
+    cache = LocalCache()
+    cache.set('a', {'x': 1}, size=10)
+
+    assert cache.get('a') == (True, {'x': 1})
+    assert cache.get('b') == (False, None)
+    assert cache.get_stats()['hit_rate'] == 0.5
+
+
+def test_evicts_least_recently_used_over_byte_limit(clock):
+    cache = LocalCache(max_bytes=30)
+    cache.set('a', 1, size=10)
+    cache.set('b', 2, size=10)
+    cache.set('c', 3, size=10)
+    # 访问a后b成为最久未使用
+    cache.get('a')
+
+    cache.set('d', 4, size=10)
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.get('d') == (True, 4)
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] == 30
+
+
+def test_large_entry_evicts_several(clock):
+    cache = LocalCache(max_bytes=30)
+    cache.set('a', 1, size=10)
+    cache.set('b', 2, size=10)
+    cache.set('c', 3, size=10)
+
+    cache.set('big', 4, size=25)
+
+    assert [key for key, _, _ in cache.scan()] == ['big']
+    assert cache.get_stats()['bytes'] == 25
+
+
+def test_rejects_entry_over_item_limit(clock):
+    cache = LocalCache(max_bytes=100, max_item_bytes=20)
+    cache.set('big', 1, size=21)
+
+    assert cache.get('big') == (False, None)
+    assert cache.get_stats()['bytes'] == 0
+
+
+def test_overwrite_replaces_size(clock):
+    cache = LocalCache()
+    cache.set('a', 1, size=10)
+    cache.set('a', 2, size=4)
+
+    assert cache.get('a') == (True, 2)
+    assert cache.get_stats()['bytes'] == 4
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = LocalCache(ttl=30)
+    cache.set('a', 1, size=1)
+
+    clock.now += 29.9
+    assert cache.get('a') == (True, 1)
+
+    clock.now += 0.1
+    assert cache.get('a') == (False, None)
+    stats = cache.get_stats()
+    assert stats['expired'] == 1
+    assert stats['entries'] == 0
+
+
+def test_ttl_is_capped_by_redis_ttl(clock):
+    cache = LocalCache(ttl=30)
+    cache.set('a', 1, size=1, ttl=5)
+
+    clock.now += 5
+    assert cache.get('a') == (False, None)
+
+
+def test_non_positive_ttl_is_not_cached(clock):
+    cache = LocalCache()
+    cache.set('a', 1, size=1, ttl=0)
+
+    assert cache.get('a') == (False, None)
+
+
+def test_excluded_keys_are_not_cached(clock):
+    cache = LocalCache(exclude=['zsxq:topics:*'])
+    cache.set('zsxq:topics:1', 1, size=1)
+    cache.set('zsxq:project:1', 2, size=1)
+
+    assert cache.get('zsxq:topics:1') == (False, None)
+    assert cache.get('zsxq:project:1') == (True, 2)
+
+
+def test_delete_and_delete_pattern(clock):
+    cache = LocalCache()
+    for key in ('zsxq:project:1', 'zsxq:project:2', 'zsxq:stats:1'):
+        cache.set(key, key, size=1)
+
+    assert cache.delete(['zsxq:stats:1', 'missing']) == 1
+    assert cache.delete_pattern('zsxq:project:*') == 2
+    assert cache.get_stats()['entries'] == 0
+    assert cache.get_stats()['invalidations'] == 3
+
+
+def test_invalidation_message_from_other_process_is_applied(clock):
+    cache = LocalCache()
+    cache.set('zsxq:project:1', 1, size=1)
+    cache.set('zsxq:stats:1', 2, size=1)
+    bus = InvalidationBus(redis_client=None, channel='zsxq:invalidate', local_cache=cache)
+
+    bus._handle(json.dumps({'origin': bus.origin, 'keys': ['zsxq:project:1']}))
+    assert cache.get('zsxq:project:1') == (True, 1)
+
+    bus._handle(json.dumps({'origin': 'other', 'keys': ['zsxq:project:1'], 'pattern': 'zsxq:stats:*'}))
+    assert cache.get('zsxq:project:1') == (False, None)
+    assert cache.get('zsxq:stats:1') == (False, None)
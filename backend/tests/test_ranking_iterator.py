@@ -0,0 +1,119 @@
+"""
+排行榜分页遍历器单元测试
+"""
+from app.models.zsxq_client import RankingListIterator
+
+
+def member(user_id):
+    return {'user': {'user_id': user_id, 'name': f'用户{user_id}'}, 'checkined_days': 1}
+
+
+class FakeClient:
+    """按index返回预设分页的客户端"""
+
+    def __init__(self, pages, user_specific=None, ignore_index=False):
+        self.pages = pages
+        self.user_specific = user_specific
+        self.ignore_index = ignore_index
+        self.calls = []
+
+    def get_ranking_list(self, project_id, ranking_type='continuous', index=0, count=200):
+        self.calls.append((index, count))
+        if self.ignore_index:
+            index = 0
+        data = {'ranking_list': self.pages[index] if index < len(self.pages) else []}
+        if index == 0 and self.user_specific:
+            data['user_specific'] = self.user_specific
+        return data
+
+
+def pages_of(*sizes):
+    pages, next_id = [], 1
+    for size in sizes:
+        pages.append([member(user_id) for user_id in range(next_id, next_id + size)])
+        next_id += size
+    return pages
+
+
+def crawl(client, **kwargs):
+    iterator = RankingListIterator(client, 'p1', **kwargs)
+    return iterator, [item['user']['user_id'] for item in iterator]
+
+
+def test_stops_after_short_page():
+    client = FakeClient(pages_of(3, 3, 1))
+
+    iterator, user_ids = crawl(client, page_size=3)
+
+    assert user_ids == list(range(1, 8))
+    assert client.calls == [(0, 3), (1, 3), (2, 3)]
+    assert iterator.pages_fetched == 3
+    assert not iterator.truncated
+
+
+def test_stops_on_empty_page_after_full_pages():
+    client = FakeClient(pages_of(3, 3))
+
+    iterator, user_ids = crawl(client, page_size=3)
+
+    assert user_ids == list(range(1, 7))
+    assert iterator.pages_fetched == 3
+
+
+def test_upstream_count_cap_uses_first_page_size():
+    # 请求200条, 上游每页最多返回2条
+    client = FakeClient(pages_of(2, 2, 2, 1))
+
+    iterator, user_ids = crawl(client, page_size=200)
+
+    assert user_ids == list(range(1, 8))
+    assert iterator.pages_fetched == 4
+
+
+def test_single_short_page_confirms_with_one_more_request():
+    client = FakeClient(pages_of(5))
+
+    iterator, user_ids = crawl(client, page_size=200)
+
+    assert user_ids == [1, 2, 3, 4, 5]
+    assert client.calls == [(0, 200), (1, 200)]
+
+
+def test_repeated_page_is_detected_when_index_is_ignored():
+    client = FakeClient(pages_of(3), ignore_index=True)
+
+    iterator, user_ids = crawl(client, page_size=3)
+
+    assert user_ids == [1, 2, 3]
+    assert iterator.pages_fetched == 2
+
+
+def test_max_pages_truncates():
+    client = FakeClient(pages_of(2, 2, 2, 2))
+
+    iterator, user_ids = crawl(client, page_size=2, max_pages=2)
+
+    assert user_ids == [1, 2, 3, 4]
+    assert iterator.pages_fetched == 2
+    assert iterator.truncated
+
+
+def test_empty_ranking():
+    iterator, user_ids = crawl(FakeClient([]))
+
+    assert user_ids == []
+    assert iterator.pages_fetched == 1
+    assert iterator.user_specific is None
+
+
+def test_user_specific_is_taken_from_first_page():
+    client = FakeClient(pages_of(2, 1), user_specific={'rank': 3})
+
+    iterator, _ = crawl(client, page_size=2)
+
+    assert iterator.user_specific == {'rank': 3}
+
+
+def test_page_size_is_clamped():
+    assert RankingListIterator(None, 'p1', page_size=1000).page_size == 200
+    assert RankingListIterator(None, 'p1', page_size=0).page_size == 1
@@ -0,0 +1,118 @@
+"""
+重试策略单元测试
+"""
+import pytest
+from app.models import retry_policy
+from app.models.retry_policy import RetryBudget, RetryPolicy, parse_retry_after
+from app.models.zsxq_client import ZSXQAPIError
+
+
+@pytest.fixture(autouse=True)
+def reset_policy():
+    """重试预算与统计是进程级状态, 每个用例重新开始"""
+    RetryPolicy._budget = None
+    RetryPolicy._budget_config = None
+    RetryPolicy._stats = {}
+    yield
+    RetryPolicy._budget = None
+    RetryPolicy._budget_config = None
+    RetryPolicy._stats = {}
+
+
+def retryable(retry_after=None):
+    return ZSXQAPIError("服务器错误", status_code=503, retryable=True, retry_after=retry_after,
+                        error_class='server_error')
+
+
+def test_backoff_cap_grows_exponentially_up_to_max_delay(monkeypatch):
+    # 完全抖动: 取上限本身, 检查上限的计算
+    monkeypatch.setattr(retry_policy.random, 'uniform', lambda low, high: high)
+    policy = {'base_delay': 0.5, 'max_delay': 3.0}
+
+    assert [RetryPolicy.backoff_delay(attempt, policy) for attempt in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_next_delay_stays_within_jitter_range():
+    config = {
+        'background': {'base_delay': 1.0, 'max_delay': 30.0, 'max_attempts': 10},
+        'budget': {'max_tokens': 100}
+    }
+
+    for _ in range(50):
+        delay = RetryPolicy.next_delay(retryable(), 3, 'background', 'stats', config)
+        assert 0 <= delay <= 4.0
+
+
+def test_next_delay_skips_non_retryable_errors():
+    error = ZSXQAPIError("请求的资源不存在", status_code=404, error_class='not_found')
+
+    assert RetryPolicy.next_delay(error, 1, 'background', 'stats', {}) is None
+
+
+def test_next_delay_respects_disabled_config():
+    assert RetryPolicy.next_delay(retryable(), 1, 'background', 'stats', {'enabled': False}) is None
+
+
+def test_next_delay_stops_at_max_attempts():
+    config = {'interactive': {'max_attempts': 2}}
+
+    assert RetryPolicy.next_delay(retryable(), 1, 'interactive', 'stats', config) is not None
+    assert RetryPolicy.next_delay(retryable(), 2, 'interactive', 'stats', config) is None
+    assert RetryPolicy.get_stats()['endpoints']['stats']['exhausted'] == 1
+
+
+def test_retry_after_raises_the_delay():
+    config = {'background': {'base_delay': 0.01, 'max_delay': 0.01, 'max_retry_after': 60}}
+
+    assert RetryPolicy.next_delay(retryable(retry_after=5), 1, 'background', 'stats', config) == 5
+
+
+def test_retry_after_beyond_class_limit_gives_up():
+    config = {'interactive': {'max_retry_after': 2}}
+
+    assert RetryPolicy.next_delay(retryable(retry_after=10), 1, 'interactive', 'stats', config) is None
+
+
+def test_exhausted_budget_denies_retries():
+    config = {'budget': {'ratio': 0, 'min_per_second': 0, 'max_tokens': 2}}
+
+    delays = [RetryPolicy.next_delay(retryable(), 1, 'background', 'stats', config) for _ in range(3)]
+
+    assert delays[0] is not None and delays[1] is not None
+    assert delays[2] is None
+    assert RetryPolicy.get_stats()['endpoints']['stats']['budget_denied'] == 1
+
+
+def test_budget_deposits_ratio_per_request():
+    budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    budget.deposit()
+    assert not budget.try_spend()
+    budget.deposit()
+    assert budget.try_spend()
+
+
+def test_budget_never_exceeds_max_tokens():
+    budget = RetryBudget(ratio=1, min_per_second=0, max_tokens=3)
+    for _ in range(10):
+        budget.deposit()
+
+    assert budget.tokens == 3
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('3', 3.0),
+    ('0.5', 0.5),
+    ('-1', 0.0),
+    ('', None),
+    (None, None),
+    ('soon', None)
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date_in_the_past():
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
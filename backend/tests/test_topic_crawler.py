@@ -0,0 +1,160 @@
+"""
+话题历史抓取器单元测试
+"""
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+import redis
+from app.services.cache_service import CacheKeys, CacheService
+from app.services.topic_crawler import TopicHistoryCrawler, format_zsxq_time
+
+BASE_TIME = datetime(2025, 1, 15, 8, 0, tzinfo=timezone(timedelta(hours=8)))
+
+
+def topic(topic_id, minutes_ago):
+    create_time = format_zsxq_time(BASE_TIME - timedelta(minutes=minutes_ago))
+    return {'topic': {'topic_id': topic_id, 'create_time': create_time}}
+
+
+class FakeClient:
+    """按创建时间倒序分页的话题接口, end_time包含该时刻本身(与上游一致)"""
+
+    def __init__(self, topics):
+        self.topics = topics
+        self.calls = []
+
+    def get_topics(self, project_id, count=20, end_time=None):
+        self.calls.append(end_time)
+        ordered = sorted(self.topics, key=lambda t: t['topic']['create_time'], reverse=True)
+        if end_time:
+            ordered = [t for t in ordered if t['topic']['create_time'] <= end_time]
+        return {'topics': ordered[:count]}
+
+
+class FakeService:
+    def __init__(self, client):
+        self.client = client
+
+    def _format_topic(self, raw_topic):
+        return raw_topic['topic']['topic_id']
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class BrokenRedis:
+    def _fail(self, *args, **kwargs):
+        raise redis.ConnectionError("connection refused")
+
+    get = set = delete = _fail
+
+
+@pytest.fixture(autouse=True)
+def local_checkpoints(monkeypatch):
+    """默认没有Redis, 检查点保存在进程内"""
+    monkeypatch.setattr(CacheService, 'get_client', classmethod(lambda cls: None))
+    monkeypatch.setattr(TopicHistoryCrawler, '_local_checkpoints', {})
+
+
+def crawler(client, **kwargs):
+    return TopicHistoryCrawler(FakeService(client), 'p1', page_size=3, **kwargs)
+
+
+def test_full_crawl_yields_every_topic_once():
+    client = FakeClient([topic(f't{i}', i) for i in range(8)])
+
+    assert list(crawler(client)) == [f't{i}' for i in range(8)]
+    assert crawler(client).load_checkpoint()['complete']
+
+
+def test_resumes_from_checkpoint_after_interruption():
+    client = FakeClient([topic(f't{i}', i) for i in range(8)])
+
+    first = crawler(client, max_pages=2)
+    # 游标包含边界时刻, 第二页首条是第一页的边界话题, 按ID去重
+    assert list(first) == [f't{i}' for i in range(5)]
+    checkpoint = first.load_checkpoint()
+    assert not checkpoint['complete']
+    assert checkpoint['count'] == 5
+    assert checkpoint['cursor'] == client.topics[4]['topic']['create_time']
+    assert checkpoint['boundary_ids'] == ['t4']
+
+    second = crawler(client)
+    assert list(second) == ['t5', 't6', 't7']
+    assert client.calls[2] == checkpoint['cursor']
+    assert second.load_checkpoint()['count'] == 8
+    assert second.load_checkpoint()['complete']
+
+
+def test_resume_keeps_topics_sharing_the_boundary_time():
+    topics = [topic('t0', 0), topic('t1', 1), topic('t2', 2), topic('t3', 2), topic('t4', 3)]
+    client = FakeClient(topics)
+
+    first = list(crawler(client, max_pages=1))
+    rest = list(crawler(client))
+
+    assert sorted(first + rest) == ['t0', 't1', 't2', 't3', 't4']
+    assert len(first + rest) == 5
+
+
+def test_page_of_only_boundary_topics_moves_cursor_back():
+    # 同一时刻的话题多于一页
+    topics = [topic(f't{i}', 1) for i in range(4)] + [topic('old', 5)]
+    client = FakeClient(topics)
+
+    yielded = list(crawler(client))
+
+    assert 'old' in yielded
+    assert len(yielded) == len(set(yielded))
+
+
+def test_completed_crawl_only_fetches_newer_topics():
+    client = FakeClient([topic(f't{i}', i + 10) for i in range(5)])
+    list(crawler(client))
+
+    client.topics += [topic('new1', 1), topic('new2', 0)]
+
+    assert list(crawler(client)) == ['new2', 'new1']
+    assert list(crawler(client)) == []
+
+
+def test_reset_restarts_from_the_newest_topic():
+    client = FakeClient([topic(f't{i}', i) for i in range(4)])
+    list(crawler(client))
+
+    crawler(client).reset()
+
+    assert list(crawler(client)) == ['t0', 't1', 't2', 't3']
+
+
+def test_checkpoint_is_stored_as_json_in_redis(monkeypatch):
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(CacheService, 'get_client', classmethod(lambda cls: fake_redis))
+    client = FakeClient([topic(f't{i}', i) for i in range(8)])
+
+    list(crawler(client, max_pages=1))
+
+    stored = json.loads(fake_redis.data[CacheKeys.project_topics_checkpoint('p1')])
+    assert stored['count'] == 3
+    assert TopicHistoryCrawler._local_checkpoints == {}
+    assert list(crawler(client)) == [f't{i}' for i in range(3, 8)]
+
+
+def test_redis_errors_fall_back_to_process_checkpoint(monkeypatch):
+    monkeypatch.setattr(CacheService, 'get_client', classmethod(lambda cls: BrokenRedis()))
+    client = FakeClient([topic(f't{i}', i) for i in range(8)])
+
+    list(crawler(client, max_pages=1))
+
+    assert list(crawler(client)) == [f't{i}' for i in range(3, 8)]
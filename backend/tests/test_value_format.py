@@ -0,0 +1,133 @@
+"""
+缓存值格式单元测试
+"""
+import importlib.util
+import json
+import pytest
+from app.utils.codec import get_codec
+from app.utils.value_format import (
+    COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_ZSTD, HEADERS, ValueFormat
+)
+
+HAS_MSGPACK = importlib.util.find_spec('msgpack') is not None
+HAS_ZSTD = importlib.util.find_spec('zstandard') is not None
+
+# 足够大且可压缩, 保证压缩有收益
+DATA = {'members': [{'user_id': i, 'name': f'用户{i}', 'checkins': 30} for i in range(200)]}
+CACHED_AT = '2024-01-01T08:00:00'
+
+
+def make_format(kind, compression, threshold=0):
+    return ValueFormat(get_codec(kind), compression=compression, threshold=threshold)
+
+
+def requires(kind, compression):
+    marks = []
+    if kind == 'msgpack':
+        marks.append(pytest.mark.skipif(not HAS_MSGPACK, reason='msgpack未安装'))
+    if compression == COMPRESSION_ZSTD:
+        marks.append(pytest.mark.skipif(not HAS_ZSTD, reason='zstandard未安装'))
+    return marks
+
+
+@pytest.mark.parametrize('kind, compression, header', [
+    pytest.param(kind, compression, header, marks=requires(kind, compression), id=f'{header:#04x}')
+    for (kind, compression), header in sorted(HEADERS.items(), key=lambda item: item[1])
+])
+def test_round_trip_for_every_header(kind, compression, header):
+    value_format = make_format(kind, compression)
+
+    value = value_format.encode(DATA, cached_at=CACHED_AT)
+
+    assert value[0] == header
+    assert value_format.decode(value) == (DATA, CACHED_AT, None)
+
+
+@pytest.mark.parametrize('kind, compression', [
+    pytest.param(kind, compression, marks=requires(kind, compression))
+    for kind, compression in HEADERS
+])
+def test_any_format_can_read_every_header(kind, compression):
+    # 切换配置后旧配置写入的值仍可读取
+    value = make_format(kind, compression).encode(DATA, cached_at=CACHED_AT)
+
+    assert make_format('json', COMPRESSION_NONE).decode(value) == (DATA, CACHED_AT, None)
+
+
+def test_small_values_are_not_compressed():
+    value_format = make_format('json', COMPRESSION_ZLIB, threshold=1024)
+
+    value = value_format.encode({'a': 1}, cached_at=CACHED_AT)
+
+    assert value[0] == HEADERS[('json', COMPRESSION_NONE)]
+    assert value_format.decode(value) == ({'a': 1}, CACHED_AT, None)
+
+
+def test_incompressible_payload_is_kept_uncompressed():
+    value_format = make_format('json', COMPRESSION_ZLIB)
+
+    value = value_format.encode('x', cached_at=None)
+
+    assert value[0] == HEADERS[('json', COMPRESSION_NONE)]
+
+
+def test_negative_marker_round_trip():
+    value_format = make_format('json', COMPRESSION_ZLIB)
+
+    value = value_format.encode(None, cached_at=CACHED_AT, negative={'reason': 'not_found'})
+
+    assert value_format.decode(value) == (None, CACHED_AT, {'reason': 'not_found'})
+
+
+def test_missing_zstd_falls_back_to_zlib(monkeypatch):
+    from app.utils import value_format as module
+    monkeypatch.setattr(module, 'zstandard', None)
+
+    assert make_format('json', COMPRESSION_ZSTD).compression == COMPRESSION_ZLIB
+
+
+def test_unknown_compression_disables_compression():
+    assert make_format('json', 'lz4').compression == COMPRESSION_NONE
+
+
+@pytest.mark.parametrize('raw', [
+    json.dumps({'members': [1, 2], 'cached_at': CACHED_AT}).encode(),
+    json.dumps({'members': [1, 2], 'cached_at': CACHED_AT}, ensure_ascii=False, indent=2).encode()
+], ids=['compact', 'pretty'])
+def test_legacy_json_value(raw):
+    data, cached_at, negative = make_format('json', COMPRESSION_ZLIB).decode(raw)
+
+    assert data == {'members': [1, 2], 'cached_at': CACHED_AT}
+    assert cached_at == CACHED_AT
+    assert negative is None
+
+
+def test_legacy_json_list_has_no_cached_at():
+    assert make_format('json', COMPRESSION_NONE).decode(b'[1, 2]') == ([1, 2], None, None)
+
+
+@pytest.mark.skipif(not HAS_MSGPACK, reason='msgpack未安装')
+def test_legacy_msgpack_value():
+    import msgpack
+    raw = msgpack.packb({'members': [1, 2], 'cached_at': CACHED_AT})
+
+    data, cached_at, _ = make_format('msgpack', COMPRESSION_ZLIB).decode(raw)
+
+    assert data['members'] == [1, 2]
+    assert cached_at == CACHED_AT
+
+
+@pytest.mark.skipif(HAS_MSGPACK, reason='需要msgpack未安装的环境')
+def test_msgpack_header_without_msgpack_raises():
+    value = bytes((HEADERS[('msgpack', COMPRESSION_NONE)],)) + b'\x80'
+
+    with pytest.raises(ValueError):
+        make_format('json', COMPRESSION_NONE).decode(value)
+
+
+@pytest.mark.skipif(HAS_ZSTD, reason='需要zstandard未安装的环境')
+def test_zstd_header_without_zstandard_raises():
+    value = bytes((HEADERS[('json', COMPRESSION_ZSTD)],)) + b'\x28\xb5\x2f\xfd'
+
+    with pytest.raises(ValueError):
+        make_format('json', COMPRESSION_NONE).decode(value)
@@ -15,7 +15,9 @@ from app import create_app
 config_path = os.getenv('CONFIG_PATH', 'config.yml')
 
 # 创建应用实例
-application = create_app(config_path)
+# worker默认以background模式启动: Redis连接、定时任务与预热在后台完成, 上游客户端与缓存模块在首次使用时才导入,
+# worker重启后可立即处理请求; 可通过环境变量 STARTUP_MODE=blocking 恢复阻塞启动
+application = create_app(config_path, startup_mode=os.getenv('STARTUP_MODE', 'background'))
 app = application
 
 if __name__ == '__main__':